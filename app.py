@@ -1,10 +1,13 @@
 import handlers.MainHandler as mh
 import sys
+import multiprocessing
 from PyQt5 import QtWidgets
 from colorama import init as colorama_init
 import core.common as cm
 
 if __name__ == "__main__":
+    # Meshes are built in worker processes, also when frozen into an executable
+    multiprocessing.freeze_support()
     colorama_init()
     cm.main_handler = mh.MainHandler()
     app = QtWidgets.QApplication([])
@@ -7,7 +7,7 @@ a = Analysis(['app.py'],
              pathex=[
 		'venv\\Lib\\site-packages'
 	     ],
-             binaries=[( 'misc', '.' )],
+             binaries=[],
              datas= [( 'ui\\resources', 'ui\\resources' )],
              hiddenimports=['fbx', 'FbxCommon', 'fbxsip'],
              hookspath=[],
@@ -0,0 +1,162 @@
+import os, sys
+import json
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from colorama import init as colorama_init
+from core.Importer import Importer
+from core.Exporter import Exporter
+import core.utils as ut
+import core.constants as ct
+from core.ConversionContext import ConversionContext
+
+# Headless conversion of many files at once, each file being converted in its own process:
+# python -m batch export -o output_folder chara1.zpak chara2.zpak ...
+# python -m batch import -o output_folder extracted/chara1.zpak extracted/chara2.zpak ...
+# Settings of the app aren't used, everything is given on the command line
+
+input_exts = ['.zpak', '.stpz', '.pak', '.stpk', '.spr']
+
+def get_jobs(mode, paths, output_path):
+    jobs = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if (mode == 'import') or os.path.isfile(path):
+            jobs.append({'mode': mode, 'input': path, 'output': output_path})
+        elif os.path.isdir(path):
+            # Folders are searched for SPR files to export
+            for filename in os.listdir(path):
+                name, ext = os.path.splitext(filename)
+                if (ext.lower() in input_exts) and not name.endswith(('_i', '_v')):
+                    jobs.append({
+                        'mode': mode, 'input': os.path.join(path, filename), 'output': output_path
+                    })
+        else:
+            jobs.append({'mode': mode, 'input': path, 'output': output_path})
+    return jobs
+
+def run_job(job, game, platform, cache_path = None, cache_size = None, texture_cache = False,
+    block_cache = False):
+    """
+    Converts a single file, meant to be called in a worker process
+    """
+    result = dict(job)
+    start = time.time()
+    context = ConversionContext(game, platform, output_path=job['output'], cache_path=cache_path)
+    # Jobs already run in parallel
+    context.mesh_workers = 1
+    # Exports are only cached when a cache path is given
+    context.use_cache = (cache_path != None)
+    if cache_size != None:
+        context.cache_size = cache_size
+    context.use_texture_cache = texture_cache and (cache_path != None)
+    context.use_block_cache = block_cache and (cache_path != None)
+    try:
+        if not os.path.exists(job['input']):
+            raise Exception(f"File not found: {job['input']}")
+
+        if job['mode'] == 'export':
+            context.spr_path = job['input']
+            context.ioram_path, context.vram_path = ut.get_data_paths(context.spr_path, game)
+            if context.ioram_path == None:
+                raise Exception(f"IORAM file not found for: {context.spr_path}")
+            if context.vram_path == None:
+                raise Exception(f"VRAM file not found for: {context.spr_path}")
+            Exporter(context).run()
+        else:
+            if game == 'dbzb':
+                raise Exception(f"Imports for {ct.games[game]} aren't supported")
+            if not os.path.isdir(job['input']):
+                raise Exception(f"Not an extracted folder: {job['input']}")
+            Importer(context).run([job['input']])
+
+        result['status'] = 'done'
+        result['output'] = context.output_path
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+        result['traceback'] = traceback.format_exc()
+    finally:
+        context.close()
+
+    result['duration'] = round(time.time() - start, 3)
+    return result
+
+def run(jobs, game, platform, workers = None, cache_path = None, cache_size = None,
+    texture_cache = False, block_cache = False):
+    # Results are kept in jobs order
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for i in range(len(jobs)):
+            futures[executor.submit(run_job, jobs[i], game, platform, cache_path,
+                cache_size, texture_cache, block_cache)] = i
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                # Worker process died
+                results[i] = dict(jobs[i])
+                results[i]['status'] = 'error'
+                results[i]['error'] = str(e)
+            print(f"[{results[i]['status']}] {results[i]['input']}", file=sys.stderr)
+    return results
+
+def main(args = None):
+    parser = argparse.ArgumentParser(prog='python -m batch',
+        description='Converts many files in parallel, without the user interface')
+    parser.add_argument('mode', choices=['export', 'import'],
+        help='export SPR files (.zpak, .pak, .spr) or import extracted folders back')
+    parser.add_argument('paths', nargs='+',
+        help='files or extracted folders to convert, folders are searched for SPR files on export')
+    parser.add_argument('-o', '--output', required=True, help='output folder')
+    parser.add_argument('-g', '--game', choices=list(ct.games.keys()), default=ct.default_game)
+    parser.add_argument('-p', '--platform', choices=list(ct.platforms.keys()),
+        default=ct.default_platform)
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+        help='number of worker processes, CPU count by default')
+    parser.add_argument('-r', '--report', default=None,
+        help='path of the JSON report, printed when not provided')
+    parser.add_argument('-c', '--cache', default=None,
+        help='folder of the exports and textures caches, nothing is cached when not provided')
+    parser.add_argument('--cache-size', type=int, default=None,
+        help='size limit of the exports cache in MB, least recently used exports are removed')
+    parser.add_argument('--texture-cache', action='store_true',
+        help='also cache retiled Xbox 360 textures by content')
+    parser.add_argument('--block-cache', action='store_true',
+        help='also reuse encoded textures and meshes of unchanged files on import')
+    args = parser.parse_args(args)
+
+    output_path = os.path.abspath(args.output)
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    jobs = get_jobs(args.mode, args.paths, output_path)
+    start = time.time()
+    cache_path = None if (args.cache == None) else os.path.abspath(args.cache)
+    results = run(jobs, args.game, args.platform, args.jobs, cache_path,
+        args.cache_size, args.texture_cache, args.block_cache)
+    report = {
+        'game': args.game,
+        'platform': args.platform,
+        'duration': round(time.time() - start, 3),
+        'done': len([result for result in results if result['status'] == 'done']),
+        'errors': len([result for result in results if result['status'] == 'error']),
+        'results': results
+    }
+
+    json_data = json.dumps(report, indent=4)
+    if args.report != None:
+        stream = open(args.report, "w")
+        stream.write(json_data)
+        stream.close()
+    else:
+        print(json_data)
+
+    return 1 if report['errors'] > 0 else 0
+
+if __name__ == "__main__":
+    colorama_init()
+    sys.exit(main())
@@ -310,7 +310,7 @@ class BONE_DATA:
     def write(self, stream):
         stream.write(ut.i2b(self.index))
         self.name_offset = self.bone_string_table.offset + \
-            ut.search_index_dict(self.bone_string_table.content, self.name)
+            self.bone_string_table.offset_of(self.name)
         stream.write(ut.i2b(self.name_offset))
 
         self.child_count = len(self.children)
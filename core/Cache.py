@@ -0,0 +1,226 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+import core.utils as ut
+
+class Cache:
+    """
+    Content-addressed cache of converted folders or data on disk, each entry being
+    stored in its own folder named after its key.
+    Least recently used entries are removed when the cache exceeds max_size.
+    Data entries can also be kept in memory, up to memory_size bytes
+    """
+    # Changed when converters output changes, invalidating older entries
+    version = 1
+    info_name = 'info.json'
+    data_name = 'data'
+
+    def __init__(self, path, max_size, memory_size = 0):
+        self.path = path
+        self.max_size = max_size
+        self.memory = MemoryCache(memory_size) if (memory_size > 0) else None
+        os.makedirs(self.path, exist_ok=True)
+        # Size of the entries, read once then kept up to date when entries are added.
+        # Entries are only listed again when it goes over max_size
+        self.size = sum([size for last_use, size, entry_path in self.get_entries()])
+        self.lock = threading.Lock()
+
+    def get_key(self, paths, settings = {}):
+        """
+        Returns the key of the given input files content and conversion settings
+        """
+        key = hashlib.sha256()
+        key.update(json.dumps({'version': self.version, 'settings': settings},
+            sort_keys=True).encode())
+        for path in paths:
+            key.update(os.path.basename(path).encode())
+            key.update(ut.i2b(os.path.getsize(path), 8))
+            stream = open(path, 'rb')
+            chunk = stream.read(1 << 20)
+            while chunk:
+                key.update(chunk)
+                chunk = stream.read(1 << 20)
+            stream.close()
+        return key.hexdigest()
+
+    def get(self, key, output_path):
+        """
+        Copies the cached folder of key into output_path and returns its path,
+        None when key isn't cached
+        """
+        entry_path = os.path.join(self.path, key)
+        try:
+            info = self.read_info(entry_path)
+            # Last use is kept as the info file modification time
+            os.utime(os.path.join(entry_path, self.info_name))
+            path = os.path.join(output_path, info['name'])
+            if os.path.exists(path):
+                shutil.rmtree(path, onerror=ut.on_rm_error)
+            shutil.copytree(os.path.join(entry_path, self.data_name), path)
+            return path
+        except (OSError, ValueError, KeyError):
+            # Not cached, or removed by another process meanwhile
+            return None
+
+    def get_bytes(self, key):
+        """
+        Returns the data cached under key, None when key isn't cached
+        """
+        if self.memory != None:
+            data = self.memory.get(key)
+            if data != None:
+                return data
+        entry_path = os.path.join(self.path, key)
+        try:
+            os.utime(os.path.join(entry_path, self.info_name))
+            stream = open(os.path.join(entry_path, self.data_name), 'rb')
+            data = stream.read()
+            stream.close()
+        except OSError:
+            return None
+        if self.memory != None:
+            self.memory.put(key, data)
+        return data
+
+    def put(self, key, path):
+        """
+        Stores the folder at path under key
+        """
+        self.add_entry(key, os.path.basename(path), self.get_folder_size(path), path)
+
+    def put_bytes(self, key, data):
+        """
+        Stores data under key
+        """
+        if self.memory != None:
+            self.memory.put(key, data)
+        self.add_entry(key, key, len(data), data)
+
+    def add_entry(self, key, name, size, source):
+        entry_path = os.path.join(self.path, key)
+        if os.path.exists(entry_path) or (size > self.max_size):
+            return
+
+        # Written aside then renamed, so that other processes never see partial entries
+        temp_path = os.path.join(self.path, f".{key}.{uuid.uuid4().hex}")
+        try:
+            if isinstance(source, (bytes, bytearray)):
+                os.mkdir(temp_path)
+                stream = open(os.path.join(temp_path, self.data_name), 'wb')
+                stream.write(source)
+                stream.close()
+            else:
+                shutil.copytree(source, os.path.join(temp_path, self.data_name))
+            stream = open(os.path.join(temp_path, self.info_name), 'w')
+            stream.write(json.dumps({'name': name, 'size': size}))
+            stream.close()
+            os.rename(temp_path, entry_path)
+        except OSError:
+            # Already added by another thread or process
+            return
+        finally:
+            if os.path.exists(temp_path):
+                shutil.rmtree(temp_path, onerror=ut.on_rm_error)
+
+        with self.lock:
+            self.size += size
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits in max_size
+        """
+        # Listed again since other processes may have added or removed entries
+        entries = self.get_entries()
+        self.size = sum([size for last_use, size, entry_path in entries])
+        entries.sort()
+        for last_use, size, entry_path in entries:
+            if self.size <= self.max_size:
+                break
+            shutil.rmtree(entry_path, ignore_errors=True)
+            self.size -= size
+
+    def get_entries(self):
+        """
+        Returns the last use, size and path of every entry
+        """
+        entries = []
+        for key in os.listdir(self.path):
+            # Entries being written are skipped
+            if key.startswith('.'):
+                continue
+            entry_path = os.path.join(self.path, key)
+            try:
+                info = self.read_info(entry_path)
+                last_use = os.path.getmtime(os.path.join(entry_path, self.info_name))
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((last_use, info['size'], entry_path))
+        return entries
+
+    def clear(self):
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path, onerror=ut.on_rm_error)
+        os.makedirs(self.path)
+        self.size = 0
+        if self.memory != None:
+            self.memory.clear()
+
+    def read_info(self, entry_path):
+        stream = open(os.path.join(entry_path, self.info_name), 'r')
+        info = json.loads(stream.read())
+        stream.close()
+        return info
+
+    def get_folder_size(self, path):
+        size = 0
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                size += os.path.getsize(os.path.join(root, name))
+        return size
+
+    def __repr__(self):
+        return (
+            f'\nclass: {self.__class__.__name__}\n'
+            f'path: {self.path}\n'
+            f'size: {self.size}\n'
+            f'max_size: {self.max_size}'
+        )
+
+class MemoryCache:
+    """
+    Least recently used data kept in memory, up to max_size bytes.
+    Shared by threads processing textures in parallel
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, data):
+        with self.lock:
+            if (key in self.entries) or (len(data) > self.max_size):
+                return
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_size:
+                key, data = self.entries.popitem(last=False)
+                self.size -= len(data)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
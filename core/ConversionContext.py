@@ -0,0 +1,147 @@
+import os
+import gc
+import mmap
+from contextlib import contextmanager
+from .Cache import Cache
+
+class ConversionContext:
+    """
+    State of a single conversion: selected game and platform, settings, paths, data shared
+    between the converted files, caches and progress reporting
+    """
+    # Settings and paths, with their value when not provided
+    defaults = {
+        'use_blender': False,
+        'use_debug_mode': False,
+        'use_cache': False,
+        'cache_size': 2048, # MB
+        'use_texture_cache': False,
+        'texture_cache_size': 512, # MB
+        'texture_memory_size': 256, # MB
+        'use_block_cache': False,
+        'block_cache_size': 1024, # MB
+        'input_path': None,
+        'output_path': None,
+        'spr_path': None,
+        'ioram_path': None,
+        'vram_path': None,
+        'cache_path': None
+    }
+
+    def __init__(self, game, platform, progress = None, **values):
+        self.game = game
+        self.platform = platform
+        for key in values.keys():
+            if key not in self.defaults:
+                raise Exception(f"Unknown conversion setting: {key}")
+        for key, value in self.defaults.items():
+            setattr(self, key, values.get(key, value))
+        self.progress = progress
+        # Processes building FBX meshes, CPU count by default
+        self.mesh_workers = None
+        # Progress range (from 0 to 100) of the running stages
+        self.stages = [(0, 100)]
+
+        self.data = {}
+        self.ioram_data = None
+        self.vram_data = None
+        self.caches = {}
+        self.mapped_files = []
+
+    def send_progress(self, value):
+        """
+        Sends the progress (from 0 to 100) of the current stage
+        """
+        if self.progress != None:
+            start, end = self.stages[-1]
+            self.progress(int(start + (end - start) * value / 100))
+
+    def send_step_progress(self, start, end, step, step_count):
+        """
+        Sends the progress of step over step_count, between start and end of the current stage
+        """
+        if step_count > 0:
+            self.send_progress(start + (end - start) * step / step_count)
+
+    @contextmanager
+    def stage(self, start, end):
+        """
+        Progress sent inside is mapped between start and end of the current stage
+        """
+        stage_start, stage_end = self.stages[-1]
+        scale = (stage_end - stage_start) / 100
+        self.stages.append((stage_start + start * scale, stage_start + end * scale))
+        try:
+            yield
+        finally:
+            self.stages.pop()
+
+    def get_cache(self, name, enabled, max_size, memory_size = 0):
+        """
+        Returns the cache stored in the name folder of cache_path, None when disabled.
+        Data can also be kept in memory for this conversion (sizes in MB)
+        """
+        if (not enabled) or (self.cache_path == None):
+            return None
+        if name not in self.caches:
+            self.caches[name] = Cache(os.path.join(self.cache_path, name), max_size * 1024 * 1024,
+                memory_size * 1024 * 1024)
+        return self.caches[name]
+
+    def get_settings(self):
+        """
+        Returns the settings changing the conversion output
+        """
+        return {
+            'game': self.game,
+            'platform': self.platform,
+            'use_blender': self.use_blender,
+            'use_debug_mode': self.use_debug_mode
+        }
+
+    def map_file(self, path):
+        """
+        Returns the file at path mapped in memory (read only), unmapped when the context is closed
+        """
+        stream = open(path, 'rb')
+        mapped_file = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        stream.close()
+        self.mapped_files.append(mapped_file)
+        return mapped_file
+
+    def close(self):
+        """
+        Releases the data shared between the converted files and caches, and unmaps files
+        """
+        self.data = {}
+        self.caches = {}
+        self.ioram_data = None
+        self.vram_data = None
+        if self.mapped_files != []:
+            # Objects holding views over mapped files may only be referenced by cycles
+            gc.collect()
+            for mapped_file in self.mapped_files:
+                try:
+                    mapped_file.close()
+                except BufferError:
+                    # Views still used outside of the conversion, unmapped once collected
+                    pass
+            self.mapped_files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __deepcopy__(self, memo):
+        # Shared by every object of a conversion, never copied with them
+        return self
+
+    def __repr__(self):
+        return (
+            f'\nclass: {self.__class__.__name__}\n'
+            f'game: {self.game}\n'
+            f'platform: {self.platform}\n'
+            f'output_path: {self.output_path}'
+        )
@@ -0,0 +1,87 @@
+import os
+import core.utils as ut
+import core.constants as ct
+from .SPRP.SPRP import *
+from .STPZ import STPZ
+from .STPK import STPK
+
+class Exporter:
+    """
+    Exports an SPR file along with its ioram and vram files (paths of the context),
+    to a folder created in output_path
+    """
+    def __init__(self, context):
+        self.context = context
+
+    def run(self):
+        cache = self.context.get_cache('exports', self.context.use_cache,
+            self.context.cache_size)
+        if cache != None:
+            key = cache.get_key([self.context.spr_path, self.context.ioram_path,
+                self.context.vram_path], self.context.get_settings())
+            output_path = cache.get(key, self.context.output_path)
+            if output_path != None:
+                self.context.output_path = output_path
+                self.context.send_progress(100)
+                return
+
+        self.export()
+
+        if cache != None:
+            cache.put(key, self.context.output_path)
+
+    def export(self):
+        self.context.data = dict(zip(['spr', 'ioram', 'vram'], [{} for i in range(3)]))
+
+        self.context.data['spr_stpk'] = self.get_stpk_file(self.context.spr_path)
+        if self.context.data['spr_stpk'] == None:
+            del self.context.data['spr_stpk']
+            stream = open(self.context.spr_path, "rb")
+            data_tag = stream.read(4)
+            stream.seek(0)
+            if data_tag in ct.class_map:
+                data_tag = ct.class_map[data_tag]
+            name = os.path.basename(self.context.spr_path)
+            spr_object = eval(data_tag)(ut.s2b_name(name), context=self.context)
+            if spr_object == None:
+                raise Exception('Invalid file provided')
+            else:
+                self.context.data['spr'] = spr_object
+                self.context.data['spr'].read(stream, 0)
+            stream.close()
+
+        self.context.data['ioram_stpk'] = self.get_stpk_file(self.context.ioram_path)
+        if self.context.data['ioram_stpk'] == None:
+            stream = open(self.context.ioram_path, "rb")
+            self.context.ioram_data = stream.read()
+            stream.close()
+
+        self.context.data['vram_stpk'] = self.get_stpk_file(self.context.vram_path)
+        if self.context.data['vram_stpk'] == None:
+            stream = open(self.context.vram_path, "rb")
+            self.context.vram_data = stream.read()
+            stream.close()
+
+        if 'spr_stpk' in self.context.data.keys():
+            self.context.output_path = os.path.join(self.context.output_path,
+                ut.b2s_name(self.context.data['spr_stpk'].name))
+            self.context.data['spr_stpk'].save(self.context.output_path)
+        else:
+            self.context.output_path = os.path.join(self.context.output_path,
+                ut.b2s_name(self.context.data['spr'].name))
+            self.context.data['spr'].save(self.context.output_path)
+
+    def get_stpk_file(self, path):
+        stream = open(path, 'rb')
+        data_type = stream.read(4)
+        stream.close()
+        
+        stpk_object = None
+        if data_type == b'STPZ':
+            stpz_object = STPZ(os.path.basename(path), context=self.context)
+            stpk_object = stpz_object.decompress(path)
+        elif data_type == b'STPK':
+            stpk_object = STPK(os.path.basename(path), context=self.context)
+            # Entries are views over the mapped file, parsed on first access
+            stpk_object.read(self.context.map_file(path))
+        return stpk_object
\ No newline at end of file
@@ -5,20 +5,20 @@ import numpy as np
 import math
 import re
 import os
-import copy
+import multiprocessing
 import core.utils as ut
-import core.common as cm
-import core.commands as cmd
+import core.meshing as meshing
 from .BMP import BMP
+from .MeshBuffers import MeshBuffers
 from .DDS import DDS
 from .XML import XML
 from sys import platform
 from colorama import Fore, Style
+from concurrent.futures import ProcessPoolExecutor
 
 class FBX:
     remove_triangle_strip = True
     use_fbx_face_optimisation = False
-    use_per_vertex = not cm.use_blender
     version_from_vertices_list = True
 
     colors_components = ['r', 'g', 'b', 'a']
@@ -53,10 +53,16 @@ class FBX:
         'blend_weights': 1
     }
 
-    def __init__(self):
+    # Below this count of polygon vertices, starting worker processes costs more than it saves
+    pool_vertex_count = 50000
+
+    def __init__(self, context):
         self.data = {}
+        self.context = context
+        self.use_per_vertex = not self.context.use_blender
 
     def load(self, path):
+        self.path = os.path.dirname(path)
         global fbx_manager
         fbx_manager = fbx.FbxManager.Create()
         scene = fbx.FbxScene.Create(fbx_manager, '')
@@ -168,32 +174,37 @@ class FBX:
                     name = f"{name_parts[0]}_{i}:{name_parts[-1]}"
                     i += 1
 
-                self.mesh_data[name] = self.get_mesh_data(node, path)
+                # SDK data is read here, meshes are built all at once below
+                self.mesh_data[name] = self.read_mesh_data(node, path)
                 self.mesh_nodes[name] = node
+                self.context.send_step_progress(0, 50, len(self.mesh_data), len(nodes))
             else:
                 if node.GetChildCount() == 0:
                     self.other_nodes[name] = node
 
+        mesh_names = list(self.mesh_data.keys())
+        mesh_data = self.build_meshes_data(list(self.mesh_data.values()))
+        self.mesh_data = dict(zip(mesh_names, mesh_data))
+
     def save(self, path):
         if not os.path.exists(path):
             os.mkdir(path)
-        os.chdir(path)
+        self.path = path
 
         (fbx_manager, scene) = FbxCommon.InitializeSdkObjects()
         
-        self.handle_data(fbx_manager, scene)
-        if not cm.use_debug_mode:
+        with self.context.stage(0, 90):
+            self.handle_data(fbx_manager, scene)
+        if not self.context.use_debug_mode:
             fbx_manager.GetIOSettings().SetIntProp(fbx.EXP_FBX_COMPRESS_LEVEL, 9)
-        FbxCommon.SaveScene(fbx_manager, scene, "output.fbx", 0)
-        if cm.use_debug_mode:
-            FbxCommon.SaveScene(fbx_manager, scene, "output.fbx.txt", 1)
+        FbxCommon.SaveScene(fbx_manager, scene, os.path.join(path, "output.fbx"), 0)
+        if self.context.use_debug_mode:
+            FbxCommon.SaveScene(fbx_manager, scene, os.path.join(path, "output.fbx.txt"), 1)
 
         fbx_manager.Destroy()
         del scene
         del fbx_manager
 
-        os.chdir('..')
-
         return
 
     def handle_data(self, manager, scene):
@@ -357,9 +368,12 @@ class FBX:
                 if node_name not in parent_list:
                     mesh_parents[mesh_name].append(node_name)
 
+        self.context.send_progress(10)
+
         # Build nodes
-        for model in self.data['model']:
-            self.add_mesh_node(manager, scene, model, mesh_parents, layered_mesh_names)
+        for i in range(len(self.data['model'])):
+            self.add_mesh_node(manager, scene, self.data['model'][i], mesh_parents, layered_mesh_names)
+            self.context.send_step_progress(10, 100, i + 1, len(self.data['model']))
 
         self.get_children(model_node, nodes, ['FbxNull', 'FbxMesh'])
 
@@ -391,30 +405,54 @@ class FBX:
                 # If node is not in the list, add it
                 node_array += [node]
 
-    def retrieve_layers_data(self, layers, default_val = [0, 0, 0, 0]):
-        """Take care about eIndexToDirect or eDirect"""
+    def get_layer_value(self, value, param):
+        if (param == 'color'):
+            # use color prop map to retrieve r,g,b,a from FBXColor
+            return [getattr(value, self.color_prop_map[c]) for c in self.colors_components]
+        elif (param == 'uv'):
+            return [value[0], value[1]]
+        return list(value)
+
+    def retrieve_layers_data(self, layers, param, control_point_indices, default_val = [0, 0, 0, 0]):
+        """
+        Take care about eIndexToDirect or eDirect, and eByControlPoint or eByPolygonVertex.
+        Returns one array per layer with a value for every polygon vertex
+        """
+        components = self.components_map[param] if (param in self.components_map) else self.others_components
+        corner_count = len(control_point_indices)
         data = []
         for layer in layers:
-            values = []
+            list_values = layer.GetDirectArray()
+            values = [self.get_layer_value(list_values.GetAt(j), param) for j in range(list_values.GetCount())]
+            # Last row is used for missing values
+            values.append(default_val[:len(components)])
+            values = np.array(values, dtype=np.float64)
 
             if (layer.GetReferenceMode() == fbx.FbxLayerElement.eIndexToDirect):
                 list_index = layer.GetIndexArray()
-                list_values = layer.GetDirectArray()
+                indices = np.array([list_index.GetAt(j) for j in range(list_index.GetCount())], dtype=np.int64)
+            else:
+                indices = np.arange(len(values) - 1)
+            indices[(indices < 0) | (indices >= len(values) - 1)] = len(values) - 1
 
-                for j in range(list_index.GetCount()):
-                    index = list_index.GetAt(j)
-                    if (index < list_values.GetCount()):
-                        values.append(list_values.GetAt(index))
-                    else:
-                        values.append(default_val)
+            if (layer.GetMappingMode() == fbx.FbxLayerElement.eByControlPoint):
+                corner_indices = control_point_indices
             else:
-                for val in layer.GetDirectArray():
-                    values.append(val)
-            data.append({'list': values, 'mapping': layer.GetMappingMode()})
+                corner_indices = np.arange(corner_count)
+            indices = np.append(indices, len(values) - 1)
+            corner_indices = np.minimum(corner_indices, len(indices) - 1)
+            values = values[indices[corner_indices]]
+
+            if (param == 'uv'):
+                values[:, 1] = 1.0 - values[:, 1]
+            data.append(values)
 
         return data
 
-    def get_mesh_data(self, node, path):
+    def read_mesh_data(self, node, path):
+        """
+        Reads everything needed from the SDK to build the mesh, as plain data
+        """
         mesh = node.GetMesh()
         name = mesh.GetName()
 
@@ -472,7 +510,7 @@ class FBX:
                     weights = cluster.GetControlPointWeights()
 
                     for j in range(nb_vertex_for_cluster):
-                        blend_by_vertex[vertex_indices[j]].append({'indexBone': bone_idx, 'weight': weights[j]})
+                        blend_by_vertex[vertex_indices[j]].append((bone_idx, weights[j]))
                         nb_tmp = len(blend_by_vertex[vertex_indices[j]])
                         nb_bone_layer = nb_tmp if (nb_tmp > nb_bone_layer) else nb_bone_layer
 
@@ -485,160 +523,43 @@ class FBX:
         if (nb_bone_layer > 4):
             nb_bone_layer = 4
 
+        # Every polygon vertex (triangles only) with its control point
+        polygon_count = mesh.GetPolygonCount()
+        control_point_indices = np.array([mesh.GetPolygonVertex(i, k) \
+            for i in range(polygon_count) for k in range(3)], dtype=np.int64)
+        faces_triangles = None
+        if not use_per_polygone_values:
+            control_point_indices = np.arange(mesh.GetControlPointsCount())
+            faces_triangles = [[mesh.GetPolygonVertex(i, k) for k in range(3)] for i in range(polygon_count)]
+
         # TODO look values (in xeno convertion by v_copy.setColorFromRGBAFloat((float)color.mRed, (float)color.mGreen, (float)color.mBlue, (float)color.mAlpha))
         layers_dict = {
-            'color': self.retrieve_layers_data(colors_layers, [0, 0, 0, 1.0]),
-            'normal': self.retrieve_layers_data(normals_layers),
-            'binormal': self.retrieve_layers_data(binormals_layers),
-            'tangent': self.retrieve_layers_data(tangents_layers),
-            'uv': self.retrieve_layers_data(uvs_layers)
+            'color': self.retrieve_layers_data(colors_layers, 'color', control_point_indices, [0, 0, 0, 1.0]),
+            'normal': self.retrieve_layers_data(normals_layers, 'normal', control_point_indices),
+            'binormal': self.retrieve_layers_data(binormals_layers, 'binormal', control_point_indices),
+            'tangent': self.retrieve_layers_data(tangents_layers, 'tangent', control_point_indices),
+            'uv': self.retrieve_layers_data(uvs_layers, 'uv', control_point_indices)
         }
-
-        param_names = ['color', 'normal', 'binormal', 'tangent', 'uv', 'blend_indices', 'blend_weights']
-
-        vertices = []
-        for i in range(mesh.GetControlPointsCount()):
-            vertices.append({})
-            vertices[i] = dict(zip(param_names, [[] for x in range(len(param_names))]))
-
-            # w = 1.0 because it's lost after FBX export
-            vertices[i]['position'] = dict(zip(self.others_components, mesh.GetControlPointAt(i)))
-            vertices[i]['position']['w'] = 1.0
-
-            # (Olganix) here we only do the eByControlPoint (or fill default value), eByPolygon will be done after.
-            for param, layer in layers_dict.items():
-                components = self.components_map[param] if (param in self.components_map) else self.others_components
-                for layer_data in layer:
-                    if not use_per_polygone_values:
-                        if (param == 'uv'):
-                            layer_data['list'][i] = (layer_data['list'][i][0], (1.0 - layer_data['list'][i][1]))
-                        vertices[i][param].append(dict(zip(components, layer_data['list'][i])))
-                    else:
-                        vertices[i][param].append(dict(zip(components, [0 for x in range(len(components))])))
-
-            blends = blend_by_vertex[i]
-            # Apparently we have to order by weight (bigger first), and for the same weight, order by index
-            # Cheating by order by index first
-            blends.sort(key=lambda x: x.get('indexBone'))
-            # Order rewritten by weight (but index's order will be correct for same weight)
-            blends.sort(key=lambda x: x.get('weight'), reverse=True)
-
-            vertices[i]['blend_indices'] = []
-            vertices[i]['blend_weights'] = []
-
-            # Fill if not defined to always have nb_bone_layer values
-            for j in range(nb_bone_layer):
-                blend = blends[j] if ((j < nb_bone_layer) and (j < len(blends))) \
-                                else {'indexBone': 0, 'weight': 0.0}
-                vertices[i]['blend_indices'].append(blend['indexBone'])
-                vertices[i]['blend_weights'].append(blend['weight'])
-
-        faces_triangles = []
-        new_vertices_per_poly = []
-        for i in range(mesh.GetPolygonCount()):
-            face = [mesh.GetPolygonVertex(i, 0), mesh.GetPolygonVertex(i, 1), mesh.GetPolygonVertex(i, 2)]
-            if use_per_polygone_values:
-                face = self.build_per_polygon_vertices(vertices, layers_dict, new_vertices_per_poly, face, i)
-            faces_triangles.append(face)
-
-        if use_per_polygone_values:
-            vertices = new_vertices_per_poly
-
-        if cm.use_debug_mode:
-            self.create_mesh_debug_xml("10_ImportedFromFbx", name.replace(":", "_"), vertices, faces_triangles)
-
-        # TODO maybe add a part to optimize the vertex and face before making triangle strip (depend of optimisation of 3dsmax / blender)
-
-        # ------------------------------------------------ 
-        # Transform Triangle list -> Triangle Strip 
-        # ------------------------------------------------
-
-        # Using NviTriStripper to generate the strip indices then build the strip
-        flat_tri = sum(faces_triangles, [])
-        tri_indices_text = str(flat_tri).replace(" ", "").replace("[", "").replace("]", "")
-
-        tri_in_path = os.path.join(cm.temp_path, "triangles.txt")
-        tri_input = open(os.path.join(cm.temp_path, "triangles.txt"), 'w')
-        tri_input.write(tri_indices_text)
-        tri_input.flush()
-
-        tri_out_path = os.path.join(cm.temp_path, "triangles_out.txt")
-        cmd.nvtri_stripper(tri_in_path, tri_out_path)
-        tri_output = open(tri_out_path, "r")
-        strip_indices = eval(tri_output.readline().strip())
-
-        if cm.use_debug_mode:
-            new_faces_triangles = []
-            for i in range(0, len(strip_indices), 3):
-                new_faces_triangles.append(
-                    [strip_indices[i],
-                     strip_indices[((i + 1) if (i + 1 < len(strip_indices)) else (len(strip_indices) - 1))],
-                     strip_indices[((i + 2) if (i + 2 < len(strip_indices)) else (len(strip_indices) - 1))]]
-                )
-            faces_triangles = new_faces_triangles
-            self.create_mesh_debug_xml("11_MakingTriangleStrip", name.replace(":", "_"), vertices, faces_triangles)
-
-        # -------------------------------------------------------------------------------------------------------------
-        # Apply Triangle Strip  on Vertex (Game's logic  / bad logic : they don't have faceIndex, but duplicate Vertex)
-        # RB uses duplicate vertices while UT uses face indices
-        # -------------------------------------------------------------------------------------------------------------
-
-        if cm.selected_game in ['dbrb', 'dbrb2']:
-            new_vertices = []
-            for i in range(len(strip_indices)):
-                new_vertices.append(vertices[strip_indices[i]])
-            vertices = new_vertices
-
-            if cm.use_debug_mode:
-                new_faces_triangles = []
-                for i in range(len(vertices) - 2):
-                    # Triangle strips logic
-                    if (i % 2 == 0):
-                        new_faces_triangles.append([i, i + 1, i + 2])
-                    else:
-                        new_faces_triangles.append([i, i + 2, i + 1])
-
-                faces_triangles = new_faces_triangles
-                self.create_mesh_debug_xml("12_TriangleStripOnVertex", name.replace(":", "_"), vertices, faces_triangles)
-
-        # ------------------------------------------------ 
-        # Fill internal data for building spr
-        # ------------------------------------------------ 
-
+        layers = []
+        for param, layer in layers_dict.items():
+            key = ut.search_index_dict(self.params_map, param)
+            for j in range(len(layer)):
+                info = {'resource_name': uvs_layers[j].GetName()} if (param == 'uv') else {}
+                layers.append((key, layer[j], info))
+
+        # w = 1.0 because it's lost after FBX export
+        positions = np.array([list(mesh.GetControlPointAt(i)) \
+            for i in range(mesh.GetControlPointsCount())], dtype=np.float64).reshape(-1, 4)
+        positions[:, 3] = 1.0
+
+        materials = {}
         if self.version_from_vertices_list:
-
-            # TODO case no Vertex
-
-            param_names = ['normals', 'binormals', 'uvs', 'bone_weights', 'bone_indices']
-            data = dict(zip(param_names, [[] for x in range(len(param_names))]))
-            for param in data.keys():
-                new_param = self.params_map[param]
-                for i in range(len(vertices[0][new_param])):
-                    data[param].append({'data': []})
-                    if param == 'uvs':
-                        data[param][-1]['resource_name'] = uvs_layers[i].GetName()
-            data.update({'positions': [{'data': []}], 'materials': {}})
-
-            for i in range(len(vertices)):
-                vertex = vertices[i]
-
-                data['positions'][0]['data'].append(list(vertex['position'].values()))
-                for j in range(len(vertices[0]['normal'])):
-                    data['normals'][j]['data'].append(list(vertex['normal'][j].values()))
-                for j in range(len(vertices[0]['binormal'])):
-                    data['binormals'][j]['data'].append(list(vertex['binormal'][j].values()))
-                for j in range(len(vertices[0]['uv'])):
-                    data['uvs'][j]['data'].append(list(vertex['uv'][j].values()))
-                for j in range(len(vertices[0]['blend_indices'])):
-                    data['bone_indices'][j]['data'].append(vertex['blend_indices'][j])
-                    data['bone_weights'][j]['data'].append(vertex['blend_weights'][j])
-
             for i in range(node.GetMaterialCount()):
                 material = node.GetMaterial(i)
                 material_name = material.GetName()
                 prop = material.FindProperty(fbx.FbxSurfaceMaterial.sDiffuse)
 
-                if material_name not in data['materials']:
+                if material_name not in materials:
                     # Reading textures from materials directly if layered textures aren't found
                     source_obj = prop.GetSrcObject(fbx.FbxCriteria.ObjectType(fbx.FbxLayeredTexture.ClassId), 0)
                     if source_obj:
@@ -657,108 +578,116 @@ class FBX:
 
                         if isinstance(source_obj, fbx.FbxLayeredTexture):
                             layer = texture.GetName()
-                        elif cm.use_blender:
+                        elif self.context.use_blender:
                             name_parts = material.GetName().rsplit(':', 1)
                             material_name = name_parts[0]
                             layer = name_parts[-1].split('.')[0]
                         else:
                             layer = material.GetName()
 
-                        if (material_name not in data['materials']):
-                            data['materials'][material_name] = []
-                        data['materials'][material_name].append((layer, filename))
+                        if (material_name not in materials):
+                            materials[material_name] = []
+                        materials[material_name].append((layer, filename))
+
+        return {
+            'name': name,
+            'positions': positions,
+            'control_point_indices': control_point_indices,
+            'faces_triangles': faces_triangles,
+            'layers': layers,
+            'blend_by_vertex': blend_by_vertex,
+            'nb_bone_layer': nb_bone_layer,
+            'materials': materials
+        }
 
-        if cm.selected_game in ['dbut', 'dbzb']:
-            data['face_indices'] = strip_indices
-        data = {k: v for k, v in data.items() if v != []}
+    def build_meshes_data(self, meshes):
+        """
+        Builds meshes read by read_mesh_data, in worker processes when there are several big ones
+        """
+        vertex_count = sum([len(mesh['control_point_indices']) for mesh in meshes])
+        if self.context.use_debug_mode or (self.context.mesh_workers == 1) or (len(meshes) < 2) or \
+           (vertex_count < self.pool_vertex_count):
+            # Debug files are written along the way
+            debug = self.create_mesh_debug_xml if self.context.use_debug_mode else None
+            results = []
+            for i in range(len(meshes)):
+                results.append(meshing.build_mesh_data(meshes[i], self.context.game, debug))
+                self.context.send_step_progress(50, 100, i + 1, len(meshes))
+        else:
+            results = []
+            workers = self.context.mesh_workers
+            if workers == None:
+                workers = min(len(meshes), os.cpu_count() or 1)
+            # Workers are spawned, forking a process running Qt threads isn't safe
+            with ProcessPoolExecutor(max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(meshing.build_mesh_data, mesh, self.context.game) \
+                    for mesh in meshes]
+                for i in range(len(futures)):
+                    results.append(futures[i].result())
+                    self.context.send_step_progress(50, 100, i + 1, len(futures))
 
+        data = []
+        for i in range(len(meshes)):
+            data.append({'buffers': results[i], 'materials': meshes[i]['materials']})
         return data
 
-    def remove_duplicate_vertices(self, vertices, faces_triangles):
-        list_vertex_id_redirection = []
-        new_vertices = []
-
-        for i in range(len(vertices)):
-            vertex = vertices[i]
-            is_found = -1
+    def get_mesh_data(self, node, path):
+        return self.build_meshes_data([self.read_mesh_data(node, path)])[0]
 
-            for j in range(len(new_vertices)):
-                if (vertex == new_vertices[j]):
-                    is_found = j
-                    break
+    def remove_duplicate_vertices(self, buffers, faces_triangles):
+        if buffers.get_vertex_count() == 0:
+            return buffers, faces_triangles
 
-            list_vertex_id_redirection.append(is_found if (is_found != -1) else len(new_vertices))
-            if is_found == -1:
-                new_vertices.append(vertex)
+        # Vertices keep their first appearance order
+        new_buffers, list_vertex_id_redirection = buffers.unique()
 
         # Now we have just to change index for faces to get the same.
-        new_faces_triangles = []
-        for i in range(len(faces_triangles)):
-            new_triangle = []
-            for j in range(3): 
-                new_triangle.append(list_vertex_id_redirection[faces_triangles[i][j]])
-            new_faces_triangles.append(new_triangle)
-
-        return new_vertices, new_faces_triangles
-
-    def build_per_polygon_vertices(self, vertices, layers_dict, new_vertices_per_poly, face, poly_idx):
-        for k in range(3):
-            # Clone vertex
-            new_vertex = copy.deepcopy(vertices[face[k]])
-
-            for param, layer in layers_dict.items():
-                components = self.components_map[param] \
-                    if (param in self.components_map) else self.others_components
-                for j in range(len(layer)):
-                    if (param == 'uv'):
-                        uv = layer[j]['list'][poly_idx * 3 + k]
-                        new_vertex[param][j] = dict(zip(components, [uv[0], (1.0 - uv[1])]))
-                    elif (param == 'color'):
-                        # use color prop map to retrieve r,g,b,a from FBXColor
-                        color = layer[j]['list'][poly_idx * 3 + k]
-                        new_color = []
-                        for c in components:
-                            prop = self.color_prop_map[c]
-                            new_color.append(eval(f"color.{prop}"))
-                        new_vertex[param][j] = dict(zip(components, new_color))
-                    else:
-                        new_vertex[param][j] = dict(zip(components, layer[j]['list'][poly_idx * 3 + k]))
-
-            if (new_vertex not in new_vertices_per_poly):
-                new_index = len(new_vertices_per_poly)
-                new_vertices_per_poly.append(new_vertex)
-            else:
-                new_index = new_vertices_per_poly.index(new_vertex)
-            face[k] = new_index
+        new_faces_triangles = list_vertex_id_redirection[
+            np.asarray(faces_triangles, dtype=np.int64).reshape(-1, 3)
+        ].tolist()
 
-        return face
+        return new_buffers, new_faces_triangles
 
-    def build_layers_data_per_vertex(self, mesh, vertex, layers, param, fbx_le, fbx_layers, callback):
-        for j in range(len(vertex[param])):
-            if (j >= len(fbx_layers)):
-                if param in ['uv', 'binormal']:
-                    param_name = layers[param][j]['resource_name']
-                else:
-                    param_name = param + (("_" + str(j)) if (j != 0) else "")
+    def add_layer_values(self, fbx_layer, data, param):
+        # Values are converted at once, then the array is sized once and filled
+        if (param == 'uv'):
+            values = np.column_stack((data[:, 0], 1.0 - data[:, 1])).tolist()
+            vector_class = fbx.FbxVector2
+        else:
+            values = data.tolist()
+            vector_class = fbx.FbxVector4
+        direct_array = fbx_layer.GetDirectArray()
+        direct_array.Resize(len(values))
+        for i in range(len(values)):
+            direct_array.SetAt(i, vector_class(*values[i]))
+
+    def add_layer_indices(self, fbx_layer, indices):
+        index_array = fbx_layer.GetIndexArray()
+        index_array.Resize(len(indices))
+        for i in range(len(indices)):
+            index_array.SetAt(i, indices[i])
+
+    def build_layers_data_per_vertex(self, mesh, layers, param, fbx_le, callback):
+        for j in range(len(layers)):
+            if param in ['uv', 'binormal']:
+                param_name = layers[j]['resource_name']
+            else:
+                param_name = param + (("_" + str(j)) if (j != 0) else "")
 
-                fbx_layer = fbx_le.Create(mesh, param_name)
-                fbx_layer.SetMappingMode(fbx.FbxLayerElement.eByControlPoint)
-                fbx_layer.SetReferenceMode(fbx.FbxLayerElement.eDirect)
-                fbx_layers.append(fbx_layer)
+            fbx_layer = fbx_le.Create(mesh, param_name)
+            fbx_layer.SetMappingMode(fbx.FbxLayerElement.eByControlPoint)
+            fbx_layer.SetReferenceMode(fbx.FbxLayerElement.eDirect)
 
+            layer = mesh.GetLayer(j)
+            if (not layer):
+                mesh.CreateLayer()
                 layer = mesh.GetLayer(j)
-                if (not layer):
-                    mesh.CreateLayer()
-                    layer = mesh.GetLayer(j)
-                eval(f"layer.{callback}")(fbx_layer)
+            eval(f"layer.{callback}")(fbx_layer)
 
-            fbx_layer = fbx_layers[j]
-            if (param == 'uv'):
-                fbx_layer.GetDirectArray().Add(fbx.FbxVector2(vertex[param][j]['u'], 1.0 - vertex[param][j]['v']))
-            else:
-                fbx_layer.GetDirectArray().Add(fbx.FbxVector4(*vertex[param][j].values()))
+            self.add_layer_values(fbx_layer, layers[j]['data'], param)
 
-    def build_layers_data_per_polygon(self, mesh, vertices, layers, param, fbx_le, vertex_indices, callback):
+    def build_layers_data_per_polygon(self, mesh, layers, param, fbx_le, vertex_indices, callback):
         for j in range(len(layers)):
             if param in ['uv', 'binormal']:
                 param_name = layers[j]['resource_name']
@@ -774,22 +703,15 @@ class FBX:
                 mesh.CreateLayer()
                 layer = mesh.GetLayer(j)
 
-            for i in range(len(vertices)):
-                if (param == 'uv'):
-                    fbx_layer.GetDirectArray().Add(
-                        fbx.FbxVector2(vertices[i][param][j]['u'], 1.0 - vertices[i][param][j]['v'])
-                    )
-                else:
-                    fbx_layer.GetDirectArray().Add(fbx.FbxVector4(*vertices[i][param][j].values()))
+            self.add_layer_values(fbx_layer, layers[j]['data'], param)
 
             # Reindexing verts
-            for idx in vertex_indices:
-                fbx_layer.GetIndexArray().Add(idx)
+            self.add_layer_indices(fbx_layer, vertex_indices)
 
             eval(f"layer.{callback}")(fbx_layer)
 
     def add_mesh_node(self, manager, scene, content, mesh_parents, layered_mesh_names):
-        data = content.data.get_data()
+        buffers = content.data.get_data()
         root_node = scene.GetRootNode()
 
         name = ut.b2s_name(content.name)
@@ -798,59 +720,21 @@ class FBX:
         node.SetNodeAttribute(mesh)
 
         # ------------------------------------------------ 
-        # Merge all vertex informations to get just a list of vertex (more easy to deal with)
+        # Vertex informations are kept as one array per layer
         # ------------------------------------------------ 
-        # TODO reduce the key's names (ex "position" -> "p") for reduce memory and speed up.
 
         # Use face indices to obtain all vertices for UT
-        if (cm.selected_game in ['dbut', 'dbzb']):
-            for param, layers in data.items():
-                for layer_data in layers:
-                    if 'data' in layer_data:
-                        new_data = []
-                        for idx in content.data.face_indices:
-                            if idx < len(layer_data['data']):
-                                new_data.append(layer_data['data'][idx])
-                        layer_data['data'] = new_data
-
-        vertices = []
-        param_names = ['color', 'normal', 'binormal', 'tangent', 'uv', 'blend_indices', 'blend_weights']
-        layers = dict(zip(param_names, [[] for x in range(len(param_names))]))
-
-        for i in range(len(data['positions'][0]['data'])):
-            vertices.append({})
-            vertices[i] = dict(zip(param_names, [[] for x in range(len(param_names))]))
-            vertices[i]['position'] = dict(zip(self.others_components, data['positions'][0]['data'][i]))
-            for param, layer in data.items():
-                if param not in ['positions', 'bone_indices', 'bone_weights']:
-                    new_param = self.params_map[param]
-                    for j in range(len(layer)):
-                        components = self.components_map[new_param] \
-                            if (new_param in self.components_map) else self.others_components
-                        vertices[i][new_param].append(dict(zip(components, data[param][j]['data'][i])))
-                        if (j >= len(layers[new_param])):
-                            layers[new_param].append({k: v for k, v in data[param][j].items() if k != 'data'})
-
-            if 'bone_weights' in data:
-                for j in range(len(data['bone_weights'])):
-                    vertices[i]['blend_indices'].append(data['bone_indices'][j]['data'][i][0])
-                    if (j >= len(layers['uv'])):
-                        layers['blend_indices'].append({k: v for k, v in data['bone_indices'][j].items() if k != 'data'})
-                    vertices[i]['blend_weights'].append(data['bone_weights'][j]['data'][i][0])
-                    if (j >= len(layers['blend_weights'])):
-                        layers['blend_weights'].append({k: v for k, v in data['bone_weights'][j].items() if k != 'data'})
+        if (self.context.game in ['dbut', 'dbzb']):
+            face_indices = np.asarray(buffers.face_indices, dtype=np.int64)
+            buffers = buffers.take(face_indices[face_indices < buffers.get_vertex_count()])
 
         # Faces from Triangle Strips algorithm
-        faces_triangles = []
-        for i in range(len(vertices) - 2):
-            # Triangle strips logic
-            if (i % 2 == 0):
-                faces_triangles.append([i, i + 1, i + 2])
-            else:
-                faces_triangles.append([i, i + 2, i + 1])
+        # Triangle strips logic: [i, i + 1, i + 2] for even faces, [i, i + 2, i + 1] for odd ones
+        strip = np.arange(max(buffers.get_vertex_count() - 2, 0))
+        faces_triangles = np.column_stack((strip, strip + 1 + (strip % 2), strip + 2 - (strip % 2))).tolist()
         
-        if cm.use_debug_mode:
-            self.create_mesh_debug_xml("00_SprOriginal", mesh.GetName().replace(":", "_"), vertices, faces_triangles)
+        if self.context.use_debug_mode:
+            self.create_mesh_debug_xml("00_SprOriginal", mesh.GetName().replace(":", "_"), buffers, faces_triangles)
 
         # ------------------------------------------------ 
         # removing duplicate unnecessary vertices 
@@ -858,11 +742,11 @@ class FBX:
         # Notice: that will change nothing except having less vertices in Fbx
         # ------------------------------------------------ 
 
-        vertices, faces_triangles = self.remove_duplicate_vertices(vertices, faces_triangles)
+        buffers, faces_triangles = self.remove_duplicate_vertices(buffers, faces_triangles)
 
         # So now the triangle strip is only on face index, we got the same, but we reduce vertex number
-        if cm.use_debug_mode:
-            self.create_mesh_debug_xml("01_VertexReduced", mesh.GetName().replace(":", "_"), vertices, faces_triangles)
+        if self.context.use_debug_mode:
+            self.create_mesh_debug_xml("01_VertexReduced", mesh.GetName().replace(":", "_"), buffers, faces_triangles)
 
         # ------------------------------------------------
         # Remove Triangle degenerate strip 
@@ -872,18 +756,14 @@ class FBX:
         #    so this step is not really necessary, just to have the debug on it
 
         if self.remove_triangle_strip:
-            new_faces_triangles = []
-            for i in range(len(faces_triangles)):
-                triangle = faces_triangles[i][0:3]
-
-                # In triangle strip algo, a degenerative strip (for cut the list) is done with 2 same vertex index in triangle.
-                if ((triangle[0] != triangle[1]) and (triangle[0] != triangle[2]) and (triangle[1] != triangle[2])):
-                    # So keep only triangles with 3 differents index.
-                    new_faces_triangles.append(triangle)
+            triangles = np.asarray(faces_triangles, dtype=np.int64).reshape(-1, 3)
 
-            faces_triangles = new_faces_triangles
-            if cm.use_debug_mode:
-                self.create_mesh_debug_xml("02_RemoveStripDegen", mesh.GetName().replace(":", "_"), vertices, faces_triangles)
+            # In triangle strip algo, a degenerative strip (for cut the list) is done with 2 same vertex index in triangle.
+            # So keep only triangles with 3 differents index.
+            faces_triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & \
+                (triangles[:, 0] != triangles[:, 2]) & (triangles[:, 1] != triangles[:, 2])].tolist()
+            if self.context.use_debug_mode:
+                self.create_mesh_debug_xml("02_RemoveStripDegen", mesh.GetName().replace(":", "_"), buffers, faces_triangles)
 
         # ------------------------------------------------
         # Fbx Construction
@@ -892,70 +772,62 @@ class FBX:
 
         if (self.use_per_vertex):
             scene = mesh.GetScene()
+            vertex_count = buffers.get_vertex_count()
 
             # Vertices
-            mesh.InitControlPoints(len(vertices))
-
-            # Fbx layers data
-            fbx_normals = []
-            fbx_binormals = []
-            fbx_uvs = []
+            mesh.InitControlPoints(vertex_count)
 
             # One cluster per bone used
             skin = None
-            fbx_bone_cluster = []
             nb_bones = 0
             if hasattr(self, 'bone_nodes'):
                 nb_bones = len(self.bone_nodes)
-                for i in range(nb_bones):
-                    fbx_bone_cluster.append(None)
-
-            for i in range(len(vertices)):
-                vertex = vertices[i]
-
-                # Position
-                v = fbx.FbxVector4(*vertex['position'].values())
-                mesh.SetControlPointAt(v, i)
-
-                # TODO vertexColor
-                # TODO Tangent
-
-                # Normals, Binormals, UVs
-                self.build_layers_data_per_vertex(mesh, vertex, layers, "normal", 
-                                                  fbx.FbxLayerElementNormal, fbx_normals, "SetNormals")
-                self.build_layers_data_per_vertex(mesh, vertex, layers, "binormal", 
-                                                  fbx.FbxLayerElementBinormal, fbx_binormals, "SetBinormals")
-                self.build_layers_data_per_vertex(mesh, vertex, layers, "uv", 
-                                                  fbx.FbxLayerElementUV, fbx_uvs, "SetUVs")
-
-                # Bone Blend
-                if (nb_bones):
-                    for j in range(len(vertex["blend_indices"])):
-                        index_bone = vertex["blend_indices"][j]
-                        weight = vertex["blend_weights"][j]
-
-                        # TODO Warning
-
-                        if (index_bone >= nb_bones):
-                            index_bone = 0
-
-                        if (fbx_bone_cluster[index_bone] == None):
-                            cluster = fbx.FbxCluster.Create(scene, "bone_" + str(index_bone) + "_cluster")
-                            cluster.SetLinkMode(fbx.FbxCluster.eTotalOne)
-                            bone_node = self.bone_nodes[index_bone]
-                            cluster.SetLink(bone_node)
-                            # Node support the mesh
-                            cluster.SetTransformMatrix(node.EvaluateGlobalTransform())
-                            cluster.SetTransformLinkMatrix(bone_node.EvaluateGlobalTransform())
-
-                            if (skin == None):
-                                skin = fbx.FbxSkin.Create(scene, "skin_"+ name)
-                                mesh.AddDeformer(skin)
-                            skin.AddCluster(cluster)
-                            fbx_bone_cluster[index_bone] = cluster
-
-                        cluster = fbx_bone_cluster[index_bone]
-                        cluster.AddControlPointIndex(i, weight)
+
+            # Position
+            positions = buffers['positions'][0]['data'].tolist()
+            for i in range(vertex_count):
+                mesh.SetControlPointAt(fbx.FbxVector4(*positions[i]), i)
+
+            # TODO vertexColor
+            # TODO Tangent
+
+            # Normals, Binormals, UVs
+            self.build_layers_data_per_vertex(mesh, buffers.get_layers('normals'), "normal",
+                                              fbx.FbxLayerElementNormal, "SetNormals")
+            self.build_layers_data_per_vertex(mesh, buffers.get_layers('binormals'), "binormal",
+                                              fbx.FbxLayerElementBinormal, "SetBinormals")
+            self.build_layers_data_per_vertex(mesh, buffers.get_layers('uvs'), "uv",
+                                              fbx.FbxLayerElementUV, "SetUVs")
+
+            # Bone Blend
+            if (nb_bones):
+                blend_indices = buffers.stack('bone_indices').astype(np.int64)
+                blend_weights = buffers.stack('bone_weights')
+
+                # TODO Warning
+                blend_indices[blend_indices >= nb_bones] = 0
+
+                # Clusters are created in the order bones are first used, then get all their vertices at once
+                bone_list, first_use = np.unique(blend_indices.ravel(), return_index=True)
+                for index_bone in bone_list[np.argsort(first_use)].tolist():
+                    cluster = fbx.FbxCluster.Create(scene, "bone_" + str(index_bone) + "_cluster")
+                    cluster.SetLinkMode(fbx.FbxCluster.eTotalOne)
+                    bone_node = self.bone_nodes[index_bone]
+                    cluster.SetLink(bone_node)
+                    # Node support the mesh
+                    cluster.SetTransformMatrix(node.EvaluateGlobalTransform())
+                    cluster.SetTransformLinkMatrix(bone_node.EvaluateGlobalTransform())
+
+                    if (skin == None):
+                        skin = fbx.FbxSkin.Create(scene, "skin_"+ name)
+                        mesh.AddDeformer(skin)
+                    skin.AddCluster(cluster)
+
+                    vertex_ids, layer_ids = np.nonzero(blend_indices == index_bone)
+                    weights = blend_weights[vertex_ids, layer_ids].tolist()
+                    vertex_ids = vertex_ids.tolist()
+                    for i in range(len(vertex_ids)):
+                        cluster.AddControlPointIndex(vertex_ids[i], weights[i])
 
             # Faces
             for i in range(len(faces_triangles)):
@@ -968,8 +840,9 @@ class FBX:
             # Vertices
             vertex_indices = []
             try:
-                for i in range(len(vertices)):
-                    v = fbx.FbxVector4(*vertices[i]['position'].values())
+                positions = buffers['positions'][0]['data'].tolist()
+                for i in range(len(positions)):
+                    v = fbx.FbxVector4(*positions[i])
                     mesh.SetControlPointAt(v, i)
 
                 # Faces
@@ -978,7 +851,7 @@ class FBX:
                     for j in range(3):
                         mesh.AddPolygon(faces_triangles[i][j])
                     mesh.EndPolygon()
-                vertex_indices = sum(faces_triangles, [])
+                vertex_indices = [idx for triangle in faces_triangles for idx in triangle]
             except Exception as e:
                 print(e)
 
@@ -995,10 +868,12 @@ class FBX:
                     for bone in self.bone_nodes:
                         bone_mats.append(bone.EvaluateGlobalTransform())
 
+                    blend_indices = buffers.stack('bone_indices').tolist()
+                    blend_weights = buffers.stack('bone_weights').tolist()
                     cluster_dict = {}
-                    for i in range(len(vertices)):
-                        for j in range(len(vertices[i]['blend_indices'])):
-                            bone_idx = vertices[i]['blend_indices'][j]
+                    for i in range(len(blend_indices)):
+                        for j in range(len(blend_indices[i])):
+                            bone_idx = blend_indices[i][j]
                             if bone_idx not in cluster_dict:
                                 cluster_dict[bone_idx] = fbx.FbxCluster.Create(scene, "")
                                 cluster_dict[bone_idx].SetLinkMode(fbx.FbxCluster.eTotalOne)
@@ -1008,7 +883,7 @@ class FBX:
                                 cluster_dict[bone_idx].SetTransformLinkMatrix(bone_mats[bone_idx])
                                 skin.AddCluster(cluster_dict[bone_idx])
                             # Reindexing weights
-                            cluster_dict[bone_idx].AddControlPointIndex(i, vertices[i]['blend_weights'][j])
+                            cluster_dict[bone_idx].AddControlPointIndex(i, blend_weights[i][j])
 
                 mesh.AddDeformer(skin)
                 self.bind_pose.Add(node, fbx.FbxMatrix(node.EvaluateGlobalTransform()))
@@ -1017,12 +892,12 @@ class FBX:
 
             # Normals, Binormals, UVs
             try:
-                self.build_layers_data_per_polygon(mesh, vertices, data['normals'], 'normal', 
+                self.build_layers_data_per_polygon(mesh, buffers['normals'], 'normal', 
                                                    fbx.FbxLayerElementNormal, vertex_indices, "SetNormals")
-                if 'binormals' in data:
-                    self.build_layers_data_per_polygon(mesh, vertices, data['binormals'], 'binormal', 
+                if 'binormals' in buffers:
+                    self.build_layers_data_per_polygon(mesh, buffers['binormals'], 'binormal', 
                                                        fbx.FbxLayerElementBinormal, vertex_indices, "SetBinormals")
-                self.build_layers_data_per_polygon(mesh, vertices, data['uvs'], 'uv', 
+                self.build_layers_data_per_polygon(mesh, buffers['uvs'], 'uv', 
                                                    fbx.FbxLayerElementUV, vertex_indices, "SetUVs")
             except Exception as e:
                 print(e)
@@ -1044,9 +919,9 @@ class FBX:
         for material in self.data['material']:
             if material.name not in self.materials:
                 self.materials[material.name] = []
-            material.data.sort(cm.use_blender)
+            material.data.sort(self.context.use_blender)
 
-            if cm.use_blender:
+            if self.context.use_blender:
                 for i in range(0, len(material.data.layers)):
                     layer = material.data.layers[i]
 
@@ -1087,7 +962,13 @@ class FBX:
     
     def add_texture(self, scene, textureName, textureFileName):
         texture = fbx.FbxFileTexture.Create(scene, textureFileName)
-        texture.SetFileName(textureFileName)
+        # Textures are next to the fbx file, names are kept relative so that
+        # the exported folder can be moved (or copied from the export cache)
+        file_name = textureFileName
+        if file_name.__class__.__name__ == 'bytes':
+            file_name = ut.b2s_name(file_name)
+        texture.SetFileName(file_name)
+        texture.SetRelativeFileName(file_name)
         texture.SetName(textureName)
         
         texture.SetTextureUse( fbx.FbxTexture.eStandard )
@@ -1161,19 +1042,21 @@ class FBX:
             return name.replace(f"[{layer_name}]", '')
         return name
 
-    def create_mesh_debug_xml(self, folder_name = "debug_mesh", name = "", vertices = [], faces_triangles = []):
+    def create_mesh_debug_xml(self, folder_name = "debug_mesh", name = "", buffers = None, faces_triangles = []):
         # Hyp : all vertices have the same nb_layers for each normals, uv, etc .. (bone blend indices and weight are fill by 0, 0.0 to complete)
+        vertex_count = buffers.get_vertex_count()
 
-        count_dict = {
-            'color': len(vertices[0]['color']) if (len(vertices) and vertices[0]['color']) else 0,
-            'normal': len(vertices[0]['normal']) if (len(vertices) and vertices[0]['normal']) else 0,
-            'binormal': len(vertices[0]['binormal']) if (len(vertices) and vertices[0]['binormal']) else 0,
-            'tangent': len(vertices[0]['tangent']) if (len(vertices) and vertices[0]['tangent']) else 0,
-            'uv': len(vertices[0]['uv']) if (len(vertices) and vertices[0]['uv']) else 0,
-            'blend_indices': len(vertices[0]['blend_indices']) if (len(vertices) and vertices[0]['blend_indices']) else 0
-        }
+        layers_dict = {}
+        for param in ['color', 'normal', 'binormal', 'tangent', 'uv']:
+            key = ut.search_index_dict(self.params_map, param)
+            layers_dict[param] = [layer['data'].tolist() for layer in buffers.get_layers(key)]
+        blend_indices = buffers.stack('bone_indices').tolist()
+        blend_weights = buffers.stack('bone_weights').tolist()
+
+        count_dict = {param: len(layers) for param, layers in layers_dict.items()}
+        count_dict['blend_indices'] = len(buffers.get_layers('bone_indices'))
 
-        root_node = {'Mesh': {'attr': {'name': name, 'nbVertex': len(vertices)},'children': []}}
+        root_node = {'Mesh': {'attr': {'name': name, 'nbVertex': vertex_count},'children': []}}
         root_node['Mesh']['attr'].update(
             dict(zip(['nbColorLy', 'nbNormalLy', 'nbBinormalLy', 'nbTangentLy', 'nbUvLy', 'nbBoneLayer'], count_dict.values()))
         )
@@ -1181,26 +1064,23 @@ class FBX:
         vertices_node = {'Vertices': {'children': []}}
         root_node['Mesh']['children'].append(vertices_node)
 
-        for i in range(len(vertices)):
-            vertex = vertices[i]
-
+        positions = buffers['positions'][0]['data'].tolist() if (vertex_count) else []
+        for i in range(vertex_count):
             vertex_node = {'Vertex': {'attr': {'index': i}, 'children': []}}
             vertices_node['Vertices']['children'].append(vertex_node)
 
-            position_node = {'Position': {'attr': dict(zip(self.others_components, vertex['position'].values()))}}
+            position_node = {'Position': {'attr': dict(zip(self.others_components, positions[i]))}}
             vertex_node['Vertex']['children'].append(position_node)
 
-            for param, size in count_dict.items():
-                for j in range(size):
+            for param, layers in layers_dict.items():
+                components = self.components_map[param] if (param in self.components_map) else self.others_components
+                for j in range(len(layers)):
                     param_name = param + (("_" + str(j)) if (j != 0) else "")
-                    components = self.components_map[param] if (param in self.components_map) else self.others_components
-                    if param != 'blend_indices':
-                        vertex_node['Vertex']['children'].append(
-                            {param_name: {'attr': dict(zip(components, vertex[param][j].values()))}}
-                        )
-                if param == 'blend_indices':
-                    blend_node = {'Blend': {'attr': {'indices': vertex[param], 'weights': vertex['blend_weights']}}}
-                    vertex_node['Vertex']['children'].append(blend_node)
+                    vertex_node['Vertex']['children'].append(
+                        {param_name: {'attr': dict(zip(components, layers[j][i]))}}
+                    )
+            blend_node = {'Blend': {'attr': {'indices': blend_indices[i], 'weights': blend_weights[i]}}}
+            vertex_node['Vertex']['children'].append(blend_node)
 
         # Faces
         faces_node = {'Faces': {'attr': {'nbFaces': len(faces_triangles)}, 'children': []}}
@@ -1209,13 +1089,10 @@ class FBX:
             faces_node['Faces']['children'].append({'Triangle': {'attr': dict(zip(['a','b','c'], triangle))}})
         root_node['Mesh']['children'].append(faces_node)
 
-        last_working_dir = os.getcwd()
-        if not os.path.exists(folder_name):
-            os.mkdir(folder_name)
-        os.chdir(folder_name)
+        folder_path = os.path.join(self.path, folder_name)
+        if not os.path.exists(folder_path):
+            os.mkdir(folder_path)
 
         xml_obj = XML()
-        stream = open(name + ".xml", "w")
-        xml_obj.write(stream, root_node)
-
-        os.chdir(last_working_dir)
\ No newline at end of file
+        stream = open(os.path.join(folder_path, name + ".xml"), "w")
+        xml_obj.write(stream, root_node)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import core.utils as ut
+import core.constants as ct
+from .STPZ import *
+from .STPK import *
+from .SPRP.SPRP import *
+
+class Importer:
+    """
+    Imports extracted folders (all the ones of input_path by default) back into
+    game files, written in output_path
+    """
+    def __init__(self, context):
+        self.context = context
+
+    def run(self, paths = None):
+        self.context.data = dict(zip(['spr', 'ioram', 'vram'], [{} for i in range(3)]))
+
+        if paths == None:
+            paths = [os.path.join(self.context.input_path, filename) \
+                for filename in os.listdir(self.context.input_path)]
+
+        for i in range(len(paths)):
+            file_path = paths[i]
+            input_name = os.path.basename(file_path)
+            base_input_name, input_ext = os.path.splitext(input_name)
+
+            if (os.path.isdir(file_path)):
+                entry_class = ut.search_index_dict_list(ct.ext_map, input_ext)
+                entry_obj = eval(entry_class)(input_name, context=self.context)
+                with self.context.stage(100 * i / len(paths), 100 * (i + 1) / len(paths)):
+                    entry_obj.load(file_path)
+                output = os.path.join(self.context.output_path, input_name)
+                self.write(output, entry_obj)
+
+            # If multiple SPR files are imported back, add all ioram and vram files in output folder
+            self.write_data('ioram', input_ext)
+            self.write_data('vram', input_ext)
+
+    def write_data(self, ext, file_ext, add_padding = True):
+        for key, data in self.context.data[ext].items():
+            full_name = f"{key}.{ext}"
+
+            if ('pak' in file_ext):
+                stpk_obj = STPK(b'', 0, add_padding, context=self.context)
+                stpk_obj.add_entry(full_name, data)
+                name = f"{key}_{ext[0]}"
+
+                if self.context.game == 'dbrb':
+                    op_stpk_obj = STPK(b'', 0, add_padding, context=self.context)
+                    op_stpk_obj.add_entry(name + ".pak", stpk_obj)
+                    stpk_obj = op_stpk_obj
+
+                if ('zpak' in file_ext):
+                    stpz_obj = STPZ(name + ".zpak", context=self.context)
+                    stpz_obj.read_stpk_data(stpk_obj)
+                    path = os.path.join(self.context.output_path, name + ".zpak")
+                    self.write(path, stpz_obj)
+                else:
+                    path = os.path.join(self.context.output_path, name + ".pak")
+                    self.write(path, stpk_obj)
+            else:
+                path = os.path.join(self.context.output_path, full_name)
+                self.write(path, data)
+
+    def write(self, path, data = None):
+        stream = open(path, 'wb')
+        if (data.__class__.__name__ in ['bytes', 'bytearray', 'memoryview']):
+            stream.write(data)
+        else:
+            data.write(stream)
+        stream.close()
\ No newline at end of file
@@ -42,7 +42,7 @@ class MTRL:
     
     def write(self, stream, write_data = True):
         self.offset = abs(stream.tell() - self.data_offset)
-        self.name_offset = ut.search_index_dict(self.string_table.content, self.name)
+        self.name_offset = self.string_table.offset_of(self.name)
         return self.write_data(stream)
     
     def write_data(self, stream):
@@ -51,9 +51,9 @@ class MTRL:
         for i in range(10):
             try:
                 layer = self.layers[i]
-                layer_name_offset = ut.search_index_dict(self.string_table.content, layer[0])
+                layer_name_offset = self.string_table.offset_of(layer[0])
                 stream.write(ut.i2b(layer_name_offset))
-                source_name_offset = ut.search_index_dict(self.string_table.content, layer[1])
+                source_name_offset = self.string_table.offset_of(layer[1])
                 stream.write(ut.i2b(source_name_offset))
             except:
                 stream.write(bytes(8))
@@ -169,7 +169,7 @@ class MTRL_PROP:
 
     def write(self, stream, write_data = True):
         self.offset = abs(stream.tell() - self.data_offset)
-        self.name_offset = ut.search_index_dict(self.string_table.content, self.name)
+        self.name_offset = self.string_table.offset_of(self.name)
         stream.seek(self.data_offset + self.offset)
 
         stream.write(struct.pack('>f', self.illumination_shadow_orientation))
@@ -0,0 +1,112 @@
+import json
+import hashlib
+import numpy as np
+import core.utils as ut
+
+class Manifest:
+    """
+    Encoded vram (textures) and ioram (meshes) blocks of converted files, keyed by the
+    content of the files and the selected game and platform.
+    Blocks of unchanged files are reused on import instead of being encoded again.
+    They are kept in the blocks cache of the app, nothing is stored unless use_block_cache is set
+    """
+    # Changed when encoded blocks change, invalidating older blocks
+    version = 2
+    mesh_fields = ['vertex_count', 'index_count', 'vertex_decl_count', 'vertex_decl_count_2',
+        'ioram_index_offset']
+
+    def __init__(self, context):
+        self.context = context
+        self.blocks = context.get_cache('blocks', context.use_block_cache, context.block_cache_size)
+
+    def get_block_key(self, key):
+        block_key = hashlib.sha256(key.encode())
+        block_key.update(f"|{self.version}|{self.context.game}|{self.context.platform}".encode())
+        return block_key.hexdigest()
+
+    def get_file_hash(self, file_path):
+        file_hash = hashlib.sha256()
+        stream = open(file_path, 'rb')
+        chunk = stream.read(1 << 20)
+        while chunk:
+            file_hash.update(chunk)
+            chunk = stream.read(1 << 20)
+        stream.close()
+        return file_hash.hexdigest()
+
+    def get_texture(self, texture_path, tx2d_object):
+        """
+        Sets the vram data stored for the texture file, returns False when there is none
+        """
+        if self.blocks == None:
+            return False
+        data = self.blocks.get_bytes(self.get_block_key(self.get_file_hash(texture_path)))
+        if data == None:
+            return False
+        tx2d_object.mipmap_count = ut.b2i(data[:4])
+        tx2d_object.vram_data = data[4:]
+        return True
+
+    def add_texture(self, texture_path, vram_data, mipmap_count):
+        """
+        Stores the vram data (swizzled) of the texture file
+        """
+        if self.blocks == None:
+            return
+        key = self.get_block_key(self.get_file_hash(texture_path))
+        self.blocks.put_bytes(key, ut.i2b(mipmap_count) + bytes(vram_data))
+
+    def get_mesh_key(self, name, vbuf_object):
+        """
+        Returns the hash of the mesh buffers, before they are encoded (None when disabled)
+        """
+        if self.blocks == None:
+            return None
+        key = hashlib.sha256()
+        key.update(name)
+        for usage, layers in vbuf_object.data.items():
+            for layer in layers:
+                info = sorted([(k, v) for k, v in layer.items() if k != 'data'])
+                key.update(repr((usage, info, layer['data'].dtype.str, layer['data'].shape)).encode())
+                key.update(layer['data'].tobytes())
+        face_indices = getattr(vbuf_object, 'face_indices', None)
+        if face_indices is not None:
+            key.update(np.ascontiguousarray(face_indices).tobytes())
+        return self.get_block_key(key.hexdigest())
+
+    def get_mesh(self, key, vbuf_object):
+        """
+        Sets the encoded data stored for the mesh key, returns False when there is none
+        """
+        if (self.blocks == None) or (key == None):
+            return False
+        data = self.blocks.get_bytes(key)
+        if data == None:
+            return False
+        info_size = ut.b2i(data[:4])
+        mesh = json.loads(data[4:4 + info_size].decode())
+        for field in self.mesh_fields:
+            if field in mesh:
+                setattr(vbuf_object, field, mesh[field])
+        vbuf_object.vertex_decl = [(decl[0], '' if (decl[1] == None) else ut.s2b_name(decl[1]), \
+            *decl[2:]) for decl in mesh['vertex_decl']]
+        vbuf_object.ioram_data = data[4 + info_size:]
+        vbuf_object.ioram_data_size = len(vbuf_object.ioram_data)
+        return True
+
+    def add_mesh(self, key, vbuf_object, ioram_data):
+        """
+        Stores the vertex declarations of the mesh key along with its encoded data,
+        as written in the ioram
+        """
+        if (self.blocks == None) or (key == None):
+            return
+        mesh = {}
+        for field in self.mesh_fields:
+            if hasattr(vbuf_object, field):
+                mesh[field] = int(getattr(vbuf_object, field))
+        # Missing resource names are kept as None
+        mesh['vertex_decl'] = [(int(decl[0]), ut.b2s_name(decl[1]) if isinstance(decl[1], bytes) \
+            else None, *[int(x) for x in decl[2:]]) for decl in vbuf_object.vertex_decl]
+        info = json.dumps(mesh).encode()
+        self.blocks.put_bytes(key, ut.i2b(len(info)) + info + bytes(ioram_data))
@@ -0,0 +1,110 @@
+import numpy as np
+
+class MeshBuffers:
+    """
+    Columnar vertex data: every attribute (positions, normals, uvs...) holds a list
+    of layers, each layer being its declaration info plus one contiguous array
+    with a row per vertex
+    """
+    def __init__(self):
+        self.attributes = {}
+        self.face_indices = None
+
+    def add_layer(self, key, data, dtype = None, **info):
+        data = np.ascontiguousarray(data, dtype=dtype)
+        if data.ndim == 1:
+            data = data.reshape(-1, 1)
+        layer = dict(info)
+        layer['data'] = data
+        if key not in self.attributes:
+            self.attributes[key] = []
+        self.attributes[key].append(layer)
+        return layer
+
+    def get_layers(self, key):
+        return self.attributes.get(key, [])
+
+    def get_vertex_count(self):
+        if 'positions' in self.attributes:
+            return len(self.attributes['positions'][0]['data'])
+        return 0
+
+    def get_info(self, key):
+        """
+        Returns layers declaration info without data
+        """
+        return [{k: v for k, v in layer.items() if k != 'data'} for layer in self.get_layers(key)]
+
+    def stack(self, key):
+        """
+        Returns the layers of an attribute side by side, one row per vertex
+        """
+        layers = [layer['data'] for layer in self.get_layers(key)]
+        if len(layers) == 0:
+            return np.zeros((self.get_vertex_count(), 0))
+        return np.concatenate(layers, axis=1)
+
+    def select(self, keys):
+        """
+        Returns buffers sharing the given attributes only, in the given order
+        """
+        buffers = MeshBuffers()
+        for key in keys:
+            if key in self.attributes:
+                buffers.attributes[key] = list(self.attributes[key])
+        buffers.face_indices = self.face_indices
+        return buffers
+
+    def take(self, indices):
+        """
+        Returns new buffers holding the given vertices
+        """
+        buffers = MeshBuffers()
+        for key, layers in self.attributes.items():
+            for layer in layers:
+                info = {k: v for k, v in layer.items() if k != 'data'}
+                buffers.add_layer(key, layer['data'][indices], **info)
+        return buffers
+
+    def unique(self):
+        """
+        Merges identical vertices, keeping their first appearance order.
+        Returns new buffers and the new index of every vertex
+        """
+        vertex_count = self.get_vertex_count()
+        if vertex_count == 0:
+            return self.take(np.arange(0)), np.arange(0)
+
+        rows = np.concatenate([layer['data'].astype(np.float64).reshape(vertex_count, -1) \
+            for layers in self.attributes.values() for layer in layers], axis=1)
+        unique_rows, first_index, inverse = \
+            np.unique(rows, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first_index)
+        redirection = np.empty(len(order), dtype=np.int64)
+        redirection[order] = np.arange(len(order))
+
+        return self.take(first_index[order]), redirection[inverse.ravel()]
+
+    def keys(self):
+        return self.attributes.keys()
+
+    def values(self):
+        return self.attributes.values()
+
+    def items(self):
+        return self.attributes.items()
+
+    def __contains__(self, key):
+        return key in self.attributes
+
+    def __getitem__(self, key):
+        return self.attributes[key]
+
+    def __repr__(self):
+        string = (
+            f'\nclass: {self.__class__.__name__}\n'
+            f'vertex_count: {self.get_vertex_count()}\n'
+        )
+        for key, layers in self.attributes.items():
+            string += f'{key} : {[layer["data"].shape for layer in layers]}\n'
+        return string
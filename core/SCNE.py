@@ -40,21 +40,21 @@ class SCNE:
     def write(self, stream, write_data = True):
         stream.seek(self.data_offset + self.offset)
         stream.write(ut.i2b(self.unknown0x00)) # Write unknown offset
-        data_type_offset = ut.search_index_dict(self.string_table.content, self.data_type)
+        data_type_offset = self.string_table.offset_of(self.data_type)
         stream.write(ut.i2b(data_type_offset))
         if self.name != b'':
-            name_offset = ut.search_index_dict(self.string_table.content, self.name)
+            name_offset = self.string_table.offset_of(self.name)
             stream.write(ut.i2b(name_offset))
         else:
             stream.write(bytes(4))
         if self.layer_name != b'':
             layer_name_offset = \
-                ut.search_index_dict(self.string_table.content, self.layer_name)
+                self.string_table.offset_of(self.layer_name)
             stream.write(ut.i2b(layer_name_offset))
         else:
             stream.write(bytes(4))
         if self.parent_name != b'':
-            parent_name_offset = ut.search_index_dict(self.string_table.content, self.parent_name)
+            parent_name_offset = self.string_table.offset_of(self.parent_name)
             stream.write(ut.i2b(parent_name_offset))
         else:
             stream.write(bytes(4))
@@ -122,15 +122,15 @@ class SCNE_MATERIAL:
     def write(self, stream, write_data = True):
         stream.seek(self.data_offset + self.offset)
 
-        name_offset = ut.search_index_dict(self.string_table.content, self.name)
+        name_offset = self.string_table.offset_of(self.name)
         stream.write(ut.i2b(name_offset))
         stream.write(ut.i2b(self.unknown0x04))
         self.material_infos_count = len(self.infos)
         stream.write(ut.i2b(self.material_infos_count))
 
         for info in self.infos:
-            info_name_offset = ut.search_index_dict(self.string_table.content, info[0])
-            info_type_offset = ut.search_index_dict(self.string_table.content, info[1])
+            info_name_offset = self.string_table.offset_of(info[0])
+            info_type_offset = self.string_table.offset_of(info[1])
             stream.write(struct.pack('>iii', info_name_offset, info_type_offset, info[2]))
 
         return stream.tell()
@@ -224,7 +224,7 @@ class SCNE_EYE_DATA:
     
     def write(self, stream):
         if self.name != b'':
-            name_offset = ut.search_index_dict(self.string_table.content, self.name)
+            name_offset = self.string_table.offset_of(self.name)
         else:
             name_offset = 0
         stream.write(ut.i2b(name_offset))
@@ -61,12 +61,12 @@ class SHAP:
 
         if self.name == b'DbzEdgeInfo':
             if self.source_name != b'':
-                source_name_offset = ut.search_index_dict(self.string_table.content, self.source_name)
+                source_name_offset = self.string_table.offset_of(self.source_name)
             else:
                 source_name_offset = 0
             stream.write(ut.i2b(source_name_offset))
             if self.source_type != b'':
-                source_type_offset = ut.search_index_dict(self.string_table.content, self.source_type)
+                source_type_offset = self.string_table.offset_of(self.source_type)
             else:
                 source_type_offset = 0
             stream.write(ut.i2b(source_type_offset))
@@ -21,16 +21,18 @@ class SPRP:
         'DRVN', 'TXAN'
     ]
 
-    def __init__(self, name, size = 0):
+    def __init__(self, name, size = 0, *, context):
         if (name.__class__.__name__ == 'str'):
             name = ut.s2b_name(name)
         self.name = name
         self.size = size
+        self.context = context
         self.string_table = StringTable()
         self.entries = []
         self.start_offset = 0
         self.ioram_data_size = 0
         self.vram_data_size = 0
+        self.index = None
 
     def get_size(self):
         return self.size
@@ -77,10 +79,11 @@ class SPRP:
         entry_offset = 0
 
         for i in range(entry_count):
-            entry_object = SPRPEntry(self.string_table)
+            entry_object = SPRPEntry(self.string_table, context=self.context)
             entry_offset += entry_object.read(stream, 
                 self.info_offset + entry_offset, data_offset)
             self.entries.append(entry_object)
+        self.build_index()
     
     def write(self, stream):
         self.start_offset = stream.tell()
@@ -92,15 +95,15 @@ class SPRP:
         stream.write(bytes(4))
 
         try:
-            header_name_offset = ut.search_index_dict(self.string_table.content, self.header_name)
+            header_name_offset = self.string_table.offset_of(self.header_name)
         except:
             header_name_offset = 0
         try:
-            ioram_name_offset = ut.search_index_dict(self.string_table.content, self.ioram_name)
+            ioram_name_offset = self.string_table.offset_of(self.ioram_name)
         except:
             ioram_name_offset = 0
         try:
-            vram_name_offset = ut.search_index_dict(self.string_table.content, self.vram_name)
+            vram_name_offset = self.string_table.offset_of(self.vram_name)
         except:
             vram_name_offset = 0
 
@@ -147,19 +150,47 @@ class SPRP:
         stream.seek(0, os.SEEK_END)
         self.size = stream.tell() - self.start_offset
 
+    def build_index(self):
+        """
+        Indexes the entries of every group by the criteria search_entries can match
+        """
+        self.index = {
+            'groups': [entry.build_index() for entry in self.entries],
+            'results': {}
+        }
+
+    def invalidate_index(self):
+        """
+        Has to be called when entries are added, renamed or reordered after reading
+        """
+        self.index = None
+
     def search_entries(self, entry_list, entry_class, get_group = False):
-        for entry in self.entries:
-            if get_group and entry.data_type == ut.s2b_name(entry_class):
-                return entry
-            if entry.__class__.__name__ == entry_class:
-                entry_list.append(entry)
-            else:
-                entry_list = entry.search_entries(entry_list, entry_class)
+        if (self.index == None) or (len(self.index['groups']) != len(self.entries)):
+            self.build_index()
+
+        key = (entry_class, get_group)
+        if key not in self.index['results']:
+            result = []
+            for entry, group_index in zip(self.entries, self.index['groups']):
+                if get_group and entry.data_type == ut.s2b_name(entry_class):
+                    result = entry
+                    break
+                if entry.__class__.__name__ == entry_class:
+                    result.append(entry)
+                else:
+                    result.extend(entry.search_index(group_index, entry_class))
+            self.index['results'][key] = result
+
+        result = self.index['results'][key]
+        if result.__class__.__name__ != 'list':
+            return result
+        entry_list.extend(result)
         return entry_list
 
     def get_data(self):
-        data = copy.deepcopy(vars(self))
-        to_remove = ['name', 'entries', 'string_table']
+        data = copy.deepcopy({k: v for k, v in vars(self).items() if k != 'index'})
+        to_remove = ['name', 'entries', 'string_table', 'context']
         for key in to_remove:
             del data[key]
         for entry in self.entries:
@@ -188,9 +219,10 @@ class SPRP:
 class SPRPEntry:
     data_entry_size = 32
 
-    def __init__(self, string_table, data_type = b''):
+    def __init__(self, string_table, data_type = b'', *, context):
         self.string_table = string_table
         self.data_type = data_type
+        self.context = context
         self.entries = []
         self.size = 0
 
@@ -223,7 +255,7 @@ class SPRPEntry:
             name_offset = ut.b2i(stream.read(4))
             name = self.string_table.content[name_offset]
             data_object = SPRPDataEntry(self.data_type, name, 
-                self.string_table, True)
+                self.string_table, True, context=self.context)
             data_object.read(stream, self.data_offset)
             self.entries.append(data_object)
     
@@ -239,8 +271,7 @@ class SPRPEntry:
         for i in range(len(self.entries)):
             stream.write(self.data_type)
             stream.write(ut.i2b(i))
-            name_offset = ut.search_index_dict(self.string_table.content, 
-                self.entries[i].name)
+            name_offset = self.string_table.offset_of(self.entries[i].name)
             stream.write(ut.i2b(name_offset))
             last_data_pos = self.entries[i].write(stream, True, data_offset, offset)
             offset += ut.add_padding(self.entries[i].get_size(True))
@@ -256,10 +287,46 @@ class SPRPEntry:
                 entry.search_entries(entry_list, criteria)
         return entry_list
 
+    def build_index(self):
+        """
+        Maps criteria to the (entry position, matching entry) found below each entry
+        """
+        index = {}
+        for i in range(len(self.entries)):
+            self.entries[i].index_entries(index, i, set())
+        return {
+            'index': index,
+            'names': '\x00'.join([ut.b2s_name(entry.name) for entry in self.entries]),
+            'classes': set([entry.__class__.__name__ for entry in self.entries])
+        }
+
+    def search_index(self, group_index, criteria):
+        """
+        Same result as search_entries, using an index built by build_index
+        """
+        matches = group_index['index'].get(criteria, [])
+        if (criteria not in group_index['names']) and (criteria not in group_index['classes']):
+            return [entry for position, entry in matches]
+
+        # Entries matching by name or class hide what is below them
+        entry_list = []
+        j = 0
+        for i in range(len(self.entries)):
+            entry = self.entries[i]
+            found = (entry.__class__.__name__ == criteria) or \
+                (criteria in ut.b2s_name(entry.name))
+            if found:
+                entry_list.append(entry)
+            while (j < len(matches)) and (matches[j][0] == i):
+                if not found:
+                    entry_list.append(matches[j][1])
+                j += 1
+        return entry_list
+
     def get_data(self):
         data = copy.deepcopy(vars(self))
         to_remove = ['data_type', 'entries', 'string_table', 'size', 
-                     'data_offset', 'info_offset', 'data_count']
+                     'data_offset', 'info_offset', 'data_count', 'context']
         for key in to_remove:
             del data[key]
         
@@ -314,10 +381,11 @@ class SPRPEntry:
 class SPRPDataEntry:
     info_entry_size = 20
 
-    def __init__(self, data_type, name, string_table, is_main_type = False):
+    def __init__(self, data_type, name, string_table, is_main_type = False, *, context):
         self.type = data_type
         self.name = name
         self.string_table = string_table
+        self.context = context
         self.is_main_type = is_main_type
         self.children = []
         self.size = 0
@@ -366,7 +434,7 @@ class SPRPDataEntry:
                     data_object = SCNE_EYE_INFO('', b'', self.string_table, self.size)
             elif self.type == b'TX2D':
                 self.name = ut.format_jap_name(self.name)
-                data_object = TX2D('', self.name, self.string_table)
+                data_object = TX2D('', self.name, self.string_table, context=self.context)
             elif self.type == b'MTRL':
                 if b'Dbz' in self.name:
                     data_object = MTRL_PROP('', self.name, self.string_table)
@@ -382,6 +450,8 @@ class SPRPDataEntry:
                 else:
                     data_object = BONE_INFO('', self.name, self.size)
                     data_object.info_size = 20
+            elif self.type == b'VBUF':
+                data_object = VBUF('', b'', self.string_table, context=self.context)
             else:
                 data_object = eval(self.type)('', b'', self.string_table)
             data_object.read(stream, self.data_offset)
@@ -401,13 +471,18 @@ class SPRPDataEntry:
                     child_class = ut.b2s_name(self.type)
                     if child_class not in ['BONE', 'SCNE']:
                         if b'Dbz' not in name:
-                            child_object = eval(child_class)(self.type, name, self.string_table)
+                            if child_class in ['TX2D', 'VBUF']:
+                                child_object = eval(child_class)(self.type, name, self.string_table,
+                                    context=self.context)
+                            else:
+                                child_object = eval(child_class)(self.type, name, self.string_table)
                         else:
                             raise Exception()
                     else:
                         raise Exception()
                 except Exception as e:
-                    child_object = self.__class__(self.type, name, self.string_table)
+                    child_object = self.__class__(self.type, name, self.string_table,
+                        context=self.context)
                 
                 child_object.read(stream, self.data_offset)
                 self.children.append(child_object)
@@ -416,7 +491,7 @@ class SPRPDataEntry:
         if data_offset != -1:
             self.data_offset = data_offset
         if not self.is_main_type:
-            name_offset = ut.search_index_dict(self.string_table.content, self.name)
+            name_offset = self.string_table.offset_of(self.name)
             stream.write(ut.i2b(name_offset))
         if offset != -1:
             self.offset = offset
@@ -477,7 +552,7 @@ class SPRPDataEntry:
     def get_data(self):
         data = copy.deepcopy(vars(self))
         to_remove = ['name', 'type', 'size', 'is_main_type', 'string_table', 'offset',
-                     'data_offset', 'child_offset', 'children']
+                     'data_offset', 'child_offset', 'children', 'context']
         for key in to_remove:
             del data[key]
 
@@ -538,6 +613,33 @@ class SPRPDataEntry:
         
         return entry_list
 
+    def index_entries(self, index, position, excluded):
+        """
+        Adds this entry and its children to index under every criteria search_entries would
+        match them with, excluded criteria being the ones search_entries doesn't reach them with
+        """
+        name = ut.b2s_name(self.name)
+        matched = [name]
+        if (ut.b2s_name(self.type) in ['SCNE', 'BONE']) and (ut.b2s_name(self.type) != name):
+            matched.append(ut.b2s_name(self.type))
+        if hasattr(self, 'data') and (self.data.__class__.__name__ not in matched):
+            matched.append(self.data.__class__.__name__)
+        for criteria in matched:
+            if criteria not in excluded:
+                index.setdefault(criteria, []).append((position, self))
+
+        if hasattr(self, 'data') and (self.data.__class__.__name__ == self.__class__.__name__):
+            self.data.index_entries(index, position, excluded | set(matched))
+
+        # Fix for ZB SPR files
+        excluded = excluded | set(['TX2D', 'MTRL'])
+        for child in self.children:
+            for criteria in set([child.__class__.__name__, ut.b2s_name(child.name)]):
+                if criteria not in excluded:
+                    index.setdefault(criteria, []).append((position, child))
+            if (child.__class__.__name__ == self.__class__.__name__):
+                child.index_entries(index, position, excluded)
+
     def sort(self, reverse = False):
         names = []
         for child in self.children:
@@ -3,79 +3,79 @@ import shutil
 import json
 import difflib
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from core.FBX import *
 from core.DDS import *
 from core.BMP import *
+from core.Manifest import Manifest
 import core.utils as ut
-import core.common as cm
 
 class SPRPExporter:
     def start(self, spr_object, path):
-        cm.main_handler.task.send_progress(0)
+        context = spr_object.context
+        context.send_progress(0)
         base_name, ext = os.path.splitext(ut.b2s_name(spr_object.name))
         ioram_name = base_name + ".ioram"
         vram_name = base_name + ".vram"
 
-        if (('ioram_stpk' in cm.data) and (cm.data['ioram_stpk'] != None)):
-            ioram_entries = cm.data['ioram_stpk'].search_entries([], f".ioram")
+        if (('ioram_stpk' in context.data) and (context.data['ioram_stpk'] != None)):
+            ioram_entries = context.data['ioram_stpk'].search_entries([], f".ioram")
             entries_names = [ut.b2s_name(x.name) for x in ioram_entries]
             matches = difflib.get_close_matches(ioram_name, entries_names, 1, 0)
             idx = entries_names.index(matches[0])
-            cm.data['ioram'][base_name] = ioram_entries[idx].data
+            context.data['ioram'][base_name] = ioram_entries[idx].data
         else:
-            cm.data['ioram'][base_name] = cm.ioram_data
+            context.data['ioram'][base_name] = context.ioram_data
 
-        if (('vram_stpk' in cm.data) and (cm.data['vram_stpk'] != None)):
-            vram_entries = cm.data['vram_stpk'].search_entries([], f".vram")
+        if (('vram_stpk' in context.data) and (context.data['vram_stpk'] != None)):
+            vram_entries = context.data['vram_stpk'].search_entries([], f".vram")
             entries_names = [ut.b2s_name(x.name) for x in vram_entries]
             matches = difflib.get_close_matches(vram_name, entries_names, 1, 0)
             idx = entries_names.index(matches[0])
-            cm.data['vram'][base_name] = vram_entries[idx].data
+            context.data['vram'][base_name] = vram_entries[idx].data
         else:
-            cm.data['vram'][base_name] = cm.vram_data
+            context.data['vram'][base_name] = context.vram_data
 
         if not os.path.exists(path):
             os.mkdir(path)
+        # Game vram data of exported textures, reused on import while they are left unchanged
+        manifest = Manifest(context)
 
         entry_types = []
         for entry in spr_object.entries:
             entry_types.append(ut.b2s_name(entry.data_type))
 
         vbuf_data = []
-        if ('VBUF' in entry_types) and ('ioram' in cm.data.keys()):
+        if ('VBUF' in entry_types) and ('ioram' in context.data.keys()):
             entry_types.remove('VBUF')
             vbuf_data = spr_object.search_entries([], 'VBUF')
             if len(vbuf_data) > 0:
-                ioram_stream = BytesIO(cm.data['ioram'][base_name])
+                ioram_stream = BytesIO(context.data['ioram'][base_name])
 
-                for entry in vbuf_data:
-                    entry.data.read_ioram(ioram_stream)
+                for i in range(len(vbuf_data)):
+                    vbuf_data[i].data.read_ioram(ioram_stream)
+                    context.send_step_progress(0, 4, i + 1, len(vbuf_data))
             else:
                 raise Exception("No model info found in SPR !")
 
         tx2d_data = []
-        if ('TX2D' in entry_types) and ('vram' in cm.data.keys()):
+        if ('TX2D' in entry_types) and ('vram' in context.data.keys()):
             entry_types.remove('TX2D')
             tx2d_data = spr_object.search_entries([], 'TX2D')
             if len(tx2d_data) > 0:
-                vram_stream = BytesIO(cm.data['vram'][base_name])
+                vram_stream = BytesIO(context.data['vram'][base_name])
 
-                remaining = []
                 for entry in tx2d_data:
                     entry.data.read_vram(vram_stream)
-                    name, ext = os.path.splitext(ut.b2s_name(entry.name))
-                    texture_data = entry.data
-                    vram_data = texture_data.get_unswizzled_vram_data()
-                    output_class = texture_data.get_output_format()
-                    
-                    if output_class == 'BMP':
-                        output_object = BMP(name, texture_data.width, texture_data.height, vram_data)
-                        output_object.save(path)
-                    elif output_class == 'DDS':
-                        output_object = DDS(name, texture_data.width, texture_data.height, vram_data, \
-                            texture_data.get_texture_type(), texture_data.mipmap_count)
-                        output_object.save(path)
-                    remaining.append(output_object.get_name())
+
+                # Textures are independent, they are untiled and written in parallel
+                remaining = []
+                with ThreadPoolExecutor() as executor:
+                    futures = [executor.submit(self.save_texture, entry, path, manifest) \
+                        for entry in tx2d_data]
+                    for i in range(len(futures)):
+                        remaining.append(futures[i].result())
+                        context.send_step_progress(4, 10, i + 1, len(futures))
             else:
                 raise Exception("No texture info found in SPR !")
 
@@ -109,7 +109,7 @@ class SPRPExporter:
             except:
                 print('Bone data is missing')
 
-        cm.main_handler.task.send_progress(10)
+        context.send_progress(10)
 
         scne_data = []
         if ('SHAP' in entry_types) and ('SCNE' in entry_types):
@@ -131,7 +131,7 @@ class SPRPExporter:
                         del content['children']
                     shap_dict[ut.b2s_name(data.name)] = content
 
-            cm.main_handler.task.send_progress(20)
+            context.send_progress(20)
 
             scne_data = spr_object.search_entries([], 'SCNE')
             scne_mesh_dict = {}
@@ -212,7 +212,7 @@ class SPRPExporter:
                     data_stream = open(os.path.join(path, "SCNE.json"), "w")
                     data_stream.write(str(json_data))
 
-        cm.main_handler.task.send_progress(40)
+        context.send_progress(40)
 
         mtrl_data = []
         if 'MTRL' in entry_types:
@@ -251,6 +251,7 @@ class SPRPExporter:
                     except:
                         pass
                     mtrl_dict[ut.b2s_name(entry.name)] = content
+            spr_object.invalidate_index()
 
             json_data = json.dumps(mtrl_dict, indent=4)
             data_stream = open(os.path.join(path, "MTRL.json"), "w")
@@ -268,12 +269,13 @@ class SPRPExporter:
                 for i in range(len(txan_data.entries)):
                     idx = abs((len(eye_texture_names) - 1) - i) % len(eye_texture_names)
                     txan_data.entries[i].name = eye_texture_names[idx]
+                spr_object.invalidate_index()
 
                 json_data = json.dumps(txan_data.get_data(), indent=4)
                 data_stream = open(os.path.join(path, "TXAN.json"), "w")
                 data_stream.write(str(json_data))
 
-            cm.main_handler.task.send_progress(60)
+            context.send_progress(60)
         
         for entry_type in entry_types:
             spr_entry = spr_object.search_entries([], entry_type, True)
@@ -282,10 +284,10 @@ class SPRPExporter:
                 data_stream = open(os.path.join(path, f"{entry_type}.json"), "w")
                 data_stream.write(str(json_data))
 
-        cm.main_handler.task.send_progress(80)
+        context.send_progress(80)
         
         if (scne_data != []) and (vbuf_data != []):
-            fbx_object = FBX()
+            fbx_object = FBX(context)
             fbx_object.data = {
                 'bone': bone_data,
                 'model': vbuf_data,
@@ -293,6 +295,25 @@ class SPRPExporter:
                 'texture': tx2d_data,
                 'material': mtrl_data
             }
-            fbx_object.save(path)
-
-        cm.main_handler.task.send_progress(100)
\ No newline at end of file
+            with context.stage(80, 100):
+                fbx_object.save(path)
+
+        context.send_progress(100)
+
+    def save_texture(self, entry, path, manifest):
+        name, ext = os.path.splitext(ut.b2s_name(entry.name))
+        texture_data = entry.data
+        mipmap_count = texture_data.mipmap_count
+        vram_data = texture_data.get_unswizzled_vram_data()
+        output_class = texture_data.get_output_format()
+
+        if output_class == 'BMP':
+            output_object = BMP(name, texture_data.width, texture_data.height, vram_data)
+            output_object.save(path)
+        elif output_class == 'DDS':
+            output_object = DDS(name, texture_data.width, texture_data.height, vram_data, \
+                texture_data.get_texture_type(), texture_data.mipmap_count)
+            output_object.save(path)
+        manifest.add_texture(os.path.join(path, output_object.name + output_object.ext),
+            texture_data.vram_data, mipmap_count)
+        return output_object.get_name()
\ No newline at end of file
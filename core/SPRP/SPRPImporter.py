@@ -2,9 +2,9 @@ import os
 import shutil
 import json
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from natsort import natsorted
 from colorama import Fore, Style
-from copy import deepcopy
 from core.STPZ import *
 from core.STPK import *
 from core.SPRP.SPRP import *
@@ -17,14 +17,17 @@ from core.SCNE import *
 from core.SHAP import *
 from core.VBUF import *
 from core.FBX import *
+from core.Manifest import Manifest
 import core.utils as ut
-import core.common as cm
 
 class SPRPImporter:
-    version_from_vertices_list = True
-
     def start(self, spr_object, spr_folder_path):
-        cm.main_handler.task.send_progress(0)
+        context = spr_object.context
+        context.send_progress(0)
+        # Blocks of textures and meshes left unchanged since the last conversion are reused
+        self.manifest = Manifest(context)
+        # Textures are swizzled all at once, after the entries are built
+        self.pending_textures = []
 
         fbx_found = True
         if not os.path.exists(os.path.join(spr_folder_path, "output.fbx")):
@@ -35,8 +38,9 @@ class SPRPImporter:
             fbx_found = False
 
         if fbx_found:
-            fbx_object = FBX()
-            fbx_object.load(os.path.join(spr_folder_path, "output.fbx"))
+            fbx_object = FBX(context)
+            with context.stage(0, 20):
+                fbx_object.load(os.path.join(spr_folder_path, "output.fbx"))
 
         string_list = []
         base_name, ext = os.path.splitext(ut.b2s_name(spr_object.name))
@@ -56,14 +60,14 @@ class SPRPImporter:
                 loaded_dict[name] = json.load(stream)
                 stream.close()
 
-        cm.main_handler.task.send_progress(20)
+        context.send_progress(20)
 
         if fbx_found:
             # Bones
             if hasattr(fbx_object, 'bone_nodes'):
                 self.build_bones(spr, spr_object, fbx_object, loaded_dict, string_list)
             
-            cm.main_handler.task.send_progress(30)
+            context.send_progress(30)
 
             # Meshes
             materials = {}
@@ -73,7 +77,10 @@ class SPRPImporter:
             scene_layers = {}
             scne_mesh_full_names = {}
 
+            mesh_index = 0
             for mesh_name, data in fbx_object.mesh_data.items():
+                context.send_step_progress(30, 60, mesh_index, len(fbx_object.mesh_data))
+                mesh_index += 1
                 layered_mesh_name = mesh_name
                 layer_name, mesh_name = self.format_name(mesh_name, '', '')
                 mesh_name = ut.s2b_name(mesh_name)
@@ -83,59 +90,13 @@ class SPRPImporter:
                     if layer_name != '':
                         scene_layers[mesh_name] = ut.s2b_name(layer_name)
 
-                    vbuf_object = VBUF('', '', spr_object.string_table)
-
-                    if not self.version_from_vertices_list:       
-                        # Adjusting weights and indices data from FBX to RB format 
-                        #  -> there are listed by bone/cluster and after by vertex, so you need to inverse lists, and get back layer notion
-                        # it's already done into mode version_from_vertices_list
-                        weights = data['bone_weights']
-                        indices = data['bone_indices']
-                        
-                        all_weights = {}
-                        all_indices = {}
-                        for i in range(len(indices)):
-                            for j in range(len(indices[i]['data'])):
-                                key = list(indices[i]['data'][j].keys())[0]
-                                if key not in all_indices:
-                                    all_indices[key] = [indices[i]['data'][j][key]]
-                                    all_weights[key] = [weights[i]['data'][j][key]]
-                                else:
-                                    all_indices[key].append(indices[i]['data'][j][key])
-                                    all_weights[key].append(weights[i]['data'][j][key])
-
-                        data_lists_count = 0
-                        for i in range(len(data['positions'][0]['data'])):
-                            if i not in all_indices.keys():
-                                all_indices[i] = [0]
-                                all_weights[i] = [0.0]
-                            elif data_lists_count < len(all_indices[i]):
-                                data_lists_count = len(all_indices[i])
-
-                        # Adjusting lists to the same size
-                        for i in range(len(data['positions'][0]['data'])):
-                            if len(all_indices[i]) < data_lists_count:
-                                for j in range(len(all_indices[i]), data_lists_count):
-                                    all_indices[i].append(0)
-                                    all_weights[i].append(0.0)
-                        
-                        data['bone_weights'] = []
-                        data['bone_indices'] = []
-                        
-                        for i in range(data_lists_count):
-                            data['bone_indices'].append({'data': []})
-                            data['bone_weights'].append({'data': []})
-                        
-                        for i in range(len(all_indices)):
-                            for j in range(len(all_indices[i])):
-                                data['bone_indices'][j]['data'].append((all_indices[i][j],))
-                                data['bone_weights'][j]['data'].append((all_weights[i][j],))
+                    vbuf_object = VBUF('', '', spr_object.string_table, context=context)
 
                     # Handle data from FBX
-                    for vtx_usage, vtx_data_entries in data.items():
+                    buffers = data['buffers']
+                    for vtx_usage, vtx_data_entries in buffers.items():
                         if vtx_usage in VBUF.vertex_usage_mapping.values():
                             index = 0
-                            vbuf_object.data[vtx_usage] = []
                             
                             for vtx_data in vtx_data_entries:
                                 decl_data = {}
@@ -151,33 +112,20 @@ class SPRPImporter:
                                 decl_data['index'] = index
                                 format = VBUF.vertex_format[format_num]
                                 decl_data['vertex_format'] = format
-                                decl_data['data'] = vtx_data['data']
+                                vertices = vtx_data['data']
                                 
                                 # Adjusting vertices positions and normals to RB format
                                 if vtx_usage == 'positions':
-                                    for i in range(len(decl_data['data'])):
-                                        vtx = decl_data['data'][i]
-                                        decl_data['data'][i] = (vtx[0], vtx[1], vtx[2], 1.0)
-                                elif vtx_usage == 'normals':
-                                    for i in range(len(decl_data['data'])):
-                                        vtx = decl_data['data'][i]
-                                        decl_data['data'][i] = (vtx[0], vtx[1], vtx[2], 0.0)
-                                elif vtx_usage == 'binormals':
-                                    for i in range(len(decl_data['data'])):
-                                        vtx = decl_data['data'][i]
-                                        decl_data['data'][i] = (vtx[0], vtx[1], vtx[2], 0.0)
-                                elif ((self.version_from_vertices_list) and (vtx_usage == 'uvs')):
-                                    for i in range(len(decl_data['data'])):
-                                        vtx = decl_data['data'][i]
-                                        decl_data['data'][i] = (vtx[0], vtx[1])
-                                elif ((self.version_from_vertices_list) and (vtx_usage in ['bone_indices', 'bone_weights'])):
-                                    for i in range(len(decl_data['data'])):
-                                        decl_data['data'][i] = [decl_data['data'][i]]
-
-                                vbuf_object.data[vtx_usage].append(decl_data)
+                                    vertices = np.column_stack((vertices[:, :3], np.ones(len(vertices), vertices.dtype)))
+                                elif vtx_usage in ['normals', 'binormals']:
+                                    vertices = np.column_stack((vertices[:, :3], np.zeros(len(vertices), vertices.dtype)))
+                                elif vtx_usage == 'uvs':
+                                    vertices = vertices[:, :2]
+
+                                vbuf_object.data.add_layer(vtx_usage, vertices, **decl_data)
                                 index += 1
-                        elif ((cm.selected_game in ['dbut', 'dbzb']) and (vtx_usage == 'face_indices')):
-                            vbuf_object.face_indices = vtx_data_entries
+                    if (context.game in ['dbut', 'dbzb']):
+                        vbuf_object.face_indices = buffers.face_indices
 
                     # Materials
                     for material_name, material_data in data['materials'].items():
@@ -188,9 +136,9 @@ class SPRPImporter:
                         
                         if len(material_data) > 0:
                             if 'TX2D' not in spr.keys():
-                                spr['TX2D'] = SPRPEntry(spr_object.string_table, b'TX2D')
+                                spr['TX2D'] = SPRPEntry(spr_object.string_table, b'TX2D', context=spr_object.context)
                             if 'MTRL' not in spr.keys():
-                                spr['MTRL'] = SPRPEntry(spr_object.string_table, b'MTRL')
+                                spr['MTRL'] = SPRPEntry(spr_object.string_table, b'MTRL', context=spr_object.context)
 
                         material_name = ut.s2b_name(material_name)
                         if material_name not in materials.keys():
@@ -225,7 +173,7 @@ class SPRPImporter:
                                         texture_path = os.path.join(folder_path, texture_path)
                             mtrl_object.sort(True)
                             
-                            spr_data_entry = SPRPDataEntry(b'MTRL', material_name, spr_object.string_table, True)
+                            spr_data_entry = SPRPDataEntry(b'MTRL', material_name, spr_object.string_table, True, context=spr_object.context)
                             spr_data_entry.data = mtrl_object
 
                             has_char_mtrl = False
@@ -240,7 +188,7 @@ class SPRPImporter:
                                         mtrl_prop_object.load_data(mtrl_data['children'][child_name])
 
                                         spr_child_data_entry = \
-                                            SPRPDataEntry(b'MTRL', ut.s2b_name(child_name), spr_object.string_table)
+                                            SPRPDataEntry(b'MTRL', ut.s2b_name(child_name), spr_object.string_table, context=spr_object.context)
                                         spr_child_data_entry.data = mtrl_prop_object
                                         spr_data_entry.children.append(spr_child_data_entry)
                             
@@ -248,7 +196,7 @@ class SPRPImporter:
                                 string_list.append(b'DbzCharMtrl')
                                 mtrl_prop_object = MTRL_PROP('', b'DbzCharMtrl', spr_object.string_table)
                                 spr_child_data_entry = \
-                                    SPRPDataEntry(b'MTRL', b'DbzCharMtrl', spr_object.string_table)
+                                    SPRPDataEntry(b'MTRL', b'DbzCharMtrl', spr_object.string_table, context=spr_object.context)
                                 spr_child_data_entry.data = mtrl_prop_object
                                 spr_data_entry.children.append(spr_child_data_entry)
 
@@ -257,7 +205,7 @@ class SPRPImporter:
                             string_list.append(material_name)
 
                     if 'SHAP' not in spr.keys():
-                        spr['SHAP'] = SPRPEntry(spr_object.string_table, b'SHAP')
+                        spr['SHAP'] = SPRPEntry(spr_object.string_table, b'SHAP', context=spr_object.context)
 
                     # Shapes
                     try:
@@ -284,9 +232,12 @@ class SPRPImporter:
                     print(e)
                 
                 if 'VBUF' not in spr.keys():
-                    spr['VBUF'] = SPRPEntry(spr_object.string_table, b'VBUF')
+                    spr['VBUF'] = SPRPEntry(spr_object.string_table, b'VBUF', context=spr_object.context)
 
-                vbuf_object.load_data()
+                vbuf_object.ioram_key = self.manifest.get_mesh_key(mesh_name, vbuf_object)
+                vbuf_object.ioram_reused = self.manifest.get_mesh(vbuf_object.ioram_key, vbuf_object)
+                if not vbuf_object.ioram_reused:
+                    vbuf_object.load_data()
                 if b'EYE' in mesh_name:
                     for i in range(len(vbuf_object.vertex_decl)):
                         if b'test1' in vbuf_object.vertex_decl[i]:
@@ -302,7 +253,7 @@ class SPRPImporter:
                     name = mesh_name_parts[-1]
                 vbuf_name = ut.s2b_name(f"{ut.b2s_name(shap_name)}:{ut.b2s_name(name)}")
                 string_list.append(vbuf_name)
-                spr_data_entry = SPRPDataEntry(b'VBUF', vbuf_name, spr_object.string_table, True)
+                spr_data_entry = SPRPDataEntry(b'VBUF', vbuf_name, spr_object.string_table, True, context=spr_object.context)
                 spr_data_entry.data = vbuf_object
                 spr['VBUF'].entries.append(spr_data_entry)
 
@@ -313,7 +264,7 @@ class SPRPImporter:
                 parent_names = []
 
                 if 'SCNE' not in spr.keys():
-                    spr['SCNE'] = SPRPEntry(spr_object.string_table, b'SCNE')
+                    spr['SCNE'] = SPRPEntry(spr_object.string_table, b'SCNE', context=spr_object.context)
 
                 # SCNE Transform
                 for i in range(len(parents)):
@@ -342,7 +293,7 @@ class SPRPImporter:
                         scne_transform_object.parent_name = parent_name
                         string_list.append(b'transform')
 
-                        spr_data_entry = SPRPDataEntry(b'SCNE', full_name, spr_object.string_table)
+                        spr_data_entry = SPRPDataEntry(b'SCNE', full_name, spr_object.string_table, context=spr_object.context)
                         spr_data_entry.data = scne_transform_object
                         scne_parts[full_name] = spr_data_entry
 
@@ -377,9 +328,9 @@ class SPRPImporter:
                     string_list.append(mat_type)
                     scne_material_object.infos.append((layer[0], mat_type, 0))
 
-                spr_data_entry = SPRPDataEntry(b'SCNE', scene_mesh_name, spr_object.string_table)
+                spr_data_entry = SPRPDataEntry(b'SCNE', scene_mesh_name, spr_object.string_table, context=spr_object.context)
                 spr_data_entry.data = scne_mesh_object
-                spr_child_entry = SPRPDataEntry(b'SCNE', b'[MATERIAL]', spr_object.string_table)
+                spr_child_entry = SPRPDataEntry(b'SCNE', b'[MATERIAL]', spr_object.string_table, context=spr_object.context)
                 string_list.append(b'[MATERIAL]')
                 spr_child_entry.data = scne_material_object
                 spr_data_entry.children.append(spr_child_entry)
@@ -403,22 +354,22 @@ class SPRPImporter:
                     string_list.append(b'shape')
                     scne_shape_object.parent_name = ut.s2b_name(parent_names[0])
 
-                    spr_data_entry = SPRPDataEntry(b'SCNE', scene_shape_name, spr_object.string_table)
+                    spr_data_entry = SPRPDataEntry(b'SCNE', scene_shape_name, spr_object.string_table, context=spr_object.context)
                     spr_data_entry.data = scne_shape_object
                     scne_parts[scene_shape_name] = spr_data_entry
 
-            cm.main_handler.task.send_progress(60)
+            context.send_progress(60)
 
             # TODO: check and clean SCNE import code
 
             if ('SCNE' in loaded_dict) and ('SCNE' in spr.keys()):
                 string_list.append(b'[LAYERS]')
-                scne_layers_entry = SPRPDataEntry(b'SCNE', b'[LAYERS]', spr_object.string_table)
+                scne_layers_entry = SPRPDataEntry(b'SCNE', b'[LAYERS]', spr_object.string_table, context=spr_object.context)
                 layer_names = set(scene_layers.values())
 
                 for name in layer_names:
                     string_list.append(name)
-                    layer_node = SPRPDataEntry(b'SCNE', name, spr_object.string_table)
+                    layer_node = SPRPDataEntry(b'SCNE', name, spr_object.string_table, context=spr_object.context)
                     scne_layers_entry.children.append(layer_node)
                 # Adding missing layers using SCNE.json
                 if '[LAYERS]' in loaded_dict['SCNE'].keys():
@@ -427,7 +378,7 @@ class SPRPImporter:
                             key = ut.s2b_name(key)
                             if key not in layer_names:
                                 string_list.append(key)
-                                layer_node = SPRPDataEntry(b'SCNE', key, spr_object.string_table)
+                                layer_node = SPRPDataEntry(b'SCNE', key, spr_object.string_table, context=spr_object.context)
                                 scne_layers_entry.children.append(layer_node)
                 scne_layers_entry.sort()
 
@@ -459,7 +410,7 @@ class SPRPImporter:
                     parent_names = []
 
                     if 'SCNE' not in spr.keys():
-                        spr['SCNE'] = SPRPEntry(spr_object.string_table, b'SCNE')
+                        spr['SCNE'] = SPRPEntry(spr_object.string_table, b'SCNE', context=spr_object.context)
 
                     # # SCNE Transform
                     # for i in range(len(parents)):
@@ -568,13 +519,13 @@ class SPRPImporter:
                     #     shapes[shape_name] = ''
 
                 string_list.append(b'[NODES]')
-                scne_nodes_entry = SPRPDataEntry(b'SCNE', b'[NODES]', spr_object.string_table)
+                scne_nodes_entry = SPRPDataEntry(b'SCNE', b'[NODES]', spr_object.string_table, context=spr_object.context)
                 
                 if '[NODES]' in loaded_dict['SCNE'].keys():
                     #scne_nodes = []
 
                     # Use nodes from SCNE.json to fix blender scene nodes
-                    if cm.use_blender:
+                    if context.use_blender:
                         new_scne_parts = {}
                         scne_names_to_remove = []
                         for loaded_key, loaded_node in loaded_dict['SCNE']['[NODES]']['children'].items():
@@ -633,7 +584,7 @@ class SPRPImporter:
                                 if found:
                                     string_list.append(name)
                                     new_scne_parts[loaded_key] = \
-                                        SPRPDataEntry(b'SCNE', loaded_key, spr_object.string_table)
+                                        SPRPDataEntry(b'SCNE', loaded_key, spr_object.string_table, context=spr_object.context)
                                     new_scne_parts[loaded_key].data = SCNE('', name, spr_object.string_table)
                                     new_scne_parts[loaded_key].data.load_data(loaded_node['data'])
                                     string_list.append(loaded_key)
@@ -644,7 +595,7 @@ class SPRPImporter:
                           (b'|model' not in new_scne_parts):
                             key = b'|model'
                             node = loaded_dict['SCNE']['[NODES]']['children']['|model']
-                            new_scne_parts[key] = SPRPDataEntry(b'SCNE', key, spr_object.string_table)
+                            new_scne_parts[key] = SPRPDataEntry(b'SCNE', key, spr_object.string_table, context=spr_object.context)
                             new_scne_parts[key].data = SCNE('', name, spr_object.string_table)
                             new_scne_parts[key].data.load_data(node['data'])
                             string_list.append(key)
@@ -719,7 +670,7 @@ class SPRPImporter:
                     #scne_nodes_entry.children = scne_nodes + scne_nodes_entry.children
                 scene_name = ut.s2b_name(f"{base_name}.fbx")
                 string_list.append(scene_name)
-                scne_main_entry = SPRPDataEntry(b'SCNE', scene_name, spr_object.string_table, True)
+                scne_main_entry = SPRPDataEntry(b'SCNE', scene_name, spr_object.string_table, True, context=spr_object.context)
                 scne_main_entry.children.append(scne_layers_entry)
                 scne_main_entry.children.append(scne_nodes_entry)
 
@@ -731,7 +682,7 @@ class SPRPImporter:
                     for entry in scne_eye_info_object.eye_entries:
                         if entry.name != b'':
                             string_list.append(entry.name)
-                    scne_child_entry = SPRPDataEntry(b'SCNE', b'DbzEyeInfo', spr_object.string_table)
+                    scne_child_entry = SPRPDataEntry(b'SCNE', b'DbzEyeInfo', spr_object.string_table, context=spr_object.context)
                     scne_child_entry.data = scne_eye_info_object
                     scne_main_entry.children.append(scne_child_entry)
 
@@ -752,12 +703,12 @@ class SPRPImporter:
                 entry_type = ut.s2b_name(key)
                 if key not in spr.keys():
                     try:
-                        spr[key] = SPRPEntry(spr_object.string_table, entry_type)
+                        spr[key] = SPRPEntry(spr_object.string_table, entry_type, context=spr_object.context)
                         for name, content in data.items():
                             name = ut.s2b_name(name)
                             string_list.append(name)
                             spr_data_entry = \
-                                SPRPDataEntry(entry_type, name, spr_object.string_table, True)
+                                SPRPDataEntry(entry_type, name, spr_object.string_table, True, context=spr_object.context)
                             spr_data_entry.data = content['data'].encode('latin-1')
                             spr[key].entries.append(spr_data_entry)
                     except Exception as e:
@@ -766,7 +717,7 @@ class SPRPImporter:
                         print(Style.RESET_ALL)
         else:
             spr = {
-                'TX2D': SPRPEntry(spr_object.string_table, b'TX2D')
+                'TX2D': SPRPEntry(spr_object.string_table, b'TX2D', context=spr_object.context)
             }
             texture_names = []
 
@@ -787,18 +738,19 @@ class SPRPImporter:
                 if hasattr(child.data, 'source_name'):
                     child.data.source_name = b''
 
+        self.encode_textures()
         self.sort_entries(spr, spr_object)
         self.build_ram_data(spr, spr_object, base_name)
 
         # Remove duplicates from string table and build it
         string_list = natsorted(list(set(string_list)))
         spr_object.string_table.build(string_list, 1)
-        cm.data['spr'][base_name] = spr_object
+        context.data['spr'][base_name] = spr_object
 
-        cm.main_handler.task.send_progress(100)
+        context.send_progress(100)
 
     def build_bones(self, spr_dict, spr_object, fbx_object, loaded_dict, string_list):
-        spr_dict['BONE'] = SPRPEntry(spr_object.string_table, b'BONE')
+        spr_dict['BONE'] = SPRPEntry(spr_object.string_table, b'BONE', context=spr_object.context)
         bone_object = BONE()
         bone_names = []
         bone_dict = {}
@@ -875,7 +827,7 @@ class SPRPImporter:
         bone_object.bone_string_table.build(bone_names)
         bone_object.sort_bones()
         string_list.append(bone_object.bone_entries[0].name)
-        spr_data_entry = SPRPDataEntry(b'BONE', bone_object.bone_entries[0].name, spr_object.string_table, True)
+        spr_data_entry = SPRPDataEntry(b'BONE', bone_object.bone_entries[0].name, spr_object.string_table, True, context=spr_object.context)
         spr_data_entry.data = bone_object
 
         bone_children = {}
@@ -907,7 +859,7 @@ class SPRPImporter:
             bone_child_object.load_data(child_data)
 
             spr_child_data_entry = \
-                SPRPDataEntry(b'BONE', child_name, spr_object.string_table)
+                SPRPDataEntry(b'BONE', child_name, spr_object.string_table, context=spr_object.context)
             spr_child_data_entry.data = bone_child_object
             spr_data_entry.children.append(spr_child_data_entry)
 
@@ -918,7 +870,7 @@ class SPRPImporter:
         shape_object = SHAP('', b'', spr_object.string_table)
         if shap_data:
             shape_object.load_data(shap_data)
-        spr_data_entry = SPRPDataEntry(b'SHAP', shap_name, spr_object.string_table, True)
+        spr_data_entry = SPRPDataEntry(b'SHAP', shap_name, spr_object.string_table, True, context=spr_object.context)
         spr_data_entry.data = shape_object
 
         string_list.append(b'DbzEdgeInfo')
@@ -939,13 +891,13 @@ class SPRPImporter:
             if shape_object.source_type != b'':
                 string_list.append(shape_object.source_type)
 
-        spr_child_data_entry = SPRPDataEntry(b'SHAP', b'DbzEdgeInfo', spr_object.string_table)
+        spr_child_data_entry = SPRPDataEntry(b'SHAP', b'DbzEdgeInfo', spr_object.string_table, context=spr_object.context)
         spr_child_data_entry.data = shape_object
         spr_data_entry.children.append(spr_child_data_entry)
 
         string_list.append(b'DbzShapeInfo')
         shape_object = SHAP('', b'DbzShapeInfo', spr_object.string_table)
-        spr_child_data_entry = SPRPDataEntry(b'SHAP', b'DbzShapeInfo', spr_object.string_table)
+        spr_child_data_entry = SPRPDataEntry(b'SHAP', b'DbzShapeInfo', spr_object.string_table, context=spr_object.context)
         spr_child_data_entry.data = shape_object
         spr_data_entry.children.append(spr_child_data_entry)
 
@@ -978,23 +930,19 @@ class SPRPImporter:
             for entry in spr_dict['VBUF'].entries:
                 vbuf_object = entry.data
 
-                data = deepcopy(vbuf_object.get_data())
-                for first_key, val in data.items():
-                    i = 0
-                    for elt in val:
-                        for k, v in elt.items():
-                            if isinstance(v, bytes):
-                                data[first_key][i][k] = ut.b2s_name(v)
-                        i += 1
-                
+                if not vbuf_object.ioram_reused:
+                    vbuf_object.get_data()
                 vbuf_object.ioram_data_offset = len(ioram_data)
                 data = vbuf_object.get_ioram()
                 padding = ut.add_padding(len(data))
                 ioram_data.extend(data)
                 ioram_data.extend(bytes(padding - len(data)))
-                vbuf_object.load_data()
+                if not vbuf_object.ioram_reused:
+                    vbuf_object.load_data()
+                    # Stored as appended, so that reused meshes give the same ioram
+                    self.manifest.add_mesh(vbuf_object.ioram_key, vbuf_object, data)
 
-            cm.data['ioram'][base_name] = ioram_data
+            spr_object.context.data['ioram'][base_name] = ioram_data
             spr_object.ioram_data_size = len(ioram_data)
 
         # Build vram
@@ -1008,8 +956,8 @@ class SPRPImporter:
                 vram_data.extend(data)
                 padding_lenght = padding - len(data)
 
-                if cm.selected_platform == 'ps3':
-                    if cm.selected_game == 'dbrb2':
+                if spr_object.context.platform == 'ps3':
+                    if spr_object.context.game == 'dbrb2':
                         if tx2d_object.get_texture_type() == 'DXT1':
                             if tx2d_object.width == tx2d_object.height:
                                 padding_lenght += 80
@@ -1022,9 +970,24 @@ class SPRPImporter:
                                 padding_lenght += 80
                 vram_data.extend(bytes(padding_lenght))
 
-            cm.data['vram'][base_name] = vram_data
+            spr_object.context.data['vram'][base_name] = vram_data
             spr_object.vram_data_size = len(vram_data)
 
+    def encode_textures(self):
+        # Textures are independent, they are swizzled in parallel
+        with ThreadPoolExecutor() as executor:
+            for result in executor.map(self.encode_texture, self.pending_textures):
+                pass
+        self.pending_textures = []
+
+    def encode_texture(self, texture):
+        tx2d_object, source_path = texture
+        if not self.manifest.get_texture(source_path, tx2d_object):
+            tx2d_object.vram_data = tx2d_object.get_swizzled_vram_data()
+            self.manifest.add_texture(source_path, tx2d_object.vram_data,
+                tx2d_object.mipmap_count)
+        tx2d_object.vram_data_size = len(tx2d_object.vram_data)
+
     def format_name(self, name, full_name = '', sep = '|'):
         layer_name = re.findall(r'^\[(.*?)\]', name)
         if layer_name != []:
@@ -1053,7 +1016,7 @@ class SPRPImporter:
                 raise Exception("Unknown texture format")
             stream = open(source_path, 'rb')
             tex_object.read(stream)
-            tx2d_object = TX2D('', b'', spr_object.string_table)
+            tx2d_object = TX2D('', b'', spr_object.string_table, context=spr_object.context)
 
             if ext[1:].upper() == 'BMP':
                 tx2d_object.texture_type = 0
@@ -1072,18 +1035,18 @@ class SPRPImporter:
                 tx2d_object.width = tex_object.width
             
             if (b'TOONMAP' in layer_name) or (b'_RAMP' in layer_name):
-                if cm.selected_platform == 'x360':
+                if spr_object.context.platform == 'x360':
                     tx2d_object.unknown0x00 = ut.b2i(b'\x82')
                 tx2d_object.unknown0x1C = ut.b2i(b'\xA7\x2D\x0A\x80')
             else:
                 tx2d_object.unknown0x1C = ut.b2i(b'\xA7\x28\x0A\x80')
 
-            # Setting data + swizzling if needed
+            # Setting data, swizzled later by encode_textures
             tx2d_object.vram_data = tex_object.data
-            tx2d_object.vram_data = tx2d_object.get_swizzled_vram_data()
             tx2d_object.vram_data_size = len(tx2d_object.vram_data)
+            self.pending_textures.append((tx2d_object, source_path))
 
-            spr_data_entry = SPRPDataEntry(b'TX2D', source_name, spr_object.string_table, True)
+            spr_data_entry = SPRPDataEntry(b'TX2D', source_name, spr_object.string_table, True, context=spr_object.context)
             spr_data_entry.data = tx2d_object
             texture_names.append(source_name)
 
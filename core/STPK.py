@@ -2,8 +2,9 @@ import os, shutil
 import re
 import glob
 import core.utils as ut
-import core.common as cm
+import core.constants as ct
 from natsort import natsorted
+from io import BytesIO
 from .SPRP.SPRP import SPRP
 
 class STPK:
@@ -11,20 +12,49 @@ class STPK:
     entry_size = 48
     ext_to_class = {b'SPR': b'SPRP'}
 
-    def __init__(self, name = b'', size = 0, add_extra_bytes = False):
+    def __init__(self, name = b'', size = 0, add_extra_bytes = False, *, context):
         self.entries = []
         if (name.__class__.__name__ == 'str'):
             name = ut.s2b_name(name)
         self.name = name
         self.size = size
         self.add_extra_bytes = add_extra_bytes
+        self.context = context
 
     def get_size(self):
+        # Size written in the table of a parent pak, extra bytes and padding aren't counted
         size = self.header_size + len(self.entries) * self.entry_size
         for entry in self.entries:
             size += entry.get_size()
         return size
 
+    def get_header_size(self):
+        size = self.header_size + len(self.entries) * self.entry_size
+        if self.add_extra_bytes:
+            # Extra bytes for console support
+            if self.context.platform == 'x360':
+                size += 4032
+            else:
+                size += 64
+        if (len(self.entries) > 0) and (self.entries[-1].get_size() == 0):
+            size += 16
+        return size
+
+    def get_layout(self):
+        """
+        Returns the offset of every entry from the start of the pak and the written size
+        """
+        offsets = []
+        offset = self.get_header_size()
+        size = offset
+        for entry in self.entries:
+            offsets.append(offset)
+            # Empty entries don't extend the pak
+            if entry.get_data_size() > 0:
+                size = offset + entry.get_data_size()
+                offset = ut.add_padding(size)
+        return offsets, size
+
     def read(self, stream, data_offset = 0):
         self.start_offset = stream.tell()
         stream.seek(8, os.SEEK_CUR) # skip unknown bytes
@@ -48,57 +78,71 @@ class STPK:
             # use extension otherwise and if it is still not identified
             # use generic entry if unknown class
             try:
-                entry_object = eval(data_tag)(data_name, data_size)
+                entry_object = eval(data_tag)(data_name, data_size, context=self.context)
             except Exception as e:
                 try:
                     data_tag = data_name.rsplit(b'.', 1)[1].upper()
                     data_tag = self.ext_to_class[data_tag]
-                    entry_object = eval(data_tag)(data_name, data_size)
+                    entry_object = eval(data_tag)(data_name, data_size, context=self.context)
                 except Exception:
-                    data_tag = 'STPKEntry'
-                    entry_object = eval(data_tag)(data_name, data_size)
-            entry_object.read(stream, self.start_offset + data_offset)
+                    entry_object = None
 
-            self.entries.append(entry_object)
+            # Known classes are only parsed when their data is first accessed
+            stpk_entry = STPKEntry(data_name, data_size)
+            stpk_entry.read(stream, self.start_offset + data_offset, entry_object)
+
+            self.entries.append(stpk_entry)
+
+    def prepare(self):
+        """
+        Serializes entries needing a seekable stream, so every size is known before writing
+        """
+        for entry in self.entries:
+            entry.prepare()
+
+    def write(self, stream, prepared = False):
+        # Layout is computed first, so the pak is written sequentially
+        if not prepared:
+            self.prepare()
+        offsets, size = self.get_layout()
 
-    def write(self, stream):
         # Writing header
-        self.start_offset = stream.tell()
         stream.write(ut.s2b_name(self.__class__.__name__))
         stream.write(ut.i2b(1)) # write unknown bytes
         stream.write(ut.i2b(len(self.entries)))
         stream.write(ut.i2b(self.header_size))
 
-        stream.write(bytes(self.entry_size * len(self.entries)))
-        if self.add_extra_bytes:
-            # Extra bytes for console support
-            if cm.selected_platform == 'x360':
-                stream.write(bytes(4032))
-            else:
-                stream.write(bytes(64))
-        if (self.entries[-1].get_size() == 0):
-            stream.write(bytes(16))
-        self.write_data(stream)
-
         # Writing entries info
-        stream.seek(self.start_offset + self.header_size)
-        for entry in self.entries:
-            stream.write(ut.i2b(entry.offset - self.start_offset))
-            size = entry.get_size()
-            stream.write(ut.extb(ut.i2b(size), 12))
-            stream.write(ut.extb(entry.name, 32))
-    
-    def write_data(self, stream):
-        offset = stream.tell()
+        for i in range(len(self.entries)):
+            stream.write(ut.i2b(offsets[i]))
+            stream.write(ut.extb(ut.i2b(self.entries[i].get_size()), 12))
+            stream.write(ut.extb(self.entries[i].name, 32))
+
+        # Extra bytes
+        stream.write(bytes(self.get_header_size() - self.header_size - \
+            len(self.entries) * self.entry_size))
+        self.write_data(stream, offsets)
+
+        if not prepared:
+            self.release()
+
+    def write_data(self, stream, offsets):
+        position = self.get_header_size()
+        for i in range(len(self.entries)):
+            size = self.entries[i].get_data_size()
+            if size > 0:
+                stream.write(bytes(offsets[i] - position))
+                self.entries[i].write(stream)
+                position = offsets[i] + size
+
+    def release(self):
         for entry in self.entries:
-            entry.offset = offset
-            entry.write(stream)
-            offset = ut.add_padding(stream.tell())
+            entry.release()
 
     def add_entry(self, entry_name, entry_data):
         if entry_name.__class__.__name__ == 'str':
             entry_name = ut.s2b_name(entry_name)
-        if 'byte' in entry_data.__class__.__name__:
+        if entry_data.__class__.__name__ in ['bytes', 'bytearray', 'memoryview']:
             entry_object = STPKEntry(entry_name, len(entry_data))
         else:
             entry_object = STPKEntry(entry_name, entry_data.get_size())
@@ -124,15 +168,18 @@ class STPK:
 
                 if (os.path.isdir(child_path)):
                     base_name, ext = os.path.splitext(name)
-                    entry_class = ut.search_index_dict_list(cm.ext_map, ext)
+                    entry_class = ut.search_index_dict_list(ct.ext_map, ext)
 
                     if (entry_class != None):
-                        entry_object = eval(entry_class)(bytes_name)
+                        entry_object = STPKEntry(bytes_name)
+                        entry_object.data = eval(entry_class)(bytes_name, context=self.context)
+                        entry_object.data.load(child_path)
                     else:
                         entry_object = STPKEntry(bytes_name)
+                        entry_object.load(child_path)
                 else:
                     entry_object = STPKEntry(bytes_name)
-                entry_object.load(child_path)
+                    entry_object.load(child_path)
                 self.entries.append(entry_object)
 
     def save(self, path):
@@ -140,12 +187,19 @@ class STPK:
             shutil.rmtree(path)
         os.mkdir(path)
 
+        # Progress of each entry is weighted by its size
+        total_size = max(sum([entry.get_size() for entry in self.entries]), 1)
+        done_size = 0
+
         i = 0
         for entry in self.entries:
-            if not (cm.selected_game == 'dbzb' and entry.name.endswith(b'ioram')):
+            if not (self.context.game == 'dbzb' and entry.name.endswith(b'ioram')):
                 if hasattr(entry, 'save'):
                     output_path = os.path.join(path, f"[{i}]{ut.b2s_name(entry.name)}")
-                    entry.save(output_path)
+                    with self.context.stage(100 * done_size / total_size,
+                        100 * (done_size + entry.get_size()) / total_size):
+                        entry.save(output_path)
+            done_size += entry.get_size()
             i += 1
 
     def __str__(self):
@@ -160,25 +214,82 @@ class STPKEntry():
     def __init__(self, name, size = 0):
         self.name = name
         self.size = size
+        self.pending_read = None
+        self.rendered = None
+
+    @property
+    def data(self):
+        if self.pending_read != None:
+            entry_object, stream, start_offset = self.pending_read
+            self.pending_read = None
+            stream.seek(start_offset)
+            entry_object.read(stream, start_offset)
+            self.entry_data = entry_object
+        return self.entry_data
+
+    @data.setter
+    def data(self, data):
+        self.pending_read = None
+        self.entry_data = data
+
+    def is_raw(self):
+        return self.data.__class__.__name__ in ['bytes', 'bytearray', 'memoryview']
     
     def get_size(self):
-        if 'byte' not in self.data.__class__.__name__:
+        if self.pending_read != None:
+            return self.size
+        if self.rendered != None:
+            return len(self.rendered)
+        if not self.is_raw():
             return self.data.get_size()
         return len(self.data)
 
-    def read(self, stream, start_offset):
-        stream.seek(start_offset)
-        self.data = stream.read(self.size)
+    def get_data_size(self):
+        """
+        Returns the size of the entry as written, nested paks including their extra bytes
+        """
+        if (self.pending_read == None) and (self.data.__class__.__name__ == 'STPK'):
+            offsets, size = self.data.get_layout()
+            return size
+        return self.get_size()
+
+    def read(self, stream, start_offset, entry_object = None):
+        if entry_object != None:
+            self.pending_read = (entry_object, stream, start_offset)
+        else:
+            self.data = ut.read_view(stream, start_offset, self.size)
+
+    def prepare(self):
+        # Unparsed entries are copied as they were read
+        if (self.pending_read != None) or self.is_raw():
+            return
+        if self.data.__class__.__name__ == 'STPK':
+            self.data.prepare()
+        else:
+            stream = BytesIO()
+            self.data.write(stream)
+            self.rendered = stream.getbuffer()
+
+    def release(self):
+        self.rendered = None
+        if (self.pending_read == None) and (self.data.__class__.__name__ == 'STPK'):
+            self.data.release()
 
     def write(self, stream):
-        stream.seek(self.offset)
-        if 'byte' in self.data.__class__.__name__:
+        if self.pending_read != None:
+            entry_object, source, start_offset = self.pending_read
+            stream.write(ut.read_view(source, start_offset, self.size))
+        elif self.rendered != None:
+            stream.write(self.rendered)
+        elif self.is_raw():
             stream.write(self.data)
+        elif self.data.__class__.__name__ == 'STPK':
+            self.data.write(stream, True)
         else:
             self.data.write(stream)
 
     def search_entries(self, entry_list, criteria):
-        if self.data.__class__.__name__ not in ['bytes', 'bytearray']:
+        if not self.is_raw():
             if (self.data.__class__.__name__ == criteria) or \
                 (criteria in ut.b2s_name(self.data.name)):
                 entry_list.append(self.data)
@@ -193,6 +304,9 @@ class STPKEntry():
         stream.close()
 
     def save(self, path):
+        if not self.is_raw():
+            self.data.save(path)
+            return
         stream = open(path, 'wb')
         stream.write(self.data)
         stream.close()
@@ -1,9 +1,12 @@
 import os
+import numpy as np
 import core.utils as ut
 
 class StringTable():
     def __init__(self):
         self.content = {}
+        self.offsets = {}
+        self.size = 0
 
     @ut.keep_cursor_pos
     def read(self, stream, size = None, first_offset = 0, padding = 1):
@@ -17,16 +20,40 @@ class StringTable():
             stream.seek(0, os.SEEK_END)
             size = stream.tell() - self.offset
             stream.seek(self.offset)
-        string_list = stream.read(size).split(b'\x00')
-        string_list = [x for x in string_list if x != b'']
-        string_list_offsets = self.gen_offsets(string_list)
-        self.content = dict(zip(string_list_offsets, string_list))
+        data = stream.read(size)
+
+        # Each name starts after a NUL byte, empty names are skipped (offset 0 means no name)
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        ends = np.append(np.flatnonzero(buffer == 0), len(buffer))
+        starts = np.insert(ends[:-1] + 1, 0, 0)
+        not_empty = ends > starts
+        string_list_offsets = starts[not_empty].tolist()
+        string_list = [data[start:end] for start, end in zip(string_list_offsets, ends[not_empty].tolist())]
+        self.set_content(string_list_offsets, string_list)
 
     def build(self, string_list, first_offset = 0, padding = 1):
         self.first_offset = first_offset
         self.padding = padding
         string_list_offsets = self.gen_offsets(string_list)
+        self.set_content(string_list_offsets, string_list)
+
+    def set_content(self, string_list_offsets, string_list):
+        """
+        Fills the table and its reverse index (first offset is kept for duplicated names)
+        """
         self.content = dict(zip(string_list_offsets, string_list))
+        self.offsets = {}
+        for offset, string in self.content.items():
+            self.offsets.setdefault(string, offset)
+        self.size = 0
+        if len(string_list_offsets) > 0:
+            self.size = string_list_offsets[-1] + len(string_list[-1]) + self.padding
+
+    def offset_of(self, name):
+        """
+        Returns the offset pointing to name in the table
+        """
+        return self.offsets[name]
 
     def gen_offsets(self, string_list):
         """
@@ -41,17 +68,25 @@ class StringTable():
         return string_list_offsets
 
     def get_size(self):
-        last_string = list(self.content.items())[-1]
-        size = last_string[0] + len(last_string[1]) + self.padding
-        return size
+        return self.size
+
+    def to_bytes(self):
+        """
+        Returns the whole table, from offset 0 to the last name terminator
+        """
+        blob = []
+        position = 0
+        for offset, string in sorted(self.content.items()):
+            if isinstance(string, str):
+                string = ut.s2b_name(string)
+            blob.append(bytes(offset - position))
+            blob.append(string + b'\x00')
+            position = offset + len(string) + 1
+        return b''.join(blob)
 
     def write(self, stream):
         self.offset = stream.tell()
-        for key, val in self.content.items():
-            stream.seek(self.offset + key)
-            if isinstance(val, str):
-                val = ut.s2b_name(val)
-            stream.write(val + b'\x00')
+        stream.write(self.to_bytes())
     
     def __repr__(self):
         string = (
@@ -1,12 +1,11 @@
+import hashlib
 import core.utils as ut
-import core.common as cm
 import core.swizzle as sw
-import struct
 
 class TX2D:
     info_size = 36
 
-    def __init__(self, type = '', name = b'', string_table = ''):
+    def __init__(self, type = '', name = b'', string_table = '', *, context):
         if type == '':
             self.type = self.__class__.__name__
         self.name = name
@@ -16,6 +15,7 @@ class TX2D:
         self.mipmap_count = 1
         self.unknown0x18 = 0
         self.string_table = string_table
+        self.context = context
 
     def get_size(self, specific_include = True):
         return self.info_size
@@ -63,7 +63,7 @@ class TX2D:
             # Adding 0x27800000 for ZB support
             return 'DXT5'
         elif (hex(self.texture_type) == '0x20000000'):
-            if cm.selected_platform == 'x360':
+            if self.context.platform == 'x360':
                 return 'ATI2'
             return 'DXT5'
         elif self.texture_type == 0: # r8g8b8a8_typeless
@@ -71,38 +71,43 @@ class TX2D:
         return 'DXT1'
 
     def get_swizzled_vram_data(self):
-        data = self.vram_data
-        texture_type = self.get_texture_type()
-
-        if texture_type == '27':
-            data = bytearray()
-            for i in range(0, len(self.vram_data), 4):
-                elt = self.vram_data[i:i+4]
-                # Swap bytes
-                data.extend(struct.pack("<I", struct.unpack(">I", elt)[0]))
-        elif cm.selected_platform == 'x360':
-            # Using 1 mipmap as temporary fix
-            self.mipmap_count = 1
-            self.mipmap_count, data = \
-                sw.XBOX.process(data, self.width, self.height, \
-                    self.mipmap_count, texture_type, 'swizzle')
-        
-        return data
+        return self.process_vram_data('swizzle')
 
     def get_unswizzled_vram_data(self):
+        return self.process_vram_data('unswizzle')
+
+    def process_vram_data(self, action):
         data = self.vram_data
         texture_type = self.get_texture_type()
 
         if texture_type == '27':
-            data = bytearray()
-            for i in range(0, len(self.vram_data), 4):
-                elt = self.vram_data[i:i+4]
-                # Swap bytes
-                data.extend(struct.pack("<I", struct.unpack(">I", elt)[0]))
-        elif cm.selected_platform == 'x360':
-            self.mipmap_count, data = \
-                sw.XBOX.process(data, self.width, self.height, \
-                    self.mipmap_count, texture_type)
+            # Swap bytes
+            data = ut.swap_endianness(self.vram_data, 4)
+        elif self.context.platform == 'x360':
+            # Results are cached by content when enabled, in memory then on disk
+            cache = self.context.get_cache('textures', self.context.use_texture_cache,
+                self.context.texture_cache_size, self.context.texture_memory_size)
+            if cache == None:
+                self.mipmap_count, data = \
+                    sw.XBOX.process(data, self.width, self.height, \
+                        self.mipmap_count, texture_type, action)
+                return data
+
+            key = hashlib.sha256(data)
+            key.update(ut.s2b_name(f"{self.width}x{self.height}|{texture_type}|"
+                f"{self.mipmap_count}|{self.context.platform}|{action}"))
+            key = key.hexdigest()
+
+            cached_data = cache.get_bytes(key)
+            if cached_data != None:
+                # Mipmap count kept by processing is stored first
+                self.mipmap_count = ut.b2i(cached_data[:4])
+                data = cached_data[4:]
+            else:
+                self.mipmap_count, data = \
+                    sw.XBOX.process(data, self.width, self.height, \
+                        self.mipmap_count, texture_type, action)
+                cache.put_bytes(key, ut.i2b(self.mipmap_count) + bytes(data))
         
         return data
     
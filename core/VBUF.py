@@ -1,8 +1,7 @@
-import os
-from io import BytesIO
-import core.common as cm
 import core.utils as ut
 import struct
+import numpy as np
+from .MeshBuffers import MeshBuffers
 
 class VBUF:
     info_size = 32
@@ -28,6 +27,10 @@ class VBUF:
         'f': 4,
         'L': 4
     }
+    format_dtype = {
+        'f': '>f4',
+        'L': '>u4'
+    }
     vertex_usage = {
         0: 'VTXUSAGE_POSITION',
         1: 'VTXUSAGE_COLOR',
@@ -59,18 +62,19 @@ class VBUF:
         'uvs'
     ]
 
-    def __init__(self, type = '', name = '', string_table = ''):
+    def __init__(self, type = '', name = '', string_table = '', *, context):
         if type == '':
             self.type = self.__class__.__name__
         self.name = name
         self.string_table = string_table
+        self.context = context
         self.unknown0x00 = 68
         self.unknown0x04 = 0
         self.unknown0x14 = 6
         self.unknown0x16 = 0
-        self.data = {}
+        self.data = MeshBuffers()
         self.vertex_decl = []
-        if cm.selected_game in ['dbut', 'dbzb']:
+        if self.context.game in ['dbut', 'dbzb']:
             self.info_size = 40
 
     def get_size(self, include_vertex_decl = True):
@@ -87,14 +91,14 @@ class VBUF:
         self.ioram_data_offset = ut.b2i(stream.read(4))
         self.ioram_data_size = ut.b2i(stream.read(4))
         self.vertex_count = ut.b2i(stream.read(4))
-        if cm.selected_game in ['dbut', 'dbzb']:
+        if self.context.game in ['dbut', 'dbzb']:
             self.index_count = ut.b2i(stream.read(4))
         self.unknown0x14 = ut.b2i(stream.read(2))
         self.unknown0x16 = ut.b2i(stream.read(2))
         self.vertex_decl_count = ut.b2i(stream.read(2))
         self.vertex_decl_count_2 = ut.b2i(stream.read(2))
         self.vertex_decl_offset = ut.b2i(stream.read(4))
-        if cm.selected_game in ['dbut', 'dbzb']:
+        if self.context.game in ['dbut', 'dbzb']:
             self.ioram_index_offset = ut.b2i(stream.read(4))
         if read_data:
             self.read_data(stream)
@@ -129,14 +133,14 @@ class VBUF:
         stream.write(ut.i2b(self.ioram_data_offset))
         stream.write(ut.i2b(len(self.ioram_data)))
         stream.write(ut.i2b(self.vertex_count))
-        if cm.selected_game in ['dbut', 'dbzb']:
+        if self.context.game in ['dbut', 'dbzb']:
             stream.write(ut.i2b(self.index_count))
         stream.write(ut.i2b(self.unknown0x14, 2))
         stream.write(ut.i2b(self.unknown0x16, 2))
         stream.write(ut.i2b(self.vertex_decl_count, 2))
         stream.write(ut.i2b(self.vertex_decl_count_2, 2))
         stream.write(ut.i2b(self.vertex_decl_offset))
-        if cm.selected_game in ['dbut', 'dbzb']:
+        if self.context.game in ['dbut', 'dbzb']:
             stream.write(ut.i2b(self.ioram_index_offset))
         if write_data:
             return self.write_data(stream)
@@ -148,7 +152,7 @@ class VBUF:
             unknown0x00, resource_name, vertex_usage, \
                 index, vertex_format, stride, offset = decl
             try:
-                resource_name_offset = ut.search_index_dict(self.string_table.content, resource_name)
+                resource_name_offset = self.string_table.offset_of(resource_name)
             except Exception:
                 resource_name_offset = 0
             decl = (unknown0x00, resource_name_offset, vertex_usage, \
@@ -158,10 +162,8 @@ class VBUF:
 
     def load_data(self):       
         self.vertex_count = len(self.data['positions'][0]['data'])
-        if cm.selected_game in ['dbut', 'dbzb']:
+        if self.context.game in ['dbut', 'dbzb']:
             self.index_count = len(self.face_indices)
-        ioram_stream = BytesIO()
-        vertex_usages = {}
         total_chunk_size = 0
         previous_stride = 0
         previous_usage = 0
@@ -177,34 +179,18 @@ class VBUF:
         self.vertex_decl = []
 
         # Reorder keys
-        data = {}
-        for key in self.vertex_ordered_keys:
-            if key in self.data.keys():
-                data[key] = self.data[key]
-        self.data = data
+        self.data = self.data.select(self.vertex_ordered_keys)
 
         # Fix weights and indices padding
         if 'bone_weights' in self.data.keys():
-            if len(self.data['bone_weights']) < 4:
-                for i in range(len(self.data['bone_weights']), 4):
-                    self.data['bone_weights'].append({
-                        'unknown0x00': '0', 
-                        'resource_name': '', 
-                        'vertex_usage': 'VTXUSAGE_BONE_WEIGHTS', 
-                        'index': i, 
-                        'vertex_format': 'f',
-                        'data': [(0.0,)] * len(self.data['bone_weights'][0]['data']),
-                        'unmapped': True
-                    })
-                    self.data['bone_indices'].append({
-                        'unknown0x00': '0', 
-                        'resource_name': '',
-                        'vertex_usage': 'VTXUSAGE_BONE_INDICES', 
-                        'index': i, 
-                        'vertex_format': 'L',
-                        'data': [(0,)] * len(self.data['bone_indices'][0]['data']),
-                        'unmapped': True
-                    })
+            vertex_count = len(self.data['bone_weights'][0]['data'])
+            for i in range(len(self.data['bone_weights']), 4):
+                self.data.add_layer('bone_weights', np.zeros(vertex_count, dtype=np.float32),
+                    unknown0x00='0', resource_name='', vertex_usage='VTXUSAGE_BONE_WEIGHTS',
+                    index=i, vertex_format='f', unmapped=True)
+                self.data.add_layer('bone_indices', np.zeros(vertex_count, dtype=np.uint32),
+                    unknown0x00='0', resource_name='', vertex_usage='VTXUSAGE_BONE_INDICES',
+                    index=i, vertex_format='L', unmapped=True)
 
         # Calculate stride
         stride = 0
@@ -226,6 +212,10 @@ class VBUF:
             for decl in decl_list:
                 decl['stride'] = stride
 
+        # Compute the interleaved layout first
+        layout = []
+        current_offset = 0
+        ioram_size = 0
         for key, decl_list in self.data.items():
             index = 0
 
@@ -234,13 +224,8 @@ class VBUF:
                     vertex_usage = ut.search_index_dict(self.vertex_usage, decl['vertex_usage'])
                 except Exception:
                     vertex_usage = int(decl['vertex_usage'])
-                try:
-                    vertex_usages[vertex_usage] += 1
-                except Exception:
-                    vertex_usages[vertex_usage] = 0
-                
+
                 format = decl['vertex_format']
-                data_type = 'float' if 'f' in format else 'int'
                 chunk_size = len(format) * self.format_size[format[0]]
                 vertex_format = self.vertex_format_mapping[key]
                 stride = decl['stride']
@@ -250,40 +235,49 @@ class VBUF:
                         offset = highest_offset
                     else:
                         offset = previous_offset
-                    ioram_stream.seek(offset)
+                    current_offset = offset
                     total_chunk_size = 0
                 else:
-                    ioram_stream.seek(offset + total_chunk_size)
+                    current_offset = offset + total_chunk_size
                 if 'unmapped' not in decl:
                     self.vertex_decl.append((int(decl['unknown0x00']), decl['resource_name'], vertex_usage, \
-                        index, vertex_format, stride, ioram_stream.tell()))
-
-                i = 0
-                for data in decl['data']:
-                    vertex = (eval(data_type)(x) for x in data)
-                    vertex = struct.pack(f">{format}", *vertex)
-                    ioram_stream.write(vertex)
-                    if i < len(decl['data']) - 1:
-                        nextOffset = stride - chunk_size
-                        ioram_stream.seek(nextOffset, os.SEEK_CUR)
-                    i += 1
+                        index, vertex_format, stride, current_offset))
+                layout.append((decl, current_offset))
+
+                if len(decl['data']) > 0:
+                    current_offset += (stride * (len(decl['data']) - 1)) + chunk_size
+                    ioram_size = max(ioram_size, current_offset)
 
                 total_chunk_size += chunk_size
                 previous_stride = stride
                 previous_usage = vertex_usage
-                previous_offset = ioram_stream.tell()
+                previous_offset = current_offset
                 if previous_offset > highest_offset:
                     highest_offset = ut.add_padding(previous_offset + (stride - total_chunk_size))
                 index += 1
 
-        if cm.selected_game in ['dbut', 'dbzb']:
-            self.ioram_index_offset = ioram_stream.tell()
-            for idx in self.face_indices:
-                idx = struct.pack(f">h", idx)
-                ioram_stream.write(idx)
-
-        ioram_stream.seek(0)
-        self.ioram_data = ioram_stream.read()
+        if self.context.game in ['dbut', 'dbzb']:
+            self.ioram_index_offset = current_offset
+            face_indices = np.asarray(self.face_indices, dtype='>i2')
+            ioram_size = max(ioram_size, current_offset + face_indices.nbytes)
+        ioram_data = bytearray(ioram_size)
+
+        # Fill every declaration with one strided assignment
+        for decl, offset in layout:
+            format = decl['vertex_format']
+            dtype = np.dtype(self.format_dtype[format[0]])
+            vertex_count = len(decl['data'])
+            if vertex_count == 0:
+                continue
+            data = decl['data'].reshape(vertex_count, -1)
+            view = np.ndarray((vertex_count, len(format)), dtype=dtype, buffer=ioram_data, \
+                offset=offset, strides=(decl['stride'], dtype.itemsize))
+            view[:] = data
+
+        if self.context.game in ['dbut', 'dbzb']:
+            ioram_data[current_offset:current_offset + face_indices.nbytes] = face_indices.tobytes()
+
+        self.ioram_data = bytes(ioram_data)
         self.ioram_data_size = len(self.ioram_data)
 
     def retrieve_decl_data(self):
@@ -305,14 +299,15 @@ class VBUF:
                     positions_data_idx = i
 
                 format = self.vertex_format[vertex_format]
-                chunk_size = len(format) * self.format_size[format[0]]
-                data = []
+                dtype = np.dtype(self.format_dtype[format[0]])
+                chunk_size = len(format) * dtype.itemsize
 
-                for i in range(self.vertex_count):
-                    current_offset = offset + (stride * i)
-                    chunk = self.ioram_data[current_offset:current_offset + chunk_size]
-                    data.append(struct.unpack(f">{format}", chunk))
-                current_offset += chunk_size
+                # Strided view over the interleaved vertex stream
+                data = np.ndarray((self.vertex_count, len(format)), dtype=dtype, \
+                    buffer=self.ioram_data, offset=offset, strides=(stride, dtype.itemsize))
+                data = data.astype(dtype.newbyteorder('='))
+                if self.vertex_count > 0:
+                    current_offset = offset + (stride * (self.vertex_count - 1)) + chunk_size
 
                 data = {
                     'unknown0x00': unknown0x00, 
@@ -338,14 +333,9 @@ class VBUF:
                 print(e)
                 pass
 
-        if cm.selected_game in ['dbut', 'dbzb']:
-            face_indices = []
-
-            for i in range(self.index_count):
-                face_indices.append(
-                    struct.unpack('>h', self.ioram_data[current_offset:current_offset + 2])[0]
-                )
-                current_offset += 2
+        if self.context.game in ['dbut', 'dbzb']:
+            face_indices = np.frombuffer(self.ioram_data, dtype='>i2', \
+                count=self.index_count, offset=current_offset).astype(np.int16)
 
             if (positions_data_idx != -1):
                self.face_indices = face_indices
@@ -353,7 +343,7 @@ class VBUF:
         return decl_data
 
     def handle_data(self, decl_data):
-        self.data = {}
+        self.data = MeshBuffers()
         
         for decl in decl_data:
             try:
@@ -361,13 +351,12 @@ class VBUF:
                     ut.search_index_dict(self.vertex_usage, decl['vertex_usage'])
             except Exception:
                 vertex_usage = 'others'
-            try:
-                self.data[self.vertex_usage_mapping[vertex_usage]].append(decl)
-            except Exception:
-                try:
-                    self.data[self.vertex_usage_mapping[vertex_usage]] = [decl]
-                except Exception:
-                    self.data[vertex_usage] = [decl]
+            key = self.vertex_usage_mapping.get(vertex_usage, vertex_usage)
+            data = decl.pop('data')
+            self.data.add_layer(key, data, **decl)
+
+        if self.context.game in ['dbut', 'dbzb']:
+            self.data.face_indices = getattr(self, 'face_indices', None)
 
     def get_data(self):
         decl_data = self.retrieve_decl_data()
@@ -1,44 +1,40 @@
 import os, sys
 from PyQt5.QtCore import QSettings
 from PyQt5 import QtCore
+from core.constants import *
 
 settings = QSettings("settings.ini", QSettings.IniFormat)
 app_path = os.path.dirname(os.path.realpath(sys.argv[0]))
 run_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-temp_path = os.path.join(run_path, 'temp')
-
-class_map = {
-    b'SPR3': b'SPRP'
-}
-
-ext_map = {
-    'SPRP': ['.spr'],
-    'STPK': ['.pak', '.stpk'],
-    'STPZ': ['.zpak', '.stpz']
-}
-
-games = {
-    'dbrb': 'DragonBall Raging Blast',
-    'dbrb2': 'DragonBall Raging Blast 2',
-    'dbut': 'DragonBall Z Ultimate Tenkaichi',
-    'dbzb': 'DragonBall Zenkai Battle Royale'
-}
-
-platforms = {
-    'ps3' : 'PS3',
-    'x360' : 'XBOX 360'
-}
 
 selected_game = settings.value("Game")
-selected_game = 'dbrb2' if (selected_game == None) else selected_game
+selected_game = default_game if (selected_game == None) else selected_game
 selected_platform = settings.value("Platform")
-selected_platform = 'ps3' if (selected_platform == None) else selected_platform
+selected_platform = default_platform if (selected_platform == None) else selected_platform
 
 use_blender = settings.value("Blender")
 use_blender = eval(use_blender.title()) if (use_blender != None) else False
 use_debug_mode = settings.value("Debug")
 use_debug_mode = eval(use_debug_mode.title()) if (use_debug_mode != None) else False
 
+# Exported folders are cached, keyed by input files content and settings (opt-in)
+use_cache = settings.value("Cache")
+use_cache = eval(use_cache.title()) if (use_cache != None) else False
+cache_path = settings.value("CachePath")
+cache_path = os.path.join(app_path, 'cache') if (cache_path == None) else cache_path
+cache_size = settings.value("CacheSize")
+cache_size = int(cache_size) if (cache_size != None) else 2048 # MB
+# Retiled textures are cached by content (opt-in)
+use_texture_cache = settings.value("TextureCache")
+use_texture_cache = eval(use_texture_cache.title()) if (use_texture_cache != None) else False
+texture_cache_size = settings.value("TextureCacheSize")
+texture_cache_size = int(texture_cache_size) if (texture_cache_size != None) else 512 # MB
+# Encoded vram and ioram blocks of unchanged files are reused on import (opt-in)
+use_block_cache = settings.value("BlockCache")
+use_block_cache = eval(use_block_cache.title()) if (use_block_cache != None) else False
+block_cache_size = settings.value("BlockCacheSize")
+block_cache_size = int(block_cache_size) if (block_cache_size != None) else 1024 # MB
+
 stylesheet_path = os.path.join('ui', 'resources', 'app.qss')
 if (not os.path.exists(stylesheet_path)):
     stylesheet_path = os.path.join(run_path, 'ui', 'resources', 'app.qss')
@@ -0,0 +1,254 @@
+import struct
+import numpy as np
+from io import BytesIO
+from numpy.lib.stride_tricks import sliding_window_view
+
+# STPZ files are made of a 16 bytes header (STPK header with the STPZ tag),
+# followed by a DCS block holding LCS chunks of LZ compressed data.
+# Each chunk is decompressed on its own, matches never cross chunks.
+chunk_size = 0x3c00
+min_match = 3
+max_length = 127
+max_distance = 255
+# Chunks compressed together, bigger batches use more memory
+batch_chunks = 16
+
+def get_endian(data, offset):
+    tag = data[offset:offset + 4]
+    if tag == b'0DCS':
+        return '<'
+    elif tag == b'SCD0':
+        return '>'
+    raise Exception("Not a STPZ file")
+
+def decompress_chunk(data, size):
+    output = bytearray()
+    pos = 0
+    while (len(output) < size) and (pos < len(data)):
+        token = data[pos]
+        length = token >> 1
+        if token & 1:
+            distance = data[pos + 1]
+            pos += 2
+            start = len(output) - distance
+            if distance >= length:
+                output.extend(output[start:start + length])
+            else:
+                # Overlapping copy, repeat the pattern
+                pattern = output[start:]
+                output.extend((pattern * (length // distance + 1))[:length])
+        else:
+            output.extend(data[pos + 1:pos + 1 + length])
+            pos += 1 + length
+    return output
+
+def decompress(data):
+    endian = get_endian(data, 16)
+    dcs_offset = 16
+    size, dcs_size, unknown = struct.unpack(f"{endian}III", data[dcs_offset + 4:dcs_offset + 16])
+
+    output = bytearray()
+    pos = 16
+    while pos < dcs_size:
+        lcs_offset = dcs_offset + pos
+        lcs_size, lcs_total_size = \
+            struct.unpack(f"{endian}II", data[lcs_offset + 4:lcs_offset + 12])
+        output.extend(decompress_chunk(
+            data[lcs_offset + 16:lcs_offset + lcs_total_size], lcs_size
+        ))
+        pos += lcs_total_size
+
+    if len(output) != size:
+        raise Exception("Invalid STPZ data")
+    return bytes(output)
+
+def get_distance_masks(array):
+    """
+    Returns, for every position, the distances of the previous equal bytes in its chunk as
+    256 bits numbers made of 4 words, most significant first (bit d for distance d)
+    """
+    size = len(array)
+    padded = np.concatenate([np.zeros(max_distance, dtype=np.uint8), array])
+    windows = sliding_window_view(padded, max_distance + 1)
+    masks = np.packbits(windows == array[:, None], axis=1).view('>u8').astype(np.uint64)
+    masks[:, 3] &= ~np.uint64(1)
+
+    # Bytes before the chunk start are left out
+    offsets = np.arange(size) % chunk_size
+    starts = np.flatnonzero(offsets < max_distance)
+    for word in range(4):
+        count = np.clip(offsets[starts] + 1 - 64 * (3 - word), 0, 64).astype(np.uint64)
+        masks[starts, word] &= np.where(count == 64, ~np.uint64(0),
+            (np.uint64(1) << (count & np.uint64(63))) - np.uint64(1))
+    return masks
+
+def get_lowest_bits(masks):
+    """Returns the index of the lowest bit set in every 256 bits number"""
+    lowest = np.zeros(len(masks), dtype=np.int64)
+    # Lower words come last, overwriting higher bits
+    for word in range(4):
+        values = masks[:, word]
+        found = np.flatnonzero(values)
+        bits = values[found] & (~values[found] + np.uint64(1))
+        lowest[found] = np.log2(bits.astype(np.float64)).astype(np.int64) + 64 * (3 - word)
+    return lowest
+
+def find_matches(data):
+    """
+    Returns the longest match length and its distance for every position of data,
+    made of chunks of chunk_size. Nearest matches are kept when lengths are equal
+    """
+    size = len(data)
+    array = np.frombuffer(data, dtype=np.uint8)
+    best_length = np.zeros(size, dtype=np.int64)
+    best_distance = np.zeros(size, dtype=np.int64)
+    if size < min_match:
+        return best_length, best_distance
+
+    # Distances matching 1, 2, 4 ... 64 bytes from every position
+    masks = [get_distance_masks(array)]
+    step = 1
+    while step < 64:
+        mask = np.zeros_like(masks[-1])
+        if step < size:
+            np.bitwise_and(masks[-1][:size - step], masks[-1][step:], out=mask[:size - step])
+        masks.append(mask)
+        step *= 2
+    # Read as single 32 bytes items, faster to gather than rows of words
+    items = [mask.view('V32').ravel() for mask in masks]
+    positions = np.arange(size)
+    limits = np.minimum(np.minimum((positions // chunk_size + 1) * chunk_size, size) - positions,
+        max_length)
+
+    # Distances matching the first bytes, then the longest match is found by adding
+    # the biggest lengths still matching
+    current = masks[1][:size - 2] & masks[0][2:]
+    positions = np.flatnonzero(((current[:, 0] | current[:, 1] | current[:, 2] | current[:, 3]) != 0) \
+        & (limits[:size - 2] >= min_match))
+    current = current[positions]
+    limits = limits[positions]
+    lengths = np.full(len(positions), min_match, dtype=np.int64)
+    for level in range(len(masks) - 1, -1, -1):
+        step = 1 << level
+        following = items[level].take(np.minimum(positions + lengths, size - 1))
+        following = following.view(np.uint64).reshape(-1, 4)
+        following &= current
+        found = ((following[:, 0] | following[:, 1] | following[:, 2] | following[:, 3]) != 0) \
+            & (lengths + step <= limits)
+        np.copyto(current, following, where=found[:, None])
+        lengths += step * found
+
+    best_length[positions] = lengths
+    best_distance[positions] = get_lowest_bits(current)
+    return best_length, best_distance
+
+def compress_chunks(data):
+    """
+    Returns the compressed data of every chunk of data
+    """
+    size = len(data)
+    best_length, best_distance = find_matches(data)
+
+    # Greedy parsing: the next match after the end of each match
+    next_match = np.full(size + 1, size, dtype=np.int64)
+    match_positions = np.flatnonzero(best_length >= min_match)
+    next_match[:-1][match_positions] = match_positions
+    next_match = np.minimum.accumulate(next_match[::-1])[::-1]
+    jumps = np.full(size + 1, size, dtype=np.int64)
+    jumps[match_positions] = next_match[match_positions + best_length[match_positions]]
+
+    # Matches followed from the start, doubling the followed count on each pass
+    matches = np.array([next_match[0]], dtype=np.int64)
+    while matches[-1] != size:
+        matches = np.concatenate([matches, jumps[matches]])
+        jumps = jumps[jumps]
+    matches = matches[matches < size]
+
+    # Output size of every position: 2 bytes for matches, 1 for literals,
+    # plus 1 before every 127 literals of a run
+    lengths = best_length[matches]
+    covered = np.zeros(size + 1, dtype=np.int64)
+    np.add.at(covered, matches, 1)
+    np.add.at(covered, matches + lengths, -1)
+    literal_positions = np.flatnonzero(np.cumsum(covered[:-1]) == 0)
+    starts = np.ones(len(literal_positions), dtype=bool)
+    if len(literal_positions) > 0:
+        starts[1:] = (np.diff(literal_positions) != 1) | (literal_positions[1:] % chunk_size == 0)
+    run_starts = np.flatnonzero(starts)
+    run_sizes = np.diff(np.append(run_starts, len(literal_positions)))
+    run_index = np.arange(len(literal_positions)) - np.repeat(run_starts, run_sizes)
+    piece_starts = run_index % max_length == 0
+    piece_lengths = np.minimum(np.repeat(run_sizes, run_sizes) - run_index, max_length)[piece_starts]
+
+    output_sizes = np.zeros(size, dtype=np.int64)
+    output_sizes[matches] = 2
+    output_sizes[literal_positions] = 1 + piece_starts
+    offsets = np.concatenate([[0], np.cumsum(output_sizes)])
+
+    output = np.zeros(offsets[-1], dtype=np.uint8)
+    output[offsets[matches]] = (lengths << 1) | 1
+    output[offsets[matches] + 1] = best_distance[matches]
+    literal_offsets = offsets[literal_positions] + piece_starts
+    output[literal_offsets[piece_starts] - 1] = piece_lengths << 1
+    output[literal_offsets] = np.frombuffer(data, dtype=np.uint8)[literal_positions]
+
+    chunk_offsets = offsets[list(range(0, size, chunk_size)) + [size]]
+    return [output[chunk_offsets[i]:chunk_offsets[i + 1]].tobytes() \
+        for i in range(len(chunk_offsets) - 1)]
+
+class Compressor:
+    """
+    Writable compressing data as it is written to stream, batch_chunks chunks at a time.
+    Chunks are written as soon as they are compressed, the headers are filled in by finish
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.start_offset = stream.tell()
+        self.header = bytearray()
+        self.pending = bytearray()
+        self.size = 0
+        self.chunks_size = 0
+        # STPZ and DCS headers, written once sizes are known
+        stream.write(bytes(32))
+
+    def write(self, data):
+        if len(self.header) < 16:
+            self.header.extend(bytes(data[:16 - len(self.header)]))
+        self.pending.extend(data)
+        self.size += len(data)
+
+        batch_size = chunk_size * batch_chunks
+        pos = 0
+        while len(self.pending) - pos >= batch_size:
+            self.write_chunks(self.pending[pos:pos + batch_size])
+            pos += batch_size
+        del self.pending[:pos]
+        return len(data)
+
+    def write_chunks(self, data):
+        for offset, compressed in zip(range(0, len(data), chunk_size), compress_chunks(bytes(data))):
+            self.stream.write(b'0LCS')
+            self.stream.write(struct.pack("<III", min(len(data) - offset, chunk_size),
+                len(compressed) + 16, 0))
+            self.stream.write(compressed)
+            self.chunks_size += len(compressed) + 16
+
+    def finish(self):
+        if len(self.pending) > 0:
+            self.write_chunks(self.pending)
+            self.pending = bytearray()
+
+        end_offset = self.stream.tell()
+        self.stream.seek(self.start_offset)
+        self.stream.write(b'STPZ')
+        self.stream.write(bytes(self.header[4:16]).ljust(12, b'\0'))
+        self.stream.write(b'0DCS')
+        self.stream.write(struct.pack("<III", self.size, self.chunks_size + 16, chunk_size))
+        self.stream.seek(end_offset)
+
+def compress(data):
+    stream = BytesIO()
+    compressor = Compressor(stream)
+    compressor.write(data)
+    compressor.finish()
+    return stream.getvalue()
@@ -0,0 +1,26 @@
+# Formats, games and platforms known by the converters, shared by the app and the batch command
+
+class_map = {
+    b'SPR3': b'SPRP'
+}
+
+ext_map = {
+    'SPRP': ['.spr'],
+    'STPK': ['.pak', '.stpk'],
+    'STPZ': ['.zpak', '.stpz']
+}
+
+games = {
+    'dbrb': 'DragonBall Raging Blast',
+    'dbrb2': 'DragonBall Raging Blast 2',
+    'dbut': 'DragonBall Z Ultimate Tenkaichi',
+    'dbzb': 'DragonBall Zenkai Battle Royale'
+}
+
+platforms = {
+    'ps3' : 'PS3',
+    'x360' : 'XBOX 360'
+}
+
+default_game = 'dbrb2'
+default_platform = 'ps3'
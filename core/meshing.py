@@ -0,0 +1,101 @@
+import numpy as np
+import core.tristrip as tristrip
+from core.MeshBuffers import MeshBuffers
+
+# Mesh processing done once the FBX SDK data is read: bone blends, vertex merging and
+# triangle strips. Only plain data (lists and arrays) goes in and out, so that meshes
+# can be processed in worker processes.
+buffer_keys = ['positions', 'normals', 'binormals', 'uvs', 'bone_weights', 'bone_indices']
+
+def get_blend_layers(blend_by_vertex, nb_bone_layer):
+    """Returns bone indices and weights of every control point, bigger weights first"""
+    blend_indices = np.zeros((len(blend_by_vertex), nb_bone_layer), dtype=np.int64)
+    blend_weights = np.zeros((len(blend_by_vertex), nb_bone_layer), dtype=np.float64)
+    for i in range(len(blend_by_vertex)):
+        blends = blend_by_vertex[i]
+        # Apparently we have to order by weight (bigger first), and for the same weight, order by index
+        # Cheating by order by index first
+        blends.sort(key=lambda x: x[0])
+        # Order rewritten by weight (but index's order will be correct for same weight)
+        blends.sort(key=lambda x: x[1], reverse=True)
+
+        # Fill if not defined to always have nb_bone_layer values
+        for j in range(min(nb_bone_layer, len(blends))):
+            blend_indices[i][j] = blends[j][0]
+            blend_weights[i][j] = blends[j][1]
+    return blend_indices, blend_weights
+
+def build_mesh_data(mesh, game, debug = None):
+    """
+    Builds the vertex buffers of a mesh read by FBX.read_mesh_data.
+    debug is called with the buffers and faces of every step when provided
+    """
+    name = mesh['name']
+    control_point_indices = mesh['control_point_indices']
+    nb_bone_layer = mesh['nb_bone_layer']
+    blend_indices, blend_weights = get_blend_layers(mesh['blend_by_vertex'], nb_bone_layer)
+
+    # Per polygon vertex values, identical ones are merged (first appearance order)
+    corners = MeshBuffers()
+    corners.add_layer('positions', mesh['positions'][control_point_indices], np.float32)
+    for key, data, info in mesh['layers']:
+        corners.add_layer(key, data, np.float32, **info)
+    for j in range(nb_bone_layer):
+        corners.add_layer('bone_indices', blend_indices[control_point_indices, j], np.uint32)
+        corners.add_layer('bone_weights', blend_weights[control_point_indices, j], np.float32)
+
+    if mesh['faces_triangles'] == None:
+        buffers, redirection = corners.unique()
+        faces_triangles = redirection.reshape(-1, 3).tolist()
+    else:
+        buffers = corners
+        faces_triangles = mesh['faces_triangles']
+
+    if debug != None:
+        debug("10_ImportedFromFbx", name.replace(":", "_"), buffers, faces_triangles)
+
+    # TODO maybe add a part to optimize the vertex and face before making triangle strip (depend of optimisation of 3dsmax / blender)
+
+    # ------------------------------------------------
+    # Transform Triangle list -> Triangle Strip
+    # ------------------------------------------------
+
+    # Generating the strip indices then build the strip
+    strip_indices = tristrip.stripify(faces_triangles)
+
+    if debug != None:
+        new_faces_triangles = []
+        for i in range(0, len(strip_indices), 3):
+            new_faces_triangles.append(
+                [strip_indices[i],
+                 strip_indices[((i + 1) if (i + 1 < len(strip_indices)) else (len(strip_indices) - 1))],
+                 strip_indices[((i + 2) if (i + 2 < len(strip_indices)) else (len(strip_indices) - 1))]]
+            )
+        faces_triangles = new_faces_triangles
+        debug("11_MakingTriangleStrip", name.replace(":", "_"), buffers, faces_triangles)
+
+    # -------------------------------------------------------------------------------------------------------------
+    # Apply Triangle Strip  on Vertex (Game's logic  / bad logic : they don't have faceIndex, but duplicate Vertex)
+    # RB uses duplicate vertices while UT uses face indices
+    # -------------------------------------------------------------------------------------------------------------
+
+    if game in ['dbrb', 'dbrb2']:
+        buffers = buffers.take(strip_indices)
+
+        if debug != None:
+            new_faces_triangles = []
+            for i in range(buffers.get_vertex_count() - 2):
+                # Triangle strips logic
+                if (i % 2 == 0):
+                    new_faces_triangles.append([i, i + 1, i + 2])
+                else:
+                    new_faces_triangles.append([i, i + 2, i + 1])
+
+            faces_triangles = new_faces_triangles
+            debug("12_TriangleStripOnVertex", name.replace(":", "_"), buffers, faces_triangles)
+
+    buffers = buffers.select(buffer_keys)
+    if game in ['dbut', 'dbzb']:
+        buffers.face_indices = strip_indices
+
+    return buffers
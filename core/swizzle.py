@@ -1,100 +1,189 @@
+import numpy as np
+import core.utils as ut
+
 # Credits to Banz99
 class XBOX:
-    def XG_address_2D_tiled(axis, offset, width, texel_pitch):
+    # Tiled block coordinates keyed by (block_width, block_height, texel_pitch)
+    tile_cache = {}
+    # Mip chain block maps keyed by (width, height, mipmap_count, texel_pitch)
+    chain_cache = {}
+
+    def get_log_bpp(texel_pitch):
+        return (texel_pitch >> 2) + ((texel_pitch >> 1) >> (texel_pitch >> 2))
+
+    def XG_address_2D_tiled_x(offset, width, texel_pitch):
         aligned_width = (width + 31) & ~31
 
-        log_bpp = (texel_pitch >> 2) + ((texel_pitch >> 1) >> (texel_pitch >> 2))
+        log_bpp = XBOX.get_log_bpp(texel_pitch)
         offset_b = offset << log_bpp
         offset_t = ((offset_b & ~4095) >> 3) + ((offset_b & 1792) >> 2) + (offset_b & 63)
         offset_m = offset_t >> (7 + log_bpp)
 
-        if axis == 'x':
-            macro_x = ((offset_m % (aligned_width >> 5)) << 2)
-            tile = ((((offset_t >> (5 + log_bpp)) & 2) + (offset_b >> 6)) & 3)
-            macro = (macro_x + tile) << 3
-            micro = ((((offset_t >> 1) & ~15) + (offset_t & 15)) & 
-                ((texel_pitch << 3) - 1)) >> log_bpp
-            
-            return macro + micro
-        elif axis == 'y':
-            macro_y = (int(offset_m / (aligned_width >> 5)) << 2)
-            tile = ((offset_t >> (6 + log_bpp)) & 1) + (((offset_b & 2048) >> 10))
-            macro = (macro_y + tile) << 3
-            micro = ((((offset_t & (((texel_pitch << 6) - 1) & ~31)) + 
-                ((offset_t & 15) << 1)) >> (3 + log_bpp)) & ~1)
-            
-            return macro + micro + ((offset_t & 16) >> 4)
-
-    def convert_linear_texture(data, direction, height, width, texture_type):
+        macro_x = ((offset_m % (aligned_width >> 5)) << 2)
+        tile = ((((offset_t >> (5 + log_bpp)) & 2) + (offset_b >> 6)) & 3)
+        macro = (macro_x + tile) << 3
+        micro = ((((offset_t >> 1) & ~15) + (offset_t & 15)) & 
+            ((texel_pitch << 3) - 1)) >> log_bpp
+
+        return macro + micro
+
+    def XG_address_2D_tiled_y(offset, width, texel_pitch):
+        aligned_width = (width + 31) & ~31
+
+        log_bpp = XBOX.get_log_bpp(texel_pitch)
+        offset_b = offset << log_bpp
+        offset_t = ((offset_b & ~4095) >> 3) + ((offset_b & 1792) >> 2) + (offset_b & 63)
+        offset_m = offset_t >> (7 + log_bpp)
+
+        macro_y = ((offset_m // (aligned_width >> 5)) << 2)
+        tile = ((offset_t >> (6 + log_bpp)) & 1) + (((offset_b & 2048) >> 10))
+        macro = (macro_y + tile) << 3
+        micro = ((((offset_t & (((texel_pitch << 6) - 1) & ~31)) + 
+            ((offset_t & 15) << 1)) >> (3 + log_bpp)) & ~1)
+
+        return macro + micro + ((offset_t & 16) >> 4)
+
+    def get_texel_pitch(texture_type):
         if texture_type == 'DXT1':
-            block_size = 4
-            texel_pitch = 8
+            return 8
         elif texture_type in ['DXT3', 'DXT5', 'ATI2']:
-            block_size = 4
-            texel_pitch = 16
-        else:
-            raise Exception('Unknown DXT type')
+            return 16
+        raise Exception('Unknown DXT type')
 
-        block_width = int(width / block_size)
-        block_height = int(height / block_size)
+    def get_tile_coords(block_width, block_height, texel_pitch):
+        """Returns the x/y block coordinates of every tiled block of a 32x32 aligned surface"""
+        key = (block_width, block_height, texel_pitch)
+        if key not in XBOX.tile_cache:
+            aligned_width = (block_width + 31) & ~31
+            aligned_height = (block_height + 31) & ~31
+            block_offset = np.arange(aligned_width * aligned_height, dtype=np.int64)
+            x = XBOX.XG_address_2D_tiled_x(block_offset, block_width, texel_pitch)
+            y = XBOX.XG_address_2D_tiled_y(block_offset, block_width, texel_pitch)
+            XBOX.tile_cache[key] = (x, y)
+        return XBOX.tile_cache[key]
 
-        new_data = bytearray(len(data))
-        for j in range(block_height):
-            for i in range(block_width):
-                block_offset = j * block_width + i
+    def get_packed_mip_offset(width, height, mip, packed_mip_base):
+        """Returns the texel offset of a mip level inside the packed mip tail"""
+        log2_width = int(width - 1).bit_length()
+        log2_height = int(height - 1).bit_length()
+        packed_mip = mip - packed_mip_base
 
-                x = XBOX.XG_address_2D_tiled('x', block_offset, block_width, texel_pitch)
-                y = XBOX.XG_address_2D_tiled('y', block_offset, block_width, texel_pitch)
+        if packed_mip < 3:
+            if log2_width > log2_height:
+                return 0, 16 >> packed_mip
+            return 16 >> packed_mip, 0
+        if log2_width > log2_height:
+            return (1 << (log2_width - packed_mip_base)) >> (packed_mip - 2), 0
+        return 0, (1 << (log2_height - packed_mip_base)) >> (packed_mip - 2)
 
-                src_offset = j * block_width * texel_pitch + i * texel_pitch
-                dest_offset = y * block_width * texel_pitch + x * texel_pitch
+    def get_chain_map(width, height, mipmap_count, texel_pitch):
+        """
+        Maps every block of a linear mip chain to its position in the tiled chain.
+        Each level is stored 32x32 blocks aligned, levels having a side of
+        16 texels or less are packed together in a single mip tail surface.
+        """
+        key = (width, height, mipmap_count, texel_pitch)
+        if key in XBOX.chain_cache:
+            return XBOX.chain_cache[key]
 
-                if dest_offset < len(data):
-                    if direction == 'to':
-                        new_data[dest_offset:dest_offset + texel_pitch] = \
-                            data[src_offset:src_offset + texel_pitch]
-                    elif direction == 'from':
-                        new_data[src_offset:src_offset + texel_pitch] = \
-                            data[dest_offset:dest_offset + texel_pitch]
-        
-        return new_data
+        log2_size = min(int(width - 1).bit_length(), int(height - 1).bit_length())
+        packed_mip_base = max(log2_size - 4, 0)
 
-    def handle_data(data, width, height, texture_type, action):
-        direction = 'from' if (action == 'swizzle') else 'to'
-        data = XBOX.convert_linear_texture(data, direction, height, width, texture_type)
+        tiled_indices = []
+        linear_indices = []
+        levels = []
+        tiled_offset = 0
+        linear_offset = 0
+        for mip in range(mipmap_count):
+            block_width = max(((width >> mip) + 3) // 4, 1)
+            block_height = max(((height >> mip) + 3) // 4, 1)
+
+            if mip <= packed_mip_base:
+                # Standalone surface, or the one holding the whole mip tail
+                x, y = XBOX.get_tile_coords(block_width, block_height, texel_pitch)
+                surface_offset = tiled_offset
+                tiled_offset += len(x)
+            if mip < packed_mip_base:
+                offset_x, offset_y = 0, 0
+            else:
+                offset_x, offset_y = XBOX.get_packed_mip_offset(width, height, mip, packed_mip_base)
+                offset_x //= 4
+                offset_y //= 4
 
-        for i in range (0, len(data) - 4, 4):           
-            # Swapping bytes
-            a = data[i]
-            data[i] = data[i + 1]
-            data[i + 1] = a
+            local_x = x - offset_x
+            local_y = y - offset_y
+            mask = (local_x >= 0) & (local_x < block_width) & \
+                (local_y >= 0) & (local_y < block_height)
+            tiled_indices.append(surface_offset + np.flatnonzero(mask))
+            linear_indices.append(linear_offset + local_y[mask] * block_width + local_x[mask])
+            linear_offset += block_width * block_height
+            levels.append((tiled_offset, linear_offset))
 
-            a = data[i + 2]
-            data[i + 2] = data[i + 3]
-            data[i + 3] = a
+        chain_map = (
+            np.concatenate(tiled_indices),
+            np.concatenate(linear_indices),
+            levels
+        )
+        XBOX.chain_cache[key] = chain_map
+        return chain_map
+
+    def get_surface_map(block_width, block_height, texel_pitch):
+        """
+        Maps the blocks of a single level stored in a surface of its own size, without
+        the 32x32 blocks alignment nor mip tail
+        """
+        block_count = block_width * block_height
+        x, y = XBOX.get_tile_coords(block_width, block_height, texel_pitch)
+        return np.arange(block_count, dtype=np.int64), y[:block_count] * block_width + x[:block_count]
+
+    def has_packed_chain(width, height, mipmap_count, texel_pitch, block_count, action):
+        """
+        Textures with mips are stored as a packed mip chain, single level ones are only
+        when their data covers the whole aligned surface
+        """
+        if mipmap_count > 1:
+            return True
+        if action == 'swizzle':
+            return False
+        block_width = max((width + 3) // 4, 1)
+        block_height = max((height + 3) // 4, 1)
+        x, y = XBOX.get_tile_coords(block_width, block_height, texel_pitch)
+        return block_count >= len(x)
 
-        return data
-    
     def process(data, width, height, mipmap_count, texture_type, action = 'unswizzle'):
-        new_data = bytearray()
-        current_width = width
-        current_height = height
-        current_mipmap_count = mipmap_count
-
-        while (current_mipmap_count > 0):
-            if (action == 'unswizzle') and (current_width <= 64) and (current_height <= 64):
-                break
-            if texture_type == 'DXT1':
-                limit = len(new_data) + int(current_width * current_height / 2)
-            else:
-                limit = len(new_data) + (current_width * current_height)
-            new_data.extend(XBOX.handle_data(
-                data[len(new_data):limit], \
-                current_width, current_height, texture_type, action
-            ))
-            current_width = int(current_width / 2)
-            current_height = int(current_height / 2)
-            current_mipmap_count -= 1
-        mipmap_count -= current_mipmap_count
+        texel_pitch = XBOX.get_texel_pitch(texture_type)
+        mipmap_count = max(mipmap_count, 1)
+        block_count = len(data) // texel_pitch
+
+        if XBOX.has_packed_chain(width, height, mipmap_count, texel_pitch, block_count, action):
+            # Only keep the levels actually present in the data
+            tiled_indices, linear_indices, levels = \
+                XBOX.get_chain_map(width, height, mipmap_count, texel_pitch)
+            level_idx = 0 if (action == 'unswizzle') else 1
+            while (mipmap_count > 1) and (levels[mipmap_count - 1][level_idx] > block_count):
+                mipmap_count -= 1
+            tiled_indices, linear_indices, levels = \
+                XBOX.get_chain_map(width, height, mipmap_count, texel_pitch)
+            tiled_size, linear_size = levels[-1]
+        else:
+            # Data size is kept as is
+            tiled_indices, linear_indices = XBOX.get_surface_map(
+                max((width + 3) // 4, 1), max((height + 3) // 4, 1), texel_pitch)
+            tiled_size, linear_size = block_count, block_count
+
+        if action == 'unswizzle':
+            src_indices, dest_indices, dest_size = tiled_indices, linear_indices, linear_size
+        else:
+            src_indices, dest_indices, dest_size = linear_indices, tiled_indices, tiled_size
+        mask = (src_indices < block_count) & (dest_indices < dest_size)
+
+        blocks = np.frombuffer(data, dtype=np.uint8, count=block_count * texel_pitch) \
+            .reshape(block_count, texel_pitch)
+        new_data = bytearray(dest_size * texel_pitch)
+        new_blocks = np.frombuffer(new_data, dtype=np.uint8).reshape(dest_size, texel_pitch)
+        new_blocks[dest_indices[mask]] = blocks[src_indices[mask]]
+
+        # Swapping bytes of all levels at once
+        ut.swap_endianness(new_data, 2)
         
         return mipmap_count, new_data
\ No newline at end of file
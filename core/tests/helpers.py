@@ -0,0 +1,18 @@
+"""Helpers shared by the tests, imported through the package"""
+
+def get_strip_triangles(strip):
+    """Expands a triangle strip back to its triangles, without the degenerate ones"""
+    triangles = []
+    for i in range(len(strip) - 2):
+        if i % 2 == 0:
+            triangle = (strip[i], strip[i + 1], strip[i + 2])
+        else:
+            triangle = (strip[i], strip[i + 2], strip[i + 1])
+        if len(set(triangle)) == 3:
+            triangles.append(triangle)
+    return triangles
+
+def get_face_key(triangle):
+    # Same key for every rotation of a triangle, winding is kept
+    i = triangle.index(min(triangle))
+    return tuple(triangle[i:]) + tuple(triangle[:i])
@@ -0,0 +1,31 @@
+import os
+from core.Manifest import Manifest
+from core.ConversionContext import ConversionContext
+
+class Texture:
+    pass
+
+def test_blocks_disabled(tmp_path):
+    # Export caching doesn't enable block reuse
+    context = ConversionContext('dbrb', 'ps3', cache_path=str(tmp_path), use_cache=True)
+    texture_path = os.path.join(tmp_path, 'texture.dds')
+    open(texture_path, 'wb').write(b'texture')
+    manifest = Manifest(context)
+    manifest.add_texture(texture_path, b'vram', 3)
+    assert manifest.get_texture(texture_path, Texture()) == False
+    assert os.listdir(tmp_path) == ['texture.dds']
+
+def test_texture_blocks(tmp_path):
+    context = ConversionContext('dbrb', 'ps3', cache_path=str(tmp_path), use_block_cache=True)
+    texture_path = os.path.join(tmp_path, 'texture.dds')
+    open(texture_path, 'wb').write(b'texture')
+    manifest = Manifest(context)
+    manifest.add_texture(texture_path, b'vram', 3)
+
+    tx2d_object = Texture()
+    assert manifest.get_texture(texture_path, tx2d_object) == True
+    assert (tx2d_object.mipmap_count, tx2d_object.vram_data) == (3, b'vram')
+
+    # Blocks are kept per platform
+    context = ConversionContext('dbrb', 'x360', cache_path=str(tmp_path), use_block_cache=True)
+    assert Manifest(context).get_texture(texture_path, Texture()) == False
@@ -0,0 +1,58 @@
+import numpy as np
+from core.MeshBuffers import MeshBuffers
+
+def get_buffers(vertex_count, seed):
+    # Few distinct values, so that many vertices are identical
+    state = np.random.RandomState(seed)
+    buffers = MeshBuffers()
+    buffers.add_layer('positions', state.randint(0, 3, (vertex_count, 4)), np.float32)
+    buffers.add_layer('normals', state.randint(0, 2, (vertex_count, 3)) / 2, np.float32)
+    buffers.add_layer('uvs', state.randint(0, 2, (vertex_count, 2)) / 4, np.float32,
+        resource_name='map1')
+    buffers.add_layer('bone_indices', state.randint(0, 2, vertex_count), np.uint32)
+    return buffers
+
+def unique(buffers):
+    """Naive vertex merge, in first appearance order"""
+    indices = {}
+    first_index = []
+    redirection = []
+    for i in range(buffers.get_vertex_count()):
+        vertex = tuple([tuple(layer['data'][i].tolist()) for layers in buffers.values() \
+            for layer in layers])
+        if vertex not in indices:
+            indices[vertex] = len(first_index)
+            first_index.append(i)
+        redirection.append(indices[vertex])
+    return first_index, redirection
+
+def test_unique():
+    for vertex_count, seed in [(1, 0), (50, 1), (2000, 2)]:
+        buffers = get_buffers(vertex_count, seed)
+        new_buffers, redirection = buffers.unique()
+        first_index, expected_redirection = unique(buffers)
+
+        assert redirection.tolist() == expected_redirection
+        assert new_buffers.get_vertex_count() == len(first_index)
+        for key, layers in buffers.items():
+            assert new_buffers.get_info(key) == buffers.get_info(key)
+            for layer, new_layer in zip(layers, new_buffers[key]):
+                assert new_layer['data'].dtype == layer['data'].dtype
+                assert np.array_equal(new_layer['data'], layer['data'][first_index])
+
+def test_unique_empty():
+    buffers = MeshBuffers()
+    buffers.add_layer('positions', np.zeros((0, 4)), np.float32)
+    new_buffers, redirection = buffers.unique()
+    assert new_buffers.get_vertex_count() == 0
+    assert len(redirection) == 0
+
+def test_take_select():
+    buffers = get_buffers(10, 3)
+    taken = buffers.take([4, 4, 0])
+    assert np.array_equal(taken['uvs'][0]['data'], buffers['uvs'][0]['data'][[4, 4, 0]])
+    assert taken.get_info('uvs') == [{'resource_name': 'map1'}]
+
+    selected = buffers.select(['uvs', 'positions', 'binormals'])
+    assert list(selected.keys()) == ['uvs', 'positions']
+    assert selected.stack('positions').shape == (10, 4)
@@ -0,0 +1,38 @@
+import os
+from io import BytesIO
+from core.STPK import STPK
+from core.ConversionContext import ConversionContext
+
+# Paks written by the seeking writer the sequential one replaced
+data_path = os.path.join(os.path.dirname(__file__), 'data')
+
+def get_data(size):
+    return bytes([(i * 7 + 3) & 0xFF for i in range(size)])
+
+def read_fixture(name):
+    stream = open(os.path.join(data_path, name), 'rb')
+    data = stream.read()
+    stream.close()
+    return data
+
+def write(stpk_object):
+    stream = BytesIO()
+    stpk_object.write(stream)
+    return stream.getvalue()
+
+def test_empty_last_entry():
+    for platform in ['ps3', 'x360']:
+        context = ConversionContext('dbrb', platform)
+        stpk_object = STPK(b'', 0, True, context=context)
+        stpk_object.add_entry('model.spr', get_data(5000))
+        stpk_object.add_entry('empty.bin', b'')
+        assert write(stpk_object) == read_fixture(f"empty_last_{platform}.pak")
+
+def test_nested_pak():
+    for platform in ['ps3', 'x360']:
+        context = ConversionContext('dbrb', platform)
+        stpk_object = STPK(b'', 0, True, context=context)
+        stpk_object.add_entry('model.ioram', get_data(1000))
+        outer_stpk_object = STPK(b'', 0, True, context=context)
+        outer_stpk_object.add_entry('model_i.pak', stpk_object)
+        assert write(outer_stpk_object) == read_fixture(f"nested_{platform}.pak")
@@ -0,0 +1,68 @@
+import os
+from io import BytesIO
+from core.StringTable import StringTable
+
+def read_table(data, first_offset = 0, padding = 1):
+    """Previous implementation: names split on NUL bytes, offsets generated from their sizes"""
+    string_list = [x for x in data.split(b'\x00') if x != b'']
+    offsets = []
+    offset = first_offset
+    for string in string_list:
+        offsets.append(offset)
+        offset += len(string) + (padding - (len(string) % padding))
+    return dict(zip(offsets, string_list))
+
+def write_table(content):
+    """Previous implementation: each name written at its offset"""
+    stream = BytesIO()
+    for key, val in content.items():
+        stream.seek(key)
+        stream.write(val + b'\x00')
+    return stream.getvalue()
+
+def get_names(count):
+    names = [f"name_{i}".encode() for i in range(count)]
+    names += [b'[MATERIAL]', 'b\xe9ta'.encode('latin1'), b'a|b|c']
+    return names
+
+def test_build_write():
+    for first_offset in [0, 1]:
+        names = get_names(200)
+        string_table = StringTable()
+        string_table.build(names, first_offset)
+        stream = BytesIO()
+        string_table.write(stream)
+        data = stream.getvalue()
+        assert data == write_table(string_table.content)
+        assert string_table.get_size() == len(data)
+        assert string_table.content == read_table(data, first_offset)
+
+def test_read():
+    names = get_names(100)
+    data = b'\x00' + b'\x00'.join(names) + b'\x00'
+    stream = BytesIO(b'header' + data)
+    string_table = StringTable()
+    string_table.offset = 6
+    string_table.read(stream, len(data), 1)
+    assert stream.tell() == 0
+    assert string_table.content == read_table(data, 1)
+    for offset, name in string_table.content.items():
+        assert string_table.offset_of(name) == offset
+
+    # Unsized tables go to the end of the stream
+    other_table = StringTable()
+    other_table.offset = 6
+    other_table.read(stream, None, 1)
+    assert other_table.content == string_table.content
+
+def test_offset_of():
+    string_table = StringTable()
+    string_table.build(get_names(200), 1)
+    for offset, name in string_table.content.items():
+        assert string_table.offset_of(name) == offset
+
+def test_duplicates():
+    string_table = StringTable()
+    string_table.build([b'a', b'bb', b'a'], 1)
+    assert string_table.offset_of(b'a') == 1
+    assert list(string_table.content.keys()) == [1, 3, 6]
@@ -0,0 +1,35 @@
+import os
+from core.TX2D import TX2D
+from core.ConversionContext import ConversionContext
+
+def get_texture(context, data):
+    tx2d_object = TX2D(context=context)
+    tx2d_object.width = 256
+    tx2d_object.height = 256
+    tx2d_object.mipmap_count = 1
+    tx2d_object.texture_type = 0x18000000 # DXT5
+    tx2d_object.vram_data = data
+    return tx2d_object
+
+def test_texture_cache_disabled(tmp_path):
+    context = ConversionContext('dbrb', 'x360', cache_path=str(tmp_path))
+    data = os.urandom(64 * 64 * 16)
+    tiled = get_texture(context, data).get_swizzled_vram_data()
+    assert context.caches == {}
+    assert os.listdir(tmp_path) == []
+    assert bytes(get_texture(context, bytes(tiled)).get_unswizzled_vram_data()) == data
+
+def test_texture_cache(tmp_path):
+    context = ConversionContext('dbrb', 'x360', cache_path=str(tmp_path), use_texture_cache=True)
+    data = os.urandom(64 * 64 * 16)
+    tiled = bytes(get_texture(context, data).get_swizzled_vram_data())
+    cache = context.caches['textures']
+    assert len(cache.memory.entries) == 1
+    assert len(cache.get_entries()) == 1
+
+    # Read from the disk by another conversion, the memory tier being released with the context
+    context.close()
+    assert context.caches == {}
+    context = ConversionContext('dbrb', 'x360', cache_path=str(tmp_path), use_texture_cache=True)
+    assert bytes(get_texture(context, data).get_swizzled_vram_data()) == tiled
+    assert len(context.caches['textures'].memory.entries) == 1
@@ -0,0 +1,62 @@
+import os
+import struct
+import numpy as np
+import core.compression as compression
+
+# STPZ made from compressor_input.pak by dbrb_compressor.exe, the tool the codec replaced
+data_path = os.path.join(os.path.dirname(__file__), 'data')
+
+def read_fixture(name):
+    stream = open(os.path.join(data_path, name), 'rb')
+    data = stream.read()
+    stream.close()
+    return data
+
+def get_header(size):
+    return b'STPK' + struct.pack('>III', 1, 1, size)
+
+def test_roundtrip():
+    random_data = os.urandom(5000)
+    repeated_data = b'abc' * 4000 + bytes(3000) + b'abcd' * 100
+    mixed_data = b''.join([os.urandom(64) + bytes(64) for i in range(600)])
+    for data in [b'', b'a', random_data, repeated_data, mixed_data]:
+        data = get_header(len(data)) + data
+        compressed = compression.compress(data)
+        assert compressed[:4] == b'STPZ'
+        assert compressed[4:16] == data[4:16]
+        assert compression.decompress(compressed) == data
+
+def test_chunks():
+    # Data bigger than a chunk is split in several LCS chunks decompressed on their own
+    data = get_header(0) + bytes(np.arange(3 * compression.chunk_size - 16, dtype=np.uint8) // 7)
+    compressed = compression.compress(data)
+    assert compressed.count(b'0LCS') == 3
+    assert len(compressed) < len(data)
+    assert compression.decompress(compressed) == data
+
+def test_compressor():
+    # Written piece by piece, gives the same file as compressing all the data at once
+    batch_size = compression.chunk_size * compression.batch_chunks
+    data = get_header(0) + os.urandom(1000) * (batch_size // 1000 + 40)
+    stream = compression.BytesIO(b'data before')
+    stream.seek(0, os.SEEK_END)
+    compressor = compression.Compressor(stream)
+    for i in range(0, len(data), 7777):
+        compressor.write(data[i:i + 7777])
+    # Full batches of chunks are written as soon as they are compressed
+    assert stream.getvalue().count(b'0LCS') == compression.batch_chunks
+    compressor.finish()
+    assert stream.tell() == len(stream.getvalue())
+    assert stream.getvalue() == b'data before' + compression.compress(data)
+
+def test_decompress_chunk():
+    # 3 literals, then 7 bytes copied from 3 bytes back (overlapping the output)
+    chunk = bytes([3 << 1]) + b'abc' + bytes([(7 << 1) | 1, 3])
+    assert compression.decompress_chunk(chunk, 10) == b'abcabcabca'
+
+def test_compressor_output():
+    # Two chunks, with literal runs and matches over the max length and distance
+    data = read_fixture('compressor_input.pak')
+    compressed = read_fixture('compressor_output.zpak')
+    assert compression.decompress(compressed) == data
+    assert compression.compress(data) == compressed
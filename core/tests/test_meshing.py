@@ -0,0 +1,52 @@
+import random
+import numpy as np
+import core.meshing as meshing
+from core.tests.helpers import get_strip_triangles, get_face_key
+
+def get_mesh(triangle_count, seed):
+    random.seed(seed)
+    state = np.random.RandomState(seed)
+    control_point_count = triangle_count
+    control_point_indices = np.array([random.sample(range(control_point_count), 3) \
+        for i in range(triangle_count)]).ravel()
+    corner_count = len(control_point_indices)
+    return {
+        'name': 'mesh',
+        'positions': state.rand(control_point_count, 4),
+        'control_point_indices': control_point_indices,
+        'faces_triangles': None,
+        'layers': [
+            ('normals', state.randint(0, 2, (corner_count, 4)), {}),
+            ('uvs', state.randint(0, 2, (corner_count, 2)) / 2, {'resource_name': 'map1'})
+        ],
+        'blend_by_vertex': [[(random.randrange(4), random.random()) for j in range(2)] \
+            for i in range(control_point_count)],
+        'nb_bone_layer': 2,
+        'materials': {}
+    }
+
+def get_triangles(mesh):
+    # Corners of every triangle, as position rows
+    positions = mesh['positions'][mesh['control_point_indices']].astype(np.float32)
+    return sorted([get_face_key([tuple(row) for row in positions[i:i + 3].tolist()]) \
+        for i in range(0, len(positions), 3)])
+
+def test_build_mesh_data():
+    for game in ['dbut', 'dbrb2']:
+        mesh = get_mesh(300, 1)
+        buffers = meshing.build_mesh_data(mesh, game)
+        assert list(buffers.keys()) == ['positions', 'normals', 'uvs', 'bone_weights', 'bone_indices']
+        positions = buffers['positions'][0]['data'].tolist()
+
+        if game == 'dbut':
+            # Merged vertices and face indices
+            assert buffers.get_vertex_count() < len(mesh['control_point_indices'])
+            strip = buffers.face_indices
+        else:
+            # Vertices follow the strip, the same vertex being at several places
+            assert buffers.face_indices is None
+            positions = [tuple(row) for row in positions]
+            strip = [positions.index(row) for row in positions]
+        triangles = [get_face_key([tuple(positions[i]) for i in triangle]) \
+            for triangle in get_strip_triangles(strip)]
+        assert sorted(triangles) == get_triangles(mesh)
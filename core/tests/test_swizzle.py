@@ -0,0 +1,83 @@
+import os
+import numpy as np
+import core.utils as ut
+from core.swizzle import XBOX
+
+def get_linear_size(width, height, mipmap_count, texel_pitch):
+    size = 0
+    for mip in range(mipmap_count):
+        size += max(((width >> mip) + 3) // 4, 1) * max(((height >> mip) + 3) // 4, 1)
+    return size * texel_pitch
+
+def swizzle_level(data, block_width, block_height, texel_pitch):
+    """Tiles a single level in its own 32x32 blocks aligned surface, one block at a time"""
+    aligned_width = (block_width + 31) & ~31
+    aligned_height = (block_height + 31) & ~31
+    tiled = bytearray(aligned_width * aligned_height * texel_pitch)
+    for offset in range(aligned_width * aligned_height):
+        x = int(XBOX.XG_address_2D_tiled_x(offset, block_width, texel_pitch))
+        y = int(XBOX.XG_address_2D_tiled_y(offset, block_width, texel_pitch))
+        if (x < block_width) and (y < block_height):
+            src = (y * block_width + x) * texel_pitch
+            tiled[offset * texel_pitch:(offset + 1) * texel_pitch] = data[src:src + texel_pitch]
+    return tiled
+
+def test_mip_chain_roundtrip():
+    for width, height, texture_type, mipmap_count in [(256, 256, 'DXT5', 9), (512, 128, 'DXT1', 8),
+        (64, 256, 'ATI2', 7), (128, 128, 'DXT3', 4)]:
+        texel_pitch = XBOX.get_texel_pitch(texture_type)
+        data = os.urandom(get_linear_size(width, height, mipmap_count, texel_pitch))
+        count, tiled = XBOX.process(data, width, height, mipmap_count, texture_type, 'swizzle')
+        assert count == mipmap_count
+        count, linear = XBOX.process(bytes(tiled), width, height, count, texture_type, 'unswizzle')
+        assert count == mipmap_count
+        assert bytes(linear) == data
+
+def test_mip_chain_levels():
+    # Levels bigger than the mip tail are tiled in their own surface, one after the other
+    width, height, mipmap_count, texel_pitch = 512, 256, 6, 16
+    data = os.urandom(get_linear_size(width, height, mipmap_count, texel_pitch))
+    count, tiled = XBOX.process(data, width, height, mipmap_count, 'DXT5', 'swizzle')
+    tiled = bytes(ut.swap_endianness(bytearray(tiled), 2))
+
+    linear_offset = 0
+    tiled_offset = 0
+    for mip in range(3):
+        block_width = (width >> mip) // 4
+        block_height = (height >> mip) // 4
+        size = block_width * block_height * texel_pitch
+        level = swizzle_level(data[linear_offset:linear_offset + size], block_width, block_height,
+            texel_pitch)
+        assert tiled[tiled_offset:tiled_offset + len(level)] == bytes(level)
+        linear_offset += size
+        tiled_offset += len(level)
+
+def test_mip_tail():
+    # Every block of the chain has its own place, the tail fitting in a single surface
+    for width, height, mipmap_count in [(256, 256, 9), (256, 64, 9), (32, 128, 8), (16, 16, 5)]:
+        tiled_indices, linear_indices, levels = XBOX.get_chain_map(width, height, mipmap_count, 8)
+        linear_size = get_linear_size(width, height, mipmap_count, 8) // 8
+        assert sorted(linear_indices.tolist()) == list(range(linear_size))
+        assert len(np.unique(tiled_indices)) == len(tiled_indices)
+
+        packed_mip_base = max(min(int(width - 1).bit_length(), int(height - 1).bit_length()) - 4, 0)
+        tail_start = levels[packed_mip_base - 1][0] if (packed_mip_base > 0) else 0
+        tail_end = levels[-1][0]
+        assert tail_end - tail_start == 32 * 32
+        assert tiled_indices.max() < tail_end
+
+def test_single_level():
+    # Single level textures keep their size
+    data = os.urandom(64)
+    count, tiled = XBOX.process(data, 8, 8, 1, 'DXT5', 'swizzle')
+    assert (count, len(tiled)) == (1, 64)
+    count, linear = XBOX.process(bytes(tiled), 8, 8, 1, 'DXT5', 'unswizzle')
+    assert bytes(linear) == data
+
+    # Read as an aligned surface when the level covers it
+    data = os.urandom(64 * 64 * 16)
+    count, tiled = XBOX.process(data, 256, 256, 1, 'DXT5', 'swizzle')
+    expected = ut.swap_endianness(swizzle_level(data, 64, 64, 16), 2)
+    assert bytes(tiled) == bytes(expected)
+    count, linear = XBOX.process(bytes(tiled), 256, 256, 1, 'DXT5', 'unswizzle')
+    assert bytes(linear) == data
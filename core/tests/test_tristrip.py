@@ -0,0 +1,44 @@
+import random
+import core.tristrip as tristrip
+from core.tests.helpers import get_strip_triangles, get_face_key
+
+def get_grid(width, height):
+    triangles = []
+    for y in range(height):
+        for x in range(width):
+            a = y * (width + 1) + x
+            b = a + 1
+            c = a + width + 1
+            d = c + 1
+            triangles.append([a, b, c])
+            triangles.append([b, d, c])
+    return triangles
+
+def check_strip(triangles):
+    strip = tristrip.stripify(triangles)
+    expected = sorted([get_face_key(tuple(t)) for t in triangles if len(set(t)) == 3])
+    assert sorted([get_face_key(t) for t in get_strip_triangles(strip)]) == expected
+
+def test_grid():
+    check_strip(get_grid(1, 1))
+    check_strip(get_grid(8, 5))
+    check_strip(get_grid(30, 30))
+
+def test_disconnected():
+    random.seed(1)
+    triangles = []
+    for i in range(200):
+        triangles.append(random.sample(range(300), 3))
+    check_strip(triangles)
+
+def test_mixed_winding():
+    # Neighbors with opposite winding can't be in the same strip
+    triangles = get_grid(6, 6)
+    for i in range(0, len(triangles), 3):
+        triangles[i] = triangles[i][::-1]
+    check_strip(triangles)
+
+def test_degenerate():
+    assert tristrip.stripify([]) == []
+    assert tristrip.stripify([[0, 0, 1], [2, 3, 3]]) == []
+    check_strip([[0, 1, 2], [1, 1, 2], [2, 1, 3]])
@@ -0,0 +1,145 @@
+import numpy as np
+
+# Triangle list to triangle strip conversion (NvTriStrip like).
+# Strips are grown both ways from low connectivity faces, the next start face
+# is picked next to the previous strip to stay vertex cache friendly, and all
+# strips are stitched into a single one with degenerate triangles.
+cache_size = 16
+
+def build_adjacency(triangles):
+    """Returns, for every triangle edge, the index of the triangle sharing it or -1"""
+    edge_start = triangles.ravel()
+    edge_end = np.roll(triangles, -1, axis=1).ravel()
+    low = np.minimum(edge_start, edge_end).astype(np.int64)
+    high = np.maximum(edge_start, edge_end).astype(np.int64)
+    keys = low * (int(triangles.max()) + 1) + high
+
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    group_start = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    group_size = np.diff(np.r_[group_start, len(keys)])
+
+    # Only manifold edges (shared by 2 triangles) connect strips
+    first = order[group_start[group_size == 2]]
+    second = order[group_start[group_size == 2] + 1]
+    adjacency = np.full(len(keys), -1, dtype=np.int64)
+    adjacency[first] = second // 3
+    adjacency[second] = first // 3
+
+    return adjacency.reshape(-1, 3)
+
+def is_same_winding(triangle, a, b, c):
+    return (triangle == [a, b, c]) or (triangle == [b, c, a]) or (triangle == [c, a, b])
+
+def grow_strip(triangles, adjacency, used, taken, start, strip, parity):
+    """Extends strip, whose first triangle is start at the given parity, as far as possible"""
+    faces = [start]
+    current = start
+    while True:
+        triangle = triangles[current]
+        # The exit edge is the one opposite to the oldest vertex
+        edge = (triangle.index(strip[-3]) + 1) % 3
+        neighbor = adjacency[current][edge]
+        if (neighbor < 0) or used[neighbor] or (neighbor in taken):
+            break
+
+        a, b = strip[-2], strip[-1]
+        neighbor_triangle = triangles[neighbor]
+        c = [x for x in neighbor_triangle if (x != a) and (x != b)]
+        if len(c) != 1:
+            break
+        c = c[0]
+        if (len(strip) - 2 + parity) % 2 == 0:
+            if not is_same_winding(neighbor_triangle, a, b, c):
+                break
+        elif not is_same_winding(neighbor_triangle, b, a, c):
+            break
+
+        strip.append(c)
+        faces.append(neighbor)
+        taken.add(neighbor)
+        current = neighbor
+    return strip, faces
+
+def build_strip(triangles, adjacency, used, start, rotation):
+    a, b, c = [triangles[start][(rotation + k) % 3] for k in range(3)]
+    taken = {start}
+    forward, forward_faces = grow_strip(triangles, adjacency, used, taken, start, [a, b, c], 0)
+    backward, backward_faces = grow_strip(triangles, adjacency, used, taken, start, [c, b, a], 1)
+
+    # Backward part is reversed, keeping the start face on an even position
+    backward = backward[::-1]
+    backward_faces = backward_faces[:0:-1]
+    if len(backward_faces) % 2 == 1:
+        backward = backward[1:]
+        backward_faces = backward_faces[1:]
+
+    return backward + forward[3:], backward_faces + forward_faces
+
+def get_cache_hits(strip, cache):
+    return len(set(strip[:cache_size]) & cache)
+
+def stripify(indices):
+    """Converts a triangle list into a single stitched triangle strip"""
+    triangles = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    # Degenerate triangles are dropped
+    triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & \
+        (triangles[:, 0] != triangles[:, 2]) & (triangles[:, 1] != triangles[:, 2])]
+    if len(triangles) == 0:
+        return []
+
+    adjacency = build_adjacency(triangles)
+    degree = (adjacency >= 0).sum(axis=1)
+    start_order = np.argsort(degree, kind='stable').tolist()
+    triangles = triangles.tolist()
+    adjacency = adjacency.tolist()
+    degree = degree.tolist()
+    used = [False] * len(triangles)
+
+    strips = []
+    cache = set()
+    previous_faces = []
+    start_idx = 0
+    remaining = len(triangles)
+    while remaining > 0:
+        # Prefer a free face next to the previous strip, with the fewest free neighbors
+        start = -1
+        for face in previous_faces:
+            for neighbor in adjacency[face]:
+                if (neighbor >= 0) and not used[neighbor]:
+                    if (start == -1) or (degree[neighbor] < degree[start]):
+                        start = neighbor
+        if start == -1:
+            while used[start_order[start_idx]]:
+                start_idx += 1
+            start = start_order[start_idx]
+
+        best = None
+        for rotation in range(3):
+            strip, faces = build_strip(triangles, adjacency, used, start, rotation)
+            score = (len(faces), get_cache_hits(strip, cache))
+            if (best == None) or (score > best[0]):
+                best = (score, strip, faces)
+        score, strip, faces = best
+
+        for face in faces:
+            used[face] = True
+            for neighbor in adjacency[face]:
+                if neighbor >= 0:
+                    degree[neighbor] -= 1
+        remaining -= len(faces)
+        previous_faces = faces
+        cache = set(strip[-cache_size:])
+        strips.append(strip)
+
+    # Stitch strips with degenerate triangles, keeping each strip on an even position
+    strip_indices = list(strips[0])
+    for strip in strips[1:]:
+        strip_indices.append(strip_indices[-1])
+        if len(strip_indices) % 2 == 1:
+            strip_indices.append(strip[0])
+        else:
+            strip_indices.extend([strip[0], strip[0]])
+        strip_indices.extend(strip)
+
+    return strip_indices
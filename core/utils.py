@@ -1,7 +1,8 @@
 import os, stat
+import mmap
 import shutil
 import inspect
-import core.common as cm
+import numpy as np
 
 endian = 'big'
 
@@ -88,6 +89,23 @@ def add_padding(num, length = 16):
         num += length - (num % length)
     return num
 
+# swap byte order of every word, in place for bytearrays
+def swap_endianness(data, word_size = 2):
+    if not isinstance(data, bytearray):
+        data = bytearray(data)
+    words = np.frombuffer(data, dtype=f"u{word_size}", count=len(data) // word_size)
+    words.byteswap(inplace=True)
+    return data
+
+# slice of stream data, without copy for mapped files and memory streams
+def read_view(stream, offset, size):
+    if isinstance(stream, mmap.mmap):
+        return memoryview(stream)[offset:offset + size]
+    if hasattr(stream, 'getbuffer'):
+        return stream.getbuffer()[offset:offset + size]
+    stream.seek(offset)
+    return stream.read(size)
+
 # bytes to string name
 def b2s_name(bytes):
     return bytes.decode('latin1')
@@ -116,24 +134,36 @@ def read_until(stream, offset, end_char = b'\x00'):
     stream.seek(initial_pos)
     return bytes(res)
 
-def init_temp_dir():
-    if not os.path.exists(cm.temp_path):
-        os.mkdir(cm.temp_path)
-
-def copy_to_temp_dir(path):
-    init_temp_dir()
-    name, ext = os.path.splitext(os.path.basename(path))
-    shutil.copy2(path, cm.temp_path)
-    return os.path.join(cm.temp_path, name + ext)
-
-def empty_temp_dir():
-    path = os.path.abspath(cm.temp_path)
-    if os.path.exists(path):
-        shutil.rmtree(path, onerror = on_rm_error)
-
-def clear_temp_dir():
-    empty_temp_dir()
-    init_temp_dir()
+def get_data_paths(spr_path, game):
+    """
+    Returns the ioram and vram files paths matching a SPR file, None when missing
+    """
+    name, ext = os.path.splitext(spr_path)
+    ext = ext.replace('.', '').lower()
+
+    if (len(name) >= 2):
+        last_chars = name[-2:]
+        if (last_chars in ['_s', '_m']):
+            name = name[:-2]
+
+    ioram_path = name
+    vram_path = name
+    if ('pak' in ext):
+        ioram_path += '_i.' + ext
+        vram_path += '_v.' + ext
+    else:
+        ioram_path += '.ioram'
+        vram_path += '.vram'
+
+    if not os.path.exists(ioram_path):
+        ioram_path = None
+    if not os.path.exists(vram_path):
+        vram_path = None
+
+    if (game == 'dbzb') and spr_path.endswith("pak"):
+        ioram_path = spr_path
+
+    return ioram_path, vram_path
 
 def on_rm_error(func, path, exc_info):
     os.chmod( path, stat.S_IWRITE )
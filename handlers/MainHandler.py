@@ -1,4 +1,5 @@
 import os
+import re
 from io import BytesIO
 from PyQt5.QtCore import QThread
 from natsort import natsorted
@@ -47,6 +48,9 @@ class MainHandler():
                 self.view_handler.window_handler.set_progress
             )
             self.task.result_signal.connect(self.task_done_action)
+            self.task.error_signal.connect(
+                lambda message: self.task_error_action(message, error_message)
+            )
             self.task.finish_signal.connect(self.thread.quit)
             self.thread.started.connect(self.task.run)
             self.thread.finished.connect(self.task.deleteLater)
@@ -59,6 +63,11 @@ class MainHandler():
         self.view_handler.enable_elements()
         self.view_handler.show_message_dialog('Task done !')
 
+    def task_error_action(self, message, error_message):
+        self.view_handler.close_window()
+        self.view_handler.enable_elements()
+        self.view_handler.show_message_dialog(f"{error_message} :\n{message}", 'critical')
+
     def yes_action(self, observed, callback):
         self.view_handler.close_window()
         if callback != None:
@@ -141,31 +150,10 @@ class MainHandler():
                 name, ext = os.path.splitext(cm.spr_path)
                 ext = ext.replace('.', '').lower()
                 base_filter = self.sort_filter(base_filter, ext)
-
-                if (len(name) >= 2):
-                    last_chars = name[-2:]
-                    if (last_chars in ['_s', '_m']):
-                        name = name[:-2]
-
-                cm.ioram_path = name
-                cm.vram_path = name
-                if ('pak' in ext):
-                    cm.ioram_path += '_i.' + ext
-                    cm.vram_path += '_v.' + ext
-                else:
-                    cm.ioram_path += '.ioram'
-                    cm.vram_path += '.vram'
-
-                if ((cm.ioram_path) and (not os.path.exists(cm.ioram_path))):
-                    cm.ioram_path = None
-                if ((cm.vram_path) and (not os.path.exists(cm.vram_path))):
-                    cm.vram_path = None
+                cm.ioram_path, cm.vram_path = ut.get_data_paths(cm.spr_path, cm.selected_game)
             else:
                 return
 
-            if (cm.selected_game == 'dbzb') and cm.spr_path.endswith("pak"):
-                cm.ioram_path = cm.spr_path
-
             if cm.ioram_path == None:
                 filter = base_filter.copy()
                 filter.insert(-1,'IORAM (*.ioram)')
@@ -1,19 +1,49 @@
-import time
 from PyQt5.QtCore import QObject, pyqtSignal
+import core.common as cm
+from core.ConversionContext import ConversionContext
 
 class Task(QObject):
     progress_signal = pyqtSignal(int)
     result_signal = pyqtSignal(str)
+    error_signal = pyqtSignal(str)
     finish_signal = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, context = None):
         super().__init__()
         self.current_progress = 0
+        self.context = self.get_context() if (context == None) else context
+        if self.context.progress == None:
+            self.context.progress = self.send_progress
 
-    def send_progress(self, end):
-        i = self.current_progress
-        while i <= end:
-            self.progress_signal.emit(i)
-            time.sleep(0.01)
-            i += 1
-        self.current_progress = end
\ No newline at end of file
+    def run(self):
+        """
+        Processes the task, failures are sent with the error signal.
+        The finish signal is always sent, ending the thread
+        """
+        try:
+            with self.context:
+                self.process()
+
+            self.result_signal.emit(self.__class__.__name__)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            self.error_signal.emit(str(e))
+        finally:
+            self.finish_signal.emit()
+
+    def get_context(self):
+        """
+        Returns a context holding the app settings and selected paths, only read here
+        """
+        values = {}
+        for key in ConversionContext.defaults.keys():
+            if hasattr(cm, key):
+                values[key] = getattr(cm, key)
+        return ConversionContext(cm.selected_game, cm.selected_platform, **values)
+
+    def send_progress(self, value):
+        # The view limits its own refresh rate, only changes are sent
+        if value != self.current_progress:
+            self.current_progress = value
+            self.progress_signal.emit(value)
\ No newline at end of file
@@ -29,6 +29,7 @@ class MainWindowHandler(WindowHandler, QWidget):
 
         self.ui.blender_chk_box.clicked.connect(self.set_use_blender)
         self.ui.debug_chk_box.clicked.connect(self.set_use_debug_mode)
+        self.ui.block_cache_chk_box.clicked.connect(self.set_use_block_cache)
     
     def init_ui(self):
         super().init_ui()
@@ -48,6 +49,7 @@ class MainWindowHandler(WindowHandler, QWidget):
         # checkboxes
         self.ui.blender_chk_box.setChecked(cm.use_blender)
         self.ui.debug_chk_box.setChecked(cm.use_debug_mode)
+        self.ui.block_cache_chk_box.setChecked(cm.use_block_cache)
     
     @QtCore.pyqtSlot()
     def game_select_action(self):
@@ -81,4 +83,12 @@ class MainWindowHandler(WindowHandler, QWidget):
             cm.use_debug_mode = not cm.use_debug_mode
         else:
             cm.use_debug_mode = False
-        cm.settings.setValue("Debug", cm.use_debug_mode)
\ No newline at end of file
+        cm.settings.setValue("Debug", cm.use_debug_mode)
+
+    @QtCore.pyqtSlot()
+    def set_use_block_cache(self):
+        if cm.use_block_cache != None:
+            cm.use_block_cache = not cm.use_block_cache
+        else:
+            cm.use_block_cache = False
+        cm.settings.setValue("BlockCache", cm.use_block_cache)
@@ -1,8 +1,11 @@
 from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import QTimer
 from ui.handlers.WindowHandler import WindowHandler
 from ui.views.ProgressWindow import Ui_ProgressWindow
 
 class ProgressWindowHandler(WindowHandler, QWidget):   
+    refresh_interval = 50 # ms
+
     def load(self):
         self.ui = Ui_ProgressWindow()
         self.ui.setupUi(self.window)
@@ -10,6 +13,15 @@ class ProgressWindowHandler(WindowHandler, QWidget):
     
     def init_ui(self):
         super().init_ui()
+        self.progress = 0
+        self.refresh_timer = QTimer(self.window)
+        self.refresh_timer.timeout.connect(self.refresh_progress)
+        self.refresh_timer.start(self.refresh_interval)
 
     def set_progress(self, val):
-        self.ui.progress_bar.setValue(val)
\ No newline at end of file
+        # Shown on next refresh, intermediate values are skipped
+        self.progress = val
+
+    def refresh_progress(self):
+        if self.ui.progress_bar.value() != self.progress:
+            self.ui.progress_bar.setValue(self.progress)
\ No newline at end of file
@@ -248,8 +248,13 @@ class Ui_MainWindow(object):
         self.debug_chk_box = QtWidgets.QCheckBox(self.import_export_grp_box)
         self.debug_chk_box.setObjectName("debug_chk_box")
         self.horizontalLayout_2.addWidget(self.debug_chk_box)
-        spacerItem8 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
-        self.horizontalLayout_2.addItem(spacerItem8)
+        spacerItem9 = QtWidgets.QSpacerItem(50, 20, QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_2.addItem(spacerItem9)
+        self.block_cache_chk_box = QtWidgets.QCheckBox(self.import_export_grp_box)
+        self.block_cache_chk_box.setObjectName("block_cache_chk_box")
+        self.horizontalLayout_2.addWidget(self.block_cache_chk_box)
+        spacerItem10 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.horizontalLayout_2.addItem(spacerItem10)
         self.verticalLayout_5.addWidget(self.import_export_grp_box)
         self.verticalLayout.addWidget(self.options_frame)
         self.verticalLayout_2.addWidget(self.main_frame)
@@ -271,5 +276,7 @@ class Ui_MainWindow(object):
         self.import_export_grp_box.setTitle(_translate("MainWindow", "Import / Export"))
         self.blender_chk_box.setText(_translate("MainWindow", "Blender"))
         self.debug_chk_box.setText(_translate("MainWindow", "Debug"))
+        self.block_cache_chk_box.setToolTip(_translate("MainWindow", "Reuse encoded textures and meshes of unchanged files on import"))
+        self.block_cache_chk_box.setText(_translate("MainWindow", "Reuse blocks"))
 
 from ui.resources.resources import *